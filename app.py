@@ -1,14 +1,17 @@
 import os
 import logging
-import json
-from datetime import datetime
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, session
+import mimetypes
+from datetime import datetime, timezone
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, session, Response, stream_with_context, send_file, make_response
 from werkzeug.utils import secure_filename
 import uuid
+import time
 import tempfile
 import shutil
 import glob
+import posixpath
 from dotenv import load_dotenv
+from sqlalchemy.orm import load_only
 
 # Load environment variables from .env file
 load_dotenv()
@@ -35,7 +38,7 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
 # # Import models and initialize the database
-from models import db, Criteria, Submission, SubmissionFile, AnalysisSettings
+from models import db, Criteria, CriteriaItem, Submission, SubmissionFile, AnalysisSettings, AnalysisJob, NotebookContent
 
 # # Initialize the database with the app
 db.init_app(app)
@@ -44,11 +47,34 @@ db.init_app(app)
 from services.pdf_processor import PDFProcessor
 from services.notebook_processor import NotebookProcessor
 from services.ollama_client import OllamaClient
+from services.ollama_health import OllamaHealth
+from services.model_warmup import ModelWarmer
+from services.job_queue import JobQueue
+from services.grader import SubmissionGrader
+from services.feedback_cache import FeedbackCache
+from services.notebook_store import NotebookStore
+from services.submission_ingest import SubmissionIngester
+from services.submission_listing import SubmissionListing
+from services.file_preview import FilePreview
+from services.notebook_preview import NotebookPreviewCache
+from services.progress_stream import ProgressStream
 
 # Initialize services
-pdf_processor = PDFProcessor()
+pdf_processor = PDFProcessor(
+    cache_dir=os.environ.get("PDF_TEXT_CACHE_DIR", os.path.join(UPLOAD_FOLDER, 'pdf_cache')))
 notebook_processor = NotebookProcessor()
 ollama_client = OllamaClient()
+ollama_health = OllamaHealth(ollama_client)
+model_warmer = ModelWarmer(ollama_client)
+job_queue = JobQueue()
+feedback_cache = FeedbackCache()
+grader = SubmissionGrader(ollama_client, feedback_cache)
+notebook_store = NotebookStore()
+submission_ingester = SubmissionIngester(notebook_store=notebook_store)
+submission_listing = SubmissionListing()
+file_preview = FilePreview()
+notebook_preview = NotebookPreviewCache(
+    os.environ.get("NOTEBOOK_PREVIEW_CACHE_DIR", os.path.join(UPLOAD_FOLDER, 'preview_cache')))
 
 # # Create all tables in the database
 with app.app_context():
@@ -73,17 +99,21 @@ def allowed_file(filename, allowed_extensions):
 def index():
     """Render the main page"""
     # Get Ollama API URL for display in the UI
-    ollama_url = os.environ.get("OLLAMA_API_URL", "http://localhost:11434")
+    ollama_url = ", ".join(ollama_client.base_urls)
     
     # Get criteria, submissions, and analysis settings from database
     criteria = Criteria.query.order_by(Criteria.created_at.desc()).first()
-    submissions = Submission.query.order_by(Submission.created_at.desc()).all()
+    submissions = submission_listing.query().order_by(Submission.created_at.desc()).all()
     settings = AnalysisSettings.query.first()
+    # Analyzed rows whose notebook, criteria or settings changed since their feedback was generated
+    stale_ids = grader.stale_submission_ids(submissions, criteria, settings) if criteria and settings else set()
     
     return render_template('index.html', 
                           criteria=criteria.to_dict() if criteria else None,
                           submissions=[s.to_dict() for s in submissions],
                           settings=settings.to_dict() if settings else None,
+                          cache_stats=feedback_cache.stats(),
+                          stale_ids=stale_ids,
                           ollama_url=ollama_url)
 
 @app.route('/upload-criteria', methods=['POST'])
@@ -115,10 +145,15 @@ def upload_criteria():
                 name=criteria_name,
                 text=criteria_text
             )
+            # Individual criteria, for grading one criterion at a time
+            criteria.items = [
+                CriteriaItem(position=position, text=item)
+                for position, item in enumerate(pdf_processor.extract_criteria(criteria_text))
+            ]
             db.session.add(criteria)
             db.session.commit()
             
-            flash('Criteria uploaded successfully', 'success')
+            flash(f'Criteria uploaded successfully ({len(criteria.items)} criteria found)', 'success')
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}")
             flash(f'Error processing PDF: {str(e)}', 'danger')
@@ -165,37 +200,21 @@ def upload_submissions():
             # Process notebooks from ZIP
             notebooks = notebook_processor.process_zip(zip_path, extract_dir)
             
-            # Track number of added submissions
-            added_count = 0
-            
-            # Save submissions to database
-            for notebook in notebooks:
-                # Create submission record
-                submission = Submission(
-                    folder_name=notebook['folder_name'],
-                    notebook_file=next((f for f in notebook['files'] if f.endswith('.ipynb')), None),
-                    file_path=os.path.join(extract_dir, notebook['folder_name']),
-                    notebook_content=notebook['notebook_content'],
-                    analyzed=False
-                )
-                db.session.add(submission)
-                db.session.flush()  # Get the submission ID without committing
-                
-                # Add individual files
-                for file_name in notebook['files']:
-                    file_path = os.path.join(extract_dir, notebook['folder_name'], file_name)
-                    submission_file = SubmissionFile(
-                        submission_id=submission.id,
-                        filename=file_name,
-                        file_path=file_path
-                    )
-                    db.session.add(submission_file)
-                
-                added_count += 1
+            # Save submissions to database, updating folders that were uploaded before
+            result = submission_ingester.ingest(notebooks, zip_path, extract_dir)
             
             # Commit all changes
             db.session.commit()
-            flash(f'Successfully processed {added_count} submissions', 'success')
+            if result['replaced_content_hashes']:
+                notebook_store.prune(result['replaced_content_hashes'])
+            if result['replaced_upload_dirs']:
+                submission_ingester.prune_upload_dirs(result['replaced_upload_dirs'], app.config['UPLOAD_FOLDER'])
+            if not result['added'] and not result['updated'] and not db.session.query(
+                    Submission.query.filter(Submission.archive_path == zip_path).exists()).scalar():
+                # Every folder was already uploaded unchanged, so nothing references this copy
+                shutil.rmtree(upload_dir, ignore_errors=True)
+            flash(f"Successfully processed {result['added'] + result['updated'] + result['unchanged']} submissions: "
+                  f"{result['added']} new, {result['updated']} updated, {result['unchanged']} unchanged", 'success')
         except Exception as e:
             logger.error(f"Error processing ZIP: {str(e)}")
             flash(f'Error processing ZIP: {str(e)}', 'danger')
@@ -211,7 +230,7 @@ def upload_submissions():
 
 @app.route('/analyze', methods=['POST'])
 def analyze_submissions():
-    """Analyze selected submissions using Ollama"""
+    """Queue selected submissions for analysis by the background workers"""
     try:
         # Get criteria
         criteria = Criteria.query.order_by(Criteria.created_at.desc()).first()
@@ -232,76 +251,74 @@ def analyze_submissions():
             return redirect(url_for('index'))
         
         # Get submissions that are selected for analysis
-        submissions = Submission.query.filter(Submission.id.in_(selected_ids)).all()
-        if not submissions:
+        submission_ids = [row.id for row in db.session.query(Submission.id).filter(Submission.id.in_(selected_ids))]
+        if not submission_ids:
             flash('No submissions found matching the selected IDs.', 'info')
             return redirect(url_for('index'))
         
-        analyzed_count = 0
-        total_count = len(submissions)
-        
-        # Process each submission
-        for submission in submissions:
-            try:
-                # Prepare prompt for Ollama with custom preamble and postamble
-                notebook_content = submission.notebook_content
-                
-                prompt = f"""
-                {settings.preamble}
-                
-                ASSESSMENT CRITERIA:
-                {criteria.text}
-                
-                NOTEBOOK CONTENT:
-                {json.dumps(notebook_content, indent=2)}
-                
-                Please provide a detailed evaluation focusing on:
-                1. Meeting the assignment requirements
-                2. Code quality and organization
-                3. Documentation and comments
-                4. Results and conclusions
-                5. Areas for improvement
-                
-                {settings.postamble}
-                """
-                
-                # Get response from Ollama
-                feedback = ollama_client.generate_feedback(prompt)
-                
-                # Update submission with feedback
-                submission.feedback = feedback
-                submission.analyzed = True
-                submission.updated_at = datetime.utcnow()
-                db.session.commit()
-                
-                analyzed_count += 1
-                logger.debug(f"Analyzed submission: {submission.id} ({analyzed_count}/{total_count})")
-                
-                # Update progress in the session
-                session['analysis_progress'] = {
-                    'current': analyzed_count,
-                    'total': total_count
-                }
-                
-            except Exception as e:
-                logger.error(f"Error analyzing submission {submission.id}: {str(e)}")
-                db.session.rollback()
-                # Continue with next submission even if one fails
-        
-        flash(f'Successfully analyzed {analyzed_count} out of {total_count} submissions', 'success')
+        # Optionally skip submissions whose feedback matches their current notebook, criteria and settings
+        up_to_date_count = 0
+        if request.form.get('stale_only') in ('on', 'true', '1'):
+            candidates = Submission.query.options(
+                load_only(Submission.id, Submission.content_hash, Submission.feedback_fingerprint)
+            ).filter(Submission.id.in_(submission_ids)).all()
+            stale_ids = grader.stale_submission_ids(candidates, criteria, settings)
+            up_to_date_count = len(submission_ids) - len(stale_ids)
+            submission_ids = [submission_id for submission_id in submission_ids if submission_id in stale_ids]
+            if not submission_ids:
+                flash('All selected submissions are up to date.', 'info')
+                return redirect(url_for('index'))
+        
+        # Enqueue one job per submission; workers (worker.py) do the grading
+        bypass_cache = request.form.get('bypass_cache') in ('on', 'true', '1')
+        batch_id, jobs = job_queue.enqueue(submission_ids, criteria_id=criteria.id, bypass_cache=bypass_cache)
+        session['analysis_batch'] = batch_id
+        if jobs:
+            # Load the model while the workers pick up the jobs, so the first one doesn't wait for it
+            model_warmer.warm_up_async()
+        
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({
+                'batch_id': batch_id,
+                'job_ids': [job.id for job in jobs]
+            }), 202
+        
+        skipped_count = len(submission_ids) - len(jobs)
+        message = f'Queued {len(jobs)} submissions for analysis (batch {batch_id})'
+        if skipped_count:
+            message += f'; {skipped_count} already queued'
+        if up_to_date_count:
+            message += f'; {up_to_date_count} up to date'
+        flash(message, 'success')
     except Exception as e:
         logger.error(f"Error in analyze_submissions: {str(e)}")
-        flash(f'Error analyzing submissions: {str(e)}', 'danger')
+        flash(f'Error queueing submissions: {str(e)}', 'danger')
+        db.session.rollback()
     
-    # Clear progress from session
-    session.pop('analysis_progress', None)
     return redirect(url_for('index'))
 
 @app.route('/submissions', methods=['GET'])
 def get_submissions():
-    """Get all submissions as JSON for the table"""
-    submissions = Submission.query.order_by(Submission.created_at.desc()).all()
-    return jsonify([s.to_dict() for s in submissions])
+    """Get a page of submissions as JSON for the table"""
+    analyzed = request.args.get('analyzed')
+    try:
+        page = submission_listing.page(
+            limit=request.args.get('limit', type=int),
+            cursor=request.args.get('cursor'),
+            sort=request.args.get('sort', 'created_at'),
+            order=request.args.get('order', 'desc'),
+            analyzed=None if analyzed is None else analyzed.lower() == 'true',
+            folder=request.args.get('folder'),
+            include_feedback=request.args.get('include_feedback', 'false').lower() == 'true'
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify(page)
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Get feedback cache size and hit/miss counts"""
+    return jsonify(feedback_cache.stats())
 
 @app.route('/submission/<submission_id>', methods=['PUT'])
 def update_submission(submission_id):
@@ -326,32 +343,37 @@ def update_submission(submission_id):
 
 @app.route('/test-ollama', methods=['GET'])
 def test_ollama():
-    """Test connection to Ollama API"""
+    """Test connection to Ollama API without running the model"""
     try:
-        ollama_url = os.environ.get("OLLAMA_API_URL", "http://localhost:11434")
+        ollama_url = ", ".join(ollama_client.base_urls)
         logger.debug(f"Testing connection to Ollama at {ollama_url}")
         
-        # Try to connect to the Ollama API
-        available = ollama_client.is_available()
+        # Lists installed and loaded models; cached for OLLAMA_HEALTH_TTL seconds unless refresh=true
+        health = ollama_health.check(force=request.args.get('refresh', 'false').lower() == 'true')
         
-        if available:
+        if health['available']:
             return jsonify({
                 'status': 'success',
                 'message': 'Successfully connected to Ollama API',
-                'url': ollama_url
+                'url': ollama_url,
+                'health': health
             })
+        elif any(host['reachable'] for host in health['hosts']):
+            message = f"Connected to Ollama API, but model {health['model']} is not installed"
         else:
-            return jsonify({
-                'status': 'error',
-                'message': 'Could not connect to Ollama API',
-                'url': ollama_url
-            }), 500
+            message = 'Could not connect to Ollama API'
+        return jsonify({
+            'status': 'error',
+            'message': message,
+            'url': ollama_url,
+            'health': health
+        }), 500
     except Exception as e:
         logger.error(f"Error testing Ollama: {str(e)}")
         return jsonify({
             'status': 'error',
             'message': f'Error: {str(e)}',
-            'url': os.environ.get("OLLAMA_API_URL", "http://localhost:11434")
+            'url': ", ".join(ollama_client.base_urls)
         }), 500
 
 @app.route('/update_settings', methods=['POST'])
@@ -395,15 +417,24 @@ def delete_submission(submission_id):
         
         # Get the submission folder path
         folder_path = submission.file_path
+        content_hash = submission.content_hash
         
         # Delete from database
         db.session.delete(submission)  # This will cascade delete files
         db.session.commit()
         
-        # Delete the folder if it exists
-        if folder_path and os.path.exists(folder_path):
-            if os.path.isdir(folder_path):
+        # Drop its notebook content unless another submission shares it
+        if content_hash:
+            notebook_store.prune([content_hash])
+        
+        # Delete the folder if it exists, never touching anything outside the upload folder
+        # or a folder that holds another notebook's submission
+        if folder_path and os.path.isdir(folder_path) and not db.session.query(
+                Submission.query.filter(Submission.file_path == folder_path).exists()).scalar():
+            if _in_upload_folder(folder_path):
                 shutil.rmtree(folder_path)
+            else:
+                logger.warning(f"Not deleting {folder_path}: outside the upload folder")
         
         flash(f'Submission "{submission.folder_name}" deleted successfully', 'success')
     except Exception as e:
@@ -413,27 +444,138 @@ def delete_submission(submission_id):
     
     return redirect(url_for('index'))
 
+def _in_upload_folder(path):
+    """Whether a path, with symlinks resolved, lies strictly inside the upload folder."""
+    upload_folder = os.path.realpath(app.config['UPLOAD_FOLDER'])
+    resolved = os.path.realpath(path)
+    return resolved != upload_folder and os.path.commonpath([upload_folder, resolved]) == upload_folder
+
+def _locate_submission_file(submission_id, filename):
+    """
+    Find a submission file on disk, extracting it from the uploaded ZIP on first use.
+
+    Returns:
+        tuple: The submission (None if it does not exist) and the file's path
+        (None if the file does not exist).
+    """
+    submission = db.session.get(Submission, submission_id)
+    if not submission:
+        return None, None
+    
+    # Find the specific file
+    file_obj = SubmissionFile.query.filter_by(
+        submission_id=submission_id, 
+        filename=filename
+    ).first()
+    
+    if not file_obj:
+        return submission, None
+    if not _in_upload_folder(file_obj.file_path):
+        logger.warning(f"Refusing to serve {file_obj.file_path}: outside the upload folder")
+        return submission, None
+    
+    # Files not extracted at upload time are pulled out of the ZIP on first view
+    if not os.path.exists(file_obj.file_path) and file_obj.archive_member and \
+            submission.archive_path and _in_upload_folder(submission.archive_path) and \
+            os.path.exists(submission.archive_path):
+        extract_dir = os.path.join(os.path.dirname(submission.archive_path), 'extracted')
+        notebook_processor.extract_member(submission.archive_path, file_obj.archive_member, extract_dir)
+    
+    if not os.path.exists(file_obj.file_path):
+        return submission, None
+    return submission, file_obj.file_path
+
+def _file_validators(path):
+    """ETag and Last-Modified for a file, from its size and modification time."""
+    stat = os.stat(path)
+    etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    # HTTP dates have whole-second precision
+    last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc)
+    return etag, last_modified
+
+def _not_modified(etag, last_modified):
+    """Whether the client's cached copy, per If-None-Match or If-Modified-Since, is current."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+def _conditional(response, etag, last_modified):
+    """Attach validators so the browser revalidates instead of downloading again."""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+def _notebook_submission(submission_id, filename):
+    """
+    Find the submission whose stored notebook content is the given file.
+
+    Every notebook in a folder is listed among the files of each of that folder's
+    submissions, so the file's archive member path is matched to the submission
+    created from it, preferring one from the same upload.
+
+    Returns:
+        Submission: The submission storing the notebook, or None if none does.
+    """
+    file_obj = SubmissionFile.query.filter_by(submission_id=submission_id, filename=filename).first()
+    member_path = NotebookProcessor.safe_member_path(file_obj.archive_member) \
+        if file_obj and file_obj.archive_member else None
+    if member_path is None:
+        return None
+    
+    archive_path = db.session.query(Submission.archive_path).filter(Submission.id == submission_id).scalar()
+    return Submission.query.filter(
+        Submission.folder_name == (posixpath.dirname(member_path) or posixpath.basename(member_path)),
+        Submission.notebook_file == posixpath.basename(member_path),
+        db.or_(Submission.content_hash.isnot(None), Submission.legacy_notebook_content.isnot(None))
+    ).order_by(
+        (Submission.archive_path == archive_path).desc(), Submission.created_at.desc(), Submission.id.desc()
+    ).first()
+
+def _notebook_preview(submission, filename):
+    """Render a submission's stored notebook as HTML, revalidated by content hash"""
+    content_hash = submission.content_hash or NotebookStore.make_hash(submission.notebook_content)
+    # The page also shows the folder name, so the ETag is per submission
+    etag = f"{notebook_preview.etag(content_hash)}-{submission.id}"
+    if request.if_none_match and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        preview = notebook_preview.get(content_hash, lambda: submission.notebook_content)
+        response = make_response(render_template('notebook_viewer.html',
+                                                 filename=filename,
+                                                 preview=preview,
+                                                 submission_id=submission.id,
+                                                 submission=submission.folder_name))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/view-file/<int:submission_id>/<path:filename>')
 def view_file(submission_id, filename):
-    """View the contents of a file"""
+    """Preview a file one page at a time, or a submission's notebook as HTML"""
     try:
-        # Get the submission and its directory
-        submission = Submission.query.get(submission_id)
+        # Notebooks are rendered from their stored content; ?raw=true shows the JSON
+        if filename.lower().endswith('.ipynb') and request.args.get('raw', 'false').lower() != 'true':
+            notebook_submission = _notebook_submission(submission_id, filename)
+            if notebook_submission:
+                return _notebook_preview(notebook_submission, filename)
+        
+        submission, path = _locate_submission_file(submission_id, filename)
         if not submission:
             return "Submission not found", 404
-        
-        # Find the specific file
-        file_obj = SubmissionFile.query.filter_by(
-            submission_id=submission_id, 
-            filename=filename
-        ).first()
-        
-        if not file_obj or not os.path.exists(file_obj.file_path):
+        if not path:
             return "File not found", 404
         
-        # Read the file content
-        with open(file_obj.file_path, 'r') as f:
-            content = f.read()
+        offset = request.args.get('offset', 0, type=int)
+        etag, last_modified = _file_validators(path)
+        # Each page of the file is its own representation
+        etag = f"{etag}-{offset}-{file_preview.page_lines}"
+        if _not_modified(etag, last_modified):
+            return _conditional(Response(status=304), etag, last_modified)
+        
+        # Only a page is read, starting at offset; binary files are offered as a download
+        binary = file_preview.is_binary(path)
+        page = None if binary else file_preview.read_page(path, offset)
         
         # Determine the file type for syntax highlighting
         file_ext = os.path.splitext(filename)[1].lower()
@@ -454,40 +596,86 @@ def view_file(submission_id, filename):
         elif file_ext == '.css':
             language = 'css'
         
-        return render_template('file_viewer.html', 
+        response = make_response(render_template('file_viewer.html', 
                              filename=filename,
-                             content=content,
+                             page=page,
+                             binary=binary,
+                             size=os.path.getsize(path),
                              language=language,
-                             submission=submission.folder_name)
+                             submission_id=submission_id,
+                             submission=submission.folder_name))
+        return _conditional(response, etag, last_modified)
+    except ValueError as e:
+        return f"Invalid request: {str(e)}", 400
     except Exception as e:
         logger.error(f"Error viewing file: {str(e)}")
         return f"Error viewing file: {str(e)}", 500
 
+# Served as plain text so a student's HTML or SVG can't run scripts in this app's origin
+ACTIVE_CONTENT_TYPES = {'text/html', 'application/xhtml+xml', 'image/svg+xml', 'text/javascript',
+                        'application/javascript', 'text/xml', 'application/xml'}
+
+@app.route('/raw-file/<int:submission_id>/<path:filename>')
+def raw_file(submission_id, filename):
+    """Serve a file as-is, with Range requests and conditional GET"""
+    submission, path = _locate_submission_file(submission_id, filename)
+    if not submission or not path or not _in_upload_folder(path):
+        return "File not found", 404
+    
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if mimetype in ACTIVE_CONTENT_TYPES:
+        mimetype = 'text/plain'
+    # send_file streams the file (sendfile where the server supports it) and answers Range requests
+    response = send_file(path, mimetype=mimetype,
+                         as_attachment=request.args.get('download', 'false').lower() == 'true',
+                         download_name=os.path.basename(filename),
+                         conditional=True, etag=True, max_age=0)
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
 @app.route('/analysis-progress')
 def analysis_progress():
-    """Get the current analysis progress"""
-    progress = session.get('analysis_progress', {})
-    
-    if progress:
-        return jsonify({
-            'in_progress': True,
-            'current': progress.get('current', 0),
-            'total': progress.get('total', 0)
-        })
-    else:
+    """Get the progress, throughput and ETA of an analysis batch"""
+    batch_id = request.args.get('batch') or session.get('analysis_batch')
+    if not batch_id:
         return jsonify({
             'in_progress': False
         })
+    
+    include_jobs = request.args.get('jobs', 'false').lower() == 'true'
+    return jsonify(job_queue.batch_report(batch_id, include_jobs=include_jobs))
+
+# Keep proxies from caching or buffering Server-Sent Events
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+@app.route('/analysis-stream')
+def analysis_stream():
+    """Stream batch progress and partial feedback as Server-Sent Events"""
+    # Under uvicorn asgi.py serves this path on the event loop; this route serves the dev server and WSGI
+    stream = ProgressStream(job_queue, request.args.get('batch') or session.get('analysis_batch'))
+    poll_interval = ProgressStream.poll_interval()
+    
+    def generate():
+        while True:
+            yield from stream.poll()
+            if stream.finished:
+                return
+            time.sleep(poll_interval)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers=STREAM_HEADERS)
 
 @app.route('/clear-data', methods=['POST'])
 def clear_data():
     """Clear all data (for testing)"""
     try:
-        # Delete all submission files to prevent orphaned data
+        # Delete queued jobs and submission files to prevent orphaned data
+        AnalysisJob.query.delete()
         SubmissionFile.query.delete()
         
-        # Delete all submissions
+        # Delete all submissions and their notebook content
         Submission.query.delete()
+        NotebookContent.query.delete()
         
         # Commit the changes
         db.session.commit()
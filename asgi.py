@@ -0,0 +1,317 @@
+"""
+ASGI entry point for production serving.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+
+The event loop accepts connections, reads request bodies (uploads included)
+and writes responses, so idle keep-alive connections and slow clients cost no
+thread. Each request's Flask handler then runs in a pool of ASGI_THREADS
+threads. /analysis-stream is served on the event loop itself and borrows a
+pool thread only while it reads the job table, so open progress streams don't
+use up the pool. With RUN_EMBEDDED_WORKER=true the server also grades queued
+analyses on worker threads of its own (see worker.py).
+"""
+import io
+import os
+import sys
+import asyncio
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from asgiref.sync import async_to_sync, sync_to_async
+from flask import request, session
+
+from app import app, job_queue, STREAM_HEADERS
+from services.progress_stream import ProgressStream
+from worker import start_embedded_worker
+
+logger = logging.getLogger(__name__)
+
+
+class ClientDisconnected(OSError):
+    """Raised inside a request thread that writes to a client that has gone away."""
+
+
+def build_environ(scope, body, duplicate_header_limit=None):
+    """
+    Build the WSGI environ for an ASGI HTTP scope.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        body (file): The request body, positioned at its start.
+        duplicate_header_limit (int): Most values accepted for one header name.
+
+    Returns:
+        dict: The WSGI environ.
+
+    Raises:
+        ValueError: If a header is repeated more than duplicate_header_limit times.
+    """
+    script_name = scope.get('root_path', '').encode('utf8').decode('latin1')
+    path_info = scope['path'].encode('utf8').decode('latin1')
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': script_name,
+        'PATH_INFO': path_info,
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client') is not None:
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    headers = defaultdict(list)
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        if duplicate_header_limit and len(headers[key]) >= duplicate_header_limit:
+            raise ValueError(f"Too many {key} headers")
+        headers[key].append(value.decode('latin1'))
+    environ.update((key, ','.join(values)) for key, values in headers.items())
+    return environ
+
+
+class _WsgiRequest:
+    """One HTTP request, answered by the WSGI application on a pool thread."""
+
+    def __init__(self, server, scope, receive, send):
+        self.server = server
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        # The WSGI application writes its response from the pool thread
+        self.sync_send = async_to_sync(self._send)
+        self.response_start = None
+        self.response_started = False
+        self.content_length = None
+        self.disconnected = False
+
+    async def _send(self, message):
+        # ASGI servers drop writes to closed connections silently, so a streaming
+        # response would otherwise hold its thread forever
+        if self.disconnected:
+            raise ClientDisconnected("client disconnected")
+        await self.send(message)
+
+    async def _watch_disconnect(self):
+        while (await self.receive())['type'] != 'http.disconnect':
+            pass
+        self.disconnected = True
+
+    async def __call__(self):
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await self.receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+
+            watcher = asyncio.create_task(self._watch_disconnect())
+            try:
+                await self.server.run_sync(self._run_wsgi, body)
+            except ClientDisconnected:
+                logger.debug(f"Client disconnected from {self.scope['path']}")
+            finally:
+                watcher.cancel()
+
+    def start_response(self, status, headers, exc_info=None):
+        """WSGI start_response callable."""
+        if exc_info:
+            # Too late to replace a response that has been sent; let the error end the request
+            if self.response_started:
+                raise exc_info[1].with_traceback(exc_info[2])
+        elif self.response_start is not None:
+            raise ValueError("start_response called a second time without exc_info")
+
+        self.content_length = None
+        for name, value in headers:
+            if name.lower() == 'content-length':
+                self.content_length = int(value)
+        self.response_start = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in headers]
+        }
+
+    def _start(self):
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+
+    def _run_wsgi(self, body):
+        """Call the WSGI application in a pool thread and send its response."""
+        try:
+            environ = build_environ(self.scope, body, self.server.duplicate_header_limit)
+        except ValueError:
+            self.sync_send({'type': 'http.response.start', 'status': 400,
+                            'headers': [(b'content-type', b'text/plain')]})
+            self.sync_send({'type': 'http.response.body', 'body': b'Bad Request'})
+            return
+
+        result = self.server.wsgi_application(environ, self.start_response)
+        try:
+            bytes_sent = 0
+            for output in result:
+                self._start()
+                # Never send more than the Content-Length the application declared
+                if self.content_length is not None:
+                    output = output[:self.content_length - bytes_sent]
+                self.sync_send({'type': 'http.response.body', 'body': output, 'more_body': True})
+                bytes_sent += len(output)
+                if bytes_sent == self.content_length:
+                    break
+        finally:
+            # Runs generator cleanup, such as the app context of a streamed response
+            if hasattr(result, 'close'):
+                result.close()
+
+        self._start()
+        self.sync_send({'type': 'http.response.body'})
+
+
+def _stream_batch_id(environ):
+    with app.request_context(environ):
+        return request.args.get('batch') or session.get('analysis_batch')
+
+
+def _poll_stream(stream):
+    with app.app_context():
+        return stream.poll()
+
+
+async def analysis_stream(server, scope, receive, send):
+    """
+    Serve /analysis-stream on the event loop.
+
+    The stream waits between polls without a thread, and each poll of the job
+    table borrows a pool thread only while it runs.
+    """
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        try:
+            environ = build_environ(scope, io.BytesIO(), server.duplicate_header_limit)
+        except ValueError:
+            await send({'type': 'http.response.start', 'status': 400,
+                        'headers': [(b'content-type', b'text/plain')]})
+            await send({'type': 'http.response.body', 'body': b'Bad Request'})
+            return
+
+        stream = ProgressStream(job_queue, await server.run_sync(_stream_batch_id, environ))
+        poll_interval = ProgressStream.poll_interval()
+        headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+        headers += [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in STREAM_HEADERS.items()]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+        while not disconnected.is_set():
+            events = await server.run_sync(_poll_stream, stream)
+            if events:
+                await send({'type': 'http.response.body', 'body': ''.join(events).encode('utf-8'),
+                            'more_body': True})
+            if stream.finished:
+                break
+            try:
+                await asyncio.wait_for(disconnected.wait(), poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        if not disconnected.is_set():
+            await send({'type': 'http.response.body'})
+    finally:
+        watcher.cancel()
+
+
+class ThreadPoolWsgiToAsgi:
+    """
+    Wraps a WSGI application as an ASGI application that serves requests concurrently.
+
+    Requests run on a bounded thread pool that is shut down with the server,
+    except for paths given an async handler in routes, which run on the event loop.
+    """
+
+    def __init__(self, wsgi_application, threads=None, duplicate_header_limit=100, routes=None, startup=None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            wsgi_application (callable): The WSGI application.
+            threads (int): Requests handled at once; more wait for a free thread.
+            duplicate_header_limit (int): Most values accepted for one header name.
+            routes (dict): Async handlers for GET requests, keyed by path; each is
+                called with this wrapper and the ASGI scope, receive and send.
+            startup (callable): Called when the server starts; may return a callable
+                that is run on a separate thread when it shuts down.
+        """
+        if threads is None:
+            # The default SQLAlchemy pool opens at most 15 connections (5 + 10 overflow)
+            threads = int(os.environ.get("ASGI_THREADS", 15))
+        self.wsgi_application = wsgi_application
+        self.duplicate_header_limit = duplicate_header_limit
+        self.routes = routes or {}
+        self.startup = startup
+        self.shutdown = None
+        self.threads = max(1, threads)
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='asgi')
+
+    async def run_sync(self, func, *args):
+        """Run a blocking call on the request thread pool."""
+        return await sync_to_async(func, thread_sensitive=False, executor=self.executor)(*args)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+        handler = self.routes.get(scope['path']) if scope['method'] == 'GET' else None
+        if handler:
+            await handler(self, scope, receive, send)
+        else:
+            await _WsgiRequest(self, scope, receive, send)()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                logger.info(f"Serving with {self.threads} request threads")
+                if self.startup:
+                    self.shutdown = self.startup()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Drop queued requests; the interpreter still waits for running ones on exit
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                if self.shutdown:
+                    await asyncio.to_thread(self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = ThreadPoolWsgiToAsgi(app, routes={'/analysis-stream': analysis_stream},
+                                  startup=start_embedded_worker)
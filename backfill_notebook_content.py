@@ -0,0 +1,50 @@
+"""
+Move notebook content out of submission rows and report the storage it takes.
+
+Run once after applying migrations/0004_notebook_content.sql; it is safe to
+interrupt and rerun. With --report-only nothing is changed.
+
+    python backfill_notebook_content.py
+    python backfill_notebook_content.py --report-only
+"""
+import logging
+import argparse
+
+from app import app, notebook_store
+
+logger = logging.getLogger(__name__)
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+
+
+def print_report(stats):
+    print(f"Submissions:                    {stats['submissions']}")
+    print(f"  with stored content:          {stats['submissions_with_content']}")
+    print(f"  still holding in-row content: {stats['submissions_with_legacy_content']}")
+    print(f"Unique notebook contents:       {stats['unique_contents']}")
+    print(f"Content as JSON, one per row:   {format_bytes(stats['logical_bytes'])}")
+    print(f"After deduplication:            {format_bytes(stats['unique_bytes'])}")
+    print(f"After compression (stored):     {format_bytes(stats['stored_bytes'])}")
+    print(f"Saved:                          {stats['saved_fraction']:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move notebook content into the notebook_content table")
+    parser.add_argument('--batch-size', type=int, default=200, help="Submissions converted per transaction")
+    parser.add_argument('--report-only', action='store_true', help="Only print the storage report")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if not args.report_only:
+            converted = notebook_store.backfill(batch_size=args.batch_size)
+            logger.info(f"Moved notebook content of {converted} submissions")
+        print_report(notebook_store.stats())
+
+
+if __name__ == "__main__":
+    main()
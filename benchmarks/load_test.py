@@ -0,0 +1,306 @@
+"""
+Load-test the web app's read paths and report requests per second and latency.
+
+Each path is hammered for --duration seconds by --concurrency keep-alive
+connections from a plain asyncio HTTP client. With --serve the script starts
+the app itself on a scratch SQLite database seeded with --submissions
+uploads, pointed at the stub Ollama server, either under uvicorn
+(asgi:application) or under gunicorn's default sync worker (main:app).
+Otherwise it tests the running server at --url.
+
+--streams keeps that many /analysis-stream connections open during the test,
+as browsers watching a batch do, to show requests that hold a thread for as
+long as the client stays connected.
+
+    python benchmarks/load_test.py --serve asgi --concurrency 32 --duration 10
+    python benchmarks/load_test.py --serve wsgi --streams 2
+    python benchmarks/load_test.py --url http://localhost:5000
+"""
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import socket
+import asyncio
+import zipfile
+import argparse
+import tempfile
+import subprocess
+from urllib.parse import urlsplit, quote
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+PATHS = ('/', '/submissions', '/view-file')
+
+
+def make_archive(submissions, csv_rows=2000):
+    """Build a submissions ZIP with one notebook and one dataset per folder."""
+    notebook = {
+        'nbformat': 4, 'nbformat_minor': 5, 'metadata': {'language_info': {'name': 'python'}},
+        'cells': [
+            {'cell_type': 'markdown', 'metadata': {}, 'source': "# Analysis"},
+            {'cell_type': 'code', 'metadata': {}, 'execution_count': 1, 'source': "df = pd.read_csv('data.csv')",
+             'outputs': [{'output_type': 'stream', 'name': 'stdout', 'text': "loaded\n"}]}
+        ]
+    }
+    dataset = "id,value\n" + "".join(f"{row},{row * 0.5}\n" for row in range(csv_rows))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for index in range(submissions):
+            archive.writestr(f"student{index:04d}/analysis.ipynb", json.dumps(notebook))
+            archive.writestr(f"student{index:04d}/data.csv", dataset)
+    buffer.seek(0)
+    return buffer
+
+
+def seed(submissions):
+    """
+    Upload generated submissions through the app (run in the server's working directory).
+
+    One submission is queued for analysis and, with no worker running, stays
+    queued, so its batch can be watched on /analysis-stream. Prints the batch ID.
+    """
+    from app import app
+    from models import db, Criteria
+    client = app.test_client()
+    response = client.post('/upload-submissions',
+                           data={'submissions_file': (make_archive(submissions), 'submissions.zip')})
+    if response.status_code != 302:
+        raise RuntimeError(f"Seeding failed with HTTP {response.status_code}")
+
+    with app.app_context():
+        db.session.add(Criteria(name='Load test', text='1. The notebook runs.'))
+        db.session.commit()
+    submission_id = client.get('/submissions?limit=1').json['submissions'][0]['id']
+    response = client.post('/analyze', data={'selected_submissions': [submission_id]},
+                           headers={'Accept': 'application/json'})
+    print(response.json['batch_id'])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, work_dir, submissions, ollama_url):
+    """Seed a scratch database and start the app; returns the process, its base URL and a batch ID."""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, OLLAMA_API_URL=ollama_url, OLLAMA_WARMUP='false',
+               DATABASE_URL=os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(work_dir, 'load.db')}"))
+    seeded = subprocess.run([sys.executable, os.path.abspath(__file__), '--seed', str(submissions)],
+                            cwd=work_dir, env=env, check=True, stdout=subprocess.PIPE, text=True)
+    batch_id = seeded.stdout.split()[-1]
+
+    port = free_port()
+    if mode == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1',
+                   '--port', str(port), '--log-level', 'warning', '--no-access-log']
+    else:
+        # The same as the deployment command: one sync worker
+        command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+                   'main:app']
+    process = subprocess.Popen(command, cwd=work_dir, env=env)
+    return process, f"http://127.0.0.1:{port}", batch_id
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection that sends GET requests and reads whole responses."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\nAccept: text/html\r\n\r\n".encode())
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        else:
+            await self.reader.read()
+            self.close()
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def hammer(base_url, path, concurrency, duration, timeout):
+    """Request one path from many connections at once; returns latencies and the error count."""
+    url = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        connection = Connection(url.hostname, url.port or 80)
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(connection.get(path), timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+                    connection.close()
+                    status = None
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+        finally:
+            connection.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors
+
+
+async def watch_batch(base_url, batch_id):
+    """Keep an /analysis-stream connection open, reconnecting like a browser's EventSource."""
+    url = urlsplit(base_url)
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+            writer.write(f"GET /analysis-stream?batch={batch_id} HTTP/1.1\r\nHost: {url.hostname}\r\n"
+                         f"Accept: text/event-stream\r\n\r\n".encode())
+            try:
+                while await reader.read(65536):
+                    pass
+            finally:
+                writer.close()
+        except OSError:
+            pass
+        await asyncio.sleep(0.5)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def wait_until_ready(base_url, timeout=30):
+    url = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while True:
+        connection = Connection(url.hostname, url.port or 80)
+        try:
+            if await connection.get('/submissions?limit=1') == 200:
+                return
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            if time.monotonic() > deadline:
+                raise
+        finally:
+            connection.close()
+        await asyncio.sleep(0.2)
+
+
+async def resolve_view_file(base_url):
+    """Find a submission file to request from /view-file."""
+    url = urlsplit(base_url)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    writer.write(f"GET /submissions?limit=1 HTTP/1.1\r\nHost: {url.hostname}\r\nConnection: close\r\n\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    submissions = json.loads(response.split(b'\r\n\r\n', 1)[1])['submissions']
+    for submission in submissions:
+        for filename in submission['files']:
+            if not filename.endswith('.ipynb'):
+                return f"/view-file/{submission['id']}/{quote(filename)}"
+    raise RuntimeError("No submission files to view; upload some submissions first")
+
+
+async def run(base_url, paths, concurrency, duration, timeout, streams=0, batch_id=None):
+    await wait_until_ready(base_url)
+    paths = [await resolve_view_file(base_url) if path == '/view-file' else path for path in paths]
+    watchers = [asyncio.create_task(watch_batch(base_url, batch_id)) for _ in range(streams)]
+    # Let the streams connect before measuring
+    await asyncio.sleep(1 if streams else 0)
+
+    print(f"{'path':42} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    try:
+        for path in paths:
+            latencies, errors = await hammer(base_url, path, concurrency, duration, timeout)
+            if not latencies:
+                print(f"{path[:42]:42} {0:>9} {errors:>7}")
+                continue
+            print(f"{path[:42]:42} {len(latencies):>9} {errors:>7} {len(latencies) / duration:>8.1f} "
+                  f"{percentile(latencies, 0.5) * 1000:>8.1f} {percentile(latencies, 0.99) * 1000:>8.1f}")
+    finally:
+        for watcher in watchers:
+            watcher.cancel()
+        await asyncio.gather(*watchers, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running server")
+    parser.add_argument("--serve", choices=('asgi', 'wsgi'), help="Start the app on a scratch database")
+    parser.add_argument("--submissions", type=int, default=200, help="Submissions seeded with --serve")
+    parser.add_argument("--concurrency", type=int, default=32, help="Open connections per path")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per path")
+    parser.add_argument("--paths", nargs="+", default=list(PATHS))
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds before a request counts as failed")
+    parser.add_argument("--streams", type=int, default=0, help="/analysis-stream connections held open")
+    parser.add_argument("--batch", help="Batch watched by --streams with --url")
+    parser.add_argument("--seed", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        seed(args.seed)
+        return
+    if not args.url and not args.serve:
+        parser.error("pass --url or --serve")
+    if args.url and args.streams and not args.batch:
+        parser.error("--streams with --url needs --batch")
+
+    if args.url:
+        asyncio.run(run(args.url.rstrip('/'), args.paths, args.concurrency, args.duration, args.timeout,
+                        args.streams, args.batch))
+        return
+
+    work_dir = tempfile.mkdtemp()
+    process = None
+    try:
+        with StubOllamaServer() as ollama:
+            process, base_url, batch_id = start_server(args.serve, work_dir, args.submissions, ollama.url)
+            print(f"{args.serve}: {args.submissions} submissions, {args.concurrency} connections per path, "
+                  f"{args.streams} progress streams open")
+            asyncio.run(run(base_url, args.paths, args.concurrency, args.duration, args.timeout,
+                            args.streams, batch_id))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
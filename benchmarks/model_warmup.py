@@ -0,0 +1,70 @@
+"""
+Show what preloading the model when a batch is queued saves, using the stub
+server's simulated model load.
+
+Each run starts with the model unloaded (as after eviction between batches),
+queues a batch, waits for a worker to poll the queue and grades it. With
+warm-up the model loads while the worker is still waiting to poll.
+
+    python benchmarks/model_warmup.py --load-delay 3 --poll-interval 2 --prompts 8
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def run_batch(client, warmer, prompts, poll_interval, warm_up):
+    queued = time.perf_counter()
+    if warm_up:
+        warmer.warm_up_async()
+    # The worker picks the batch up on its next poll
+    time.sleep(poll_interval)
+    with client.measure() as timings:
+        for index, prompt in enumerate(prompts):
+            client.generate_feedback(prompt)
+            if index == 0:
+                first = time.perf_counter() - queued
+    return time.perf_counter() - queued, first, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds the stub spends per request")
+    parser.add_argument("--load-delay", type=float, default=3.0, help="Seconds to load an unloaded model")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Worker poll interval")
+    args = parser.parse_args()
+
+    from services.ollama_client import OllamaClient
+    from services.model_warmup import ModelWarmer
+
+    prompts = [f"Evaluate notebook {i}" for i in range(args.prompts)]
+
+    with StubOllamaServer(delay=args.delay, load_delay=args.load_delay) as server:
+        client = OllamaClient()
+        client.base_url = server.url
+        warmer = ModelWarmer(client, enabled=True)
+
+        for warm_up in (False, True):
+            warmer.release()
+            total, first, timings = run_batch(client, warmer, prompts, args.poll_interval, warm_up)
+            cold = [r['latency_ms'] for r in timings.requests if r['cold']]
+            warm = [r['latency_ms'] for r in timings.requests if not r['cold']]
+            print(f"{'with warm-up:   ' if warm_up else 'without warm-up:'} batch {total:.2f}s, "
+                  f"first feedback after {first:.2f}s; "
+                  f"{len(cold)} cold request(s)"
+                  + (f" avg {sum(cold) / len(cold):.0f} ms" if cold else "")
+                  + f", {len(warm)} warm"
+                  + (f" avg {sum(warm) / len(warm):.0f} ms" if warm else ""))
+
+        warmer.release()
+        print(f"after release: {len(server.loaded_models())} model(s) loaded")
+
+
+if __name__ == "__main__":
+    main()
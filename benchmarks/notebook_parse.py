@@ -0,0 +1,85 @@
+"""
+Compare the nbformat notebook parser with the fast JSON path on output-heavy notebooks.
+
+Generates notebooks with base64 image outputs (or measures the given files) and
+reports wall time and peak traced memory for each parser.
+
+    python benchmarks/notebook_parse.py --notebooks 20 --images 20 --image-kb 200
+    python benchmarks/notebook_parse.py path/to/notebooks/*.ipynb
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.notebook_processor import NotebookProcessor
+
+
+def make_notebook(path, images, image_kb):
+    """Write a v4 notebook with one image and some text output per code cell."""
+    payload = base64.b64encode(os.urandom(image_kb * 1024 * 3 // 4)).decode('ascii')
+    cells = [{"cell_type": "markdown", "id": "intro", "metadata": {}, "source": ["# Analysis\n", "Plots below."]}]
+    for i in range(images):
+        cells.append({
+            "cell_type": "code", "id": f"cell-{i}", "execution_count": i + 1, "metadata": {},
+            "source": [f"plt.plot(data[{i}])\n", "plt.show()"],
+            "outputs": [
+                {"output_type": "stream", "name": "stdout", "text": [f"fitting series {i}\n"]},
+                {"output_type": "display_data", "metadata": {"image/png": {"width": 640}},
+                 "data": {"image/png": payload, "text/plain": ["<Figure size 640x480>"]}}
+            ]
+        })
+    notebook = {
+        "cells": cells,
+        "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3", "language": "python"},
+                     "language_info": {"name": "python"}},
+        "nbformat": 4, "nbformat_minor": 5
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(notebook, f, indent=1)
+
+
+def measure(processor, paths):
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = [processor.extract_notebook_content(path) for path in paths]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="Notebook files to measure instead of generated ones")
+    parser.add_argument("--notebooks", type=int, default=20)
+    parser.add_argument("--images", type=int, default=20, help="Image outputs per generated notebook")
+    parser.add_argument("--image-kb", type=int, default=200, help="Size of each base64 image")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = args.paths
+        if not paths:
+            paths = [os.path.join(tmp, f"nb{i}.ipynb") for i in range(args.notebooks)]
+            for path in paths:
+                make_notebook(path, args.images, args.image_kb)
+
+        total_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+        print(f"{len(paths)} notebooks, {total_mb:.1f} MB on disk")
+
+        baseline = None
+        for name, fast in (("nbformat", False), ("fast JSON", True)):
+            results, elapsed, peak = measure(NotebookProcessor(fast_parse=fast), paths)
+            same = "" if baseline is None else ("  identical output" if results == baseline else "  OUTPUT DIFFERS")
+            baseline = baseline or results
+            print(f"{name:10} {elapsed:7.2f} s   peak {peak / 1024 / 1024:7.1f} MB{same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Measure how batch throughput scales when requests are spread over several
+Ollama hosts, and check that a failing host is taken out of rotation and
+re-admitted once it recovers.
+
+    python benchmarks/ollama_backends.py --prompts 48 --delay 0.25 --parallel 2 --hosts 1 2 4
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from contextlib import ExitStack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def run_batch(client, prompts):
+    start = time.perf_counter()
+    results = dict(client.generate_many(prompts))
+    assert sorted(results) == list(range(len(prompts)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=48)
+    parser.add_argument("--delay", type=float, default=0.25, help="Seconds each stub spends per request")
+    parser.add_argument("--parallel", type=int, default=2, help="Requests each stub serves at once")
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    os.environ["OLLAMA_NUM_PARALLEL"] = str(args.parallel)
+    os.environ["OLLAMA_RETRY_BASE_DELAY"] = "0.05"
+    os.environ["OLLAMA_CIRCUIT_FAILURES"] = "2"
+    os.environ["OLLAMA_CIRCUIT_RESET_SECONDS"] = "0.5"
+    # Retries against the failing host are expected; keep the output to the results
+    logging.disable(logging.ERROR)
+    from services.ollama_client import OllamaClient
+
+    prompts = [f"Evaluate notebook {i}" for i in range(args.prompts)]
+
+    print("Throughput by number of hosts:")
+    baseline = None
+    for hosts in args.hosts:
+        with ExitStack() as stack:
+            servers = [stack.enter_context(StubOllamaServer(delay=args.delay, parallel=args.parallel))
+                       for _ in range(hosts)]
+            client = OllamaClient()
+            client.base_urls = [server.url for server in servers]
+            elapsed = run_batch(client, prompts)
+            baseline = baseline or elapsed * hosts
+            shares = ", ".join(str(server.requests) for server in servers)
+            print(f"  {hosts} host(s): {elapsed:.2f}s, {args.prompts / elapsed:.1f} req/s, "
+                  f"{baseline / elapsed:.2f}x of one host; requests per host: {shares}")
+
+    print("Failover:")
+    with StubOllamaServer(delay=args.delay, parallel=args.parallel) as good, \
+            StubOllamaServer(delay=args.delay, parallel=args.parallel, fail_status=503) as bad:
+        client = OllamaClient()
+        client.base_urls = [good.url, bad.url]
+        elapsed = run_batch(client, prompts)
+        print(f"  one of two hosts failing: {elapsed:.2f}s, failing host got {bad.requests} of "
+              f"{good.requests + bad.requests} requests; in rotation: {client.backends[1].healthy}")
+
+        bad.fail_status = None
+        time.sleep(client.circuit_reset_seconds)
+        bad.requests = good.requests = 0
+        elapsed = run_batch(client, prompts)
+        print(f"  after recovery: {elapsed:.2f}s, requests per host: {good.requests}, {bad.requests}; "
+              f"in rotation: {client.backends[1].healthy}")
+
+
+if __name__ == "__main__":
+    main()
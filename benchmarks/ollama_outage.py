@@ -0,0 +1,64 @@
+"""
+Measure how long a batch takes to give up when Ollama is down or hung.
+
+Grades --submissions prompts one after another against the stub server while
+it fails every request (--mode down) or never answers within the read timeout
+(--mode hung), and reports the wall time and the requests that reached the
+server. The legacy figure is what the old client spent per submission: three
+attempts with a fixed 2 s sleep between them, and no timeout at all for a hung
+server.
+
+    python benchmarks/ollama_outage.py --mode down --submissions 300
+    python benchmarks/ollama_outage.py --mode hung --submissions 20 --read-timeout 0.5
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+from services.ollama_client import OllamaClient, OllamaError, CircuitOpenError
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=("down", "hung"), default="down")
+    parser.add_argument("--submissions", type=int, default=300)
+    parser.add_argument("--read-timeout", type=float, default=0.5)
+    parser.add_argument("--hang", type=float, default=3.0, help="Seconds a hung server takes to answer")
+    args = parser.parse_args()
+    # The client logs every failed attempt; only the summary matters here
+    logging.disable(logging.ERROR)
+
+    server_options = {"fail_status": 503} if args.mode == "down" else {"delay": args.hang}
+    with StubOllamaServer(**server_options) as server:
+        client = OllamaClient()
+        client.base_url = server.url
+        client.timeout = (client.timeout[0], args.read_timeout)
+
+        outcomes = {'failed': 0, 'failed fast (circuit open)': 0}
+        start = time.perf_counter()
+        for i in range(args.submissions):
+            try:
+                client.chat([{'role': 'user', 'content': f'submission {i}'}])
+            except CircuitOpenError:
+                outcomes['failed fast (circuit open)'] += 1
+            except OllamaError:
+                outcomes['failed'] += 1
+        elapsed = time.perf_counter() - start
+
+        print(f"mode {args.mode}: {args.submissions} submissions in {elapsed:.1f} s, "
+              f"{server.requests} requests reached the server")
+        for outcome, count in outcomes.items():
+            print(f"  {outcome:28} {count}")
+        if args.mode == "down":
+            print(f"legacy client: at least {args.submissions * 2 * 2} s ({args.submissions} x 3 attempts, 2 s apart)")
+        else:
+            print("legacy client: no timeout, so the first request blocks its worker until Ollama answers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare serial generate_feedback calls with the pooled generate_many batch API.
+
+    python benchmarks/ollama_pool.py --prompts 16 --delay 0.25 --parallel 4
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--prompts", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=0.25)
+    parser.add_argument("--parallel", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["OLLAMA_NUM_PARALLEL"] = str(args.parallel)
+    from services.ollama_client import OllamaClient
+
+    prompts = [f"Evaluate notebook {i}" for i in range(args.prompts)]
+
+    with StubOllamaServer(delay=args.delay, parallel=args.parallel) as server:
+        client = OllamaClient()
+        client.base_url = server.url
+
+        start = time.perf_counter()
+        for prompt in prompts:
+            client.generate_feedback(prompt)
+        serial = time.perf_counter() - start
+
+        server.connections.clear()
+        server.max_active = 0
+        start = time.perf_counter()
+        results = dict(client.generate_many(prompts))
+        pooled = time.perf_counter() - start
+
+        assert sorted(results) == list(range(args.prompts))
+        print(f"serial:        {serial:.2f}s")
+        print(f"generate_many: {pooled:.2f}s ({serial / pooled:.1f}x faster)")
+        print(f"peak concurrent requests: {server.max_active} (limit {args.parallel})")
+        print(f"TCP connections used: {len(server.connections)} for {args.prompts} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Time criteria PDF text extraction serially, with worker processes and from
+the SHA-256 text cache, on a generated rubric PDF.
+
+    python benchmarks/pdf_extract.py --pages 200 --lines 60 --workers 4
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_pdf(path, pages, lines):
+    """Write a PDF of numbered rubric criteria, one text content stream per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page in range(pages):
+        ops = [b"BT /F1 9 Tf 11 TL 40 800 Td"]
+        for line in range(lines):
+            number = page * lines + line + 1
+            ops.append(f"({number}. Criterion {number}: the notebook explains step {line} "
+                       f"clearly and the code cell runs without errors) '".encode())
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def timed(processor, pdf_path):
+    start = time.perf_counter()
+    text = processor.extract_text(pdf_path)
+    return time.perf_counter() - start, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=60, help="Criteria lines per page")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from services.pdf_processor import PDFProcessor
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        pdf_path = os.path.join(work_dir, "rubric.pdf")
+        make_pdf(pdf_path, args.pages, args.lines)
+        print(f"{args.pages} pages, {os.path.getsize(pdf_path) / 1024:.0f} KB")
+
+        serial, expected = timed(PDFProcessor(extract_workers=1), pdf_path)
+        print(f"serial:              {serial:.2f}s")
+
+        parallel, text = timed(PDFProcessor(extract_workers=args.workers), pdf_path)
+        assert text == expected, "parallel extraction changed the text"
+        print(f"{args.workers} workers:           {parallel:.2f}s ({serial / parallel:.2f}x)")
+
+        cached = PDFProcessor(cache_dir=os.path.join(work_dir, "cache"), extract_workers=args.workers)
+        first, _ = timed(cached, pdf_path)
+        again, text = timed(cached, pdf_path)
+        assert text == expected, "cached text differs"
+        print(f"first upload, cache: {first:.2f}s")
+        print(f"re-upload, cached:   {again * 1000:.1f} ms ({serial / again:.0f}x)")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare grading against the whole criteria with per-criterion grading, using
+the stub Ollama server, then change one criterion and regrade.
+
+Reports wall time, Ollama requests and prompt characters sent for each mode,
+and how many of those the stub could not serve from a cached prefix. The
+feedback cache lives in a temporary SQLite database unless DATABASE_URL is set.
+
+    python benchmarks/per_criterion.py --submissions 6 --criteria 8
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+
+def make_notebook(index):
+    cells = [{'cell_type': 'markdown', 'source': f"# Analysis {index}\nLoading and cleaning the data."}]
+    for step in range(12):
+        cells.append({
+            'cell_type': 'code',
+            'source': f"df{step} = df.groupby('group{step}').agg({{'value': 'mean'}})\nprint(df{step}.head())",
+            'outputs': [{'output_type': 'stream', 'name': 'stdout', 'text': f"group{step}  value\n0  {step}.5\n"}]
+        })
+    return {'metadata': {'language_info': 'python'}, 'cells': cells}
+
+
+def make_criteria(count, changed=None):
+    items = [f"{number}. The notebook completes task {number} and explains the approach in markdown."
+             for number in range(1, count + 1)]
+    if changed is not None:
+        items[changed] = f"{changed + 1}. The notebook completes task {changed + 1} with tests for edge cases."
+    return SimpleNamespace(text="\n".join(items), items=[SimpleNamespace(text=item) for item in items])
+
+
+def grade_all(grader, submissions, criteria, settings, server):
+    requests, chars, cached = server.requests, server.prompt_chars, server.cached_chars
+    start = time.perf_counter()
+    for submission in submissions:
+        grader.grade(submission, criteria, settings)
+    return (time.perf_counter() - start, server.requests - requests, server.prompt_chars - chars,
+            server.cached_chars - cached)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=6)
+    parser.add_argument("--criteria", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.2, help="Seconds the stub spends per request")
+    parser.add_argument("--prefill-per-char", type=float, default=0.00005,
+                        help="Seconds per uncached prompt character")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(work_dir, 'bench.db')}")
+    os.environ["OLLAMA_STREAM"] = "false"
+    from app import app, ollama_client, feedback_cache
+    from services.grader import SubmissionGrader
+
+    settings = SimpleNamespace(preamble="You are an assessment evaluator.", postamble="Be concise.")
+    submissions = [
+        SimpleNamespace(id=index, notebook_content=make_notebook(index), content_hash=None, feedback=None)
+        for index in range(args.submissions)
+    ]
+    criteria = make_criteria(args.criteria)
+    edited = make_criteria(args.criteria, changed=args.criteria // 2)
+
+    try:
+        with StubOllamaServer(delay=args.delay, token_delay=0.0, prefill_per_char=args.prefill_per_char) as server, \
+                app.app_context():
+            ollama_client.base_url = server.url
+            for mode in ("whole", "per_criterion"):
+                os.environ["GRADING_MODE"] = mode
+                grader = SubmissionGrader(ollama_client, feedback_cache)
+                for label, rubric in (("first run", criteria), ("one criterion changed", edited)):
+                    elapsed, requests, chars, cached = grade_all(grader, submissions, rubric, settings, server)
+                    print(f"{mode:13} {label:22} {elapsed:6.2f}s  {requests:3} requests  "
+                          f"{chars:7} prompt chars ({chars - cached} not cached)")
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measure time-to-first-token for different prompt layouts against the stub server.
+
+The stub charges prompt processing time only for the part of a prompt not
+shared with a prompt it has cached, and unloads the model (dropping its caches)
+once keep_alive expires. Time is compressed: --default-keep-alive stands in for
+Ollama's 5 minute default and --idle-gap for the pause between submissions.
+
+    python benchmarks/prefix_cache.py --submissions 8 --idle-gap 0.6
+"""
+import os
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_ollama import StubOllamaServer
+from services.ollama_client import OllamaClient
+from services.prompt_builder import PromptBuilder
+
+
+def legacy_prompt(criteria, settings, notebook_text):
+    """The f-string layout used before PromptBuilder, sent to /api/generate."""
+    return f"""
+                {settings.preamble}
+
+                ASSESSMENT CRITERIA:
+                {criteria.text}
+
+                NOTEBOOK CONTENT:
+                {notebook_text}
+
+                Please provide a detailed evaluation focusing on:
+                1. Meeting the assignment requirements
+                2. Code quality and organization
+                3. Documentation and comments
+                4. Results and conclusions
+                5. Areas for improvement
+
+                {settings.postamble}
+                """
+
+
+def content_first_prompt(criteria, settings, notebook_text):
+    """A layout with per-submission content first, which defeats prefix reuse entirely."""
+    return f"NOTEBOOK CONTENT:\n{notebook_text}\n\n{settings.preamble}\n\nASSESSMENT CRITERIA:\n{criteria.text}"
+
+
+def time_to_first_token(stream):
+    start = time.perf_counter()
+    for _ in stream:
+        elapsed = time.perf_counter() - start
+        for _ in stream:
+            pass
+        return elapsed
+    return time.perf_counter() - start
+
+
+def run_scenario(name, make_stream, notebooks, args, keep_alive):
+    with StubOllamaServer(delay=0, parallel=1, token_delay=0,
+                          prefill_per_char=args.prefill_per_char, load_delay=args.load_delay,
+                          default_keep_alive=args.default_keep_alive) as server:
+        client = OllamaClient()
+        client.base_url = server.url
+        client.keep_alive = keep_alive
+
+        timings = []
+        for i, notebook_text in enumerate(notebooks):
+            if i:
+                time.sleep(args.idle_gap)
+            timings.append(time_to_first_token(make_stream(client, notebook_text)))
+
+        reuse = server.cached_chars / server.prompt_chars if server.prompt_chars else 0
+        rest = timings[1:] or timings
+        print(f"{name:38} first {timings[0] * 1000:7.0f} ms   "
+              f"rest avg {sum(rest) / len(rest) * 1000:7.0f} ms   prefix reused {reuse:5.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=8)
+    parser.add_argument("--criteria-chars", type=int, default=12000)
+    parser.add_argument("--notebook-chars", type=int, default=3000)
+    parser.add_argument("--prefill-per-char", type=float, default=0.00005)
+    parser.add_argument("--load-delay", type=float, default=0.5)
+    parser.add_argument("--default-keep-alive", type=float, default=0.5)
+    parser.add_argument("--idle-gap", type=float, default=0.0)
+    args = parser.parse_args()
+
+    rubric_line = "Criterion: the analysis must justify each modelling choice with evidence.\n"
+    criteria = SimpleNamespace(text=(rubric_line * (args.criteria_chars // len(rubric_line) + 1))[:args.criteria_chars])
+    settings = SimpleNamespace(
+        preamble="You are an assessment evaluator. Analyze the following Jupyter notebook content "
+                 "against the assessment criteria.",
+        postamble="Please provide constructive feedback that is helpful for the student's learning."
+    )
+    notebooks = [
+        (f"[cell 1: markdown]\n# Submission {i}\n" + f"[cell 2: code]\nx_{i} = compute({i})\n" * 200)[:args.notebook_chars]
+        for i in range(args.submissions)
+    ]
+    builder = PromptBuilder()
+
+    print(f"{args.submissions} submissions, {args.criteria_chars} char criteria, "
+          f"{args.notebook_chars} char notebooks, idle gap {args.idle_gap}s")
+    run_scenario(
+        "content first, /api/generate",
+        lambda client, nb: client.stream_feedback(content_first_prompt(criteria, settings, nb)),
+        notebooks, args, keep_alive=None
+    )
+    run_scenario(
+        "legacy f-string, /api/generate",
+        lambda client, nb: client.stream_feedback(legacy_prompt(criteria, settings, nb)),
+        notebooks, args, keep_alive=None
+    )
+    run_scenario(
+        "PromptBuilder, /api/chat + keep_alive",
+        lambda client, nb: client.stream_chat(builder.evaluation_messages(criteria, settings, nb)),
+        notebooks, args, keep_alive="30m"
+    )
+
+
+if __name__ == "__main__":
+    main()
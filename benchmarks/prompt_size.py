@@ -0,0 +1,49 @@
+"""
+Compare the prompt size of indented JSON notebook content with the compact renderer.
+
+    python benchmarks/prompt_size.py path/to/notebooks/*.ipynb
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.notebook_processor import NotebookProcessor
+from services.notebook_renderer import NotebookRenderer, estimate_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("notebooks", nargs="+", help="Notebook files to measure")
+    args = parser.parse_args()
+
+    processor = NotebookProcessor()
+    renderer = NotebookRenderer()
+    totals = {'json_chars': 0, 'json_tokens': 0, 'compact_chars': 0, 'compact_tokens': 0}
+
+    print(f"{'notebook':40} {'json chars':>11} {'~tokens':>8} {'compact':>9} {'~tokens':>8} {'saved':>6}")
+    for path in args.notebooks:
+        content = processor.extract_notebook_content(path)
+        as_json = json.dumps(content, indent=2)
+        rendered = renderer.render(content)
+
+        json_tokens = estimate_tokens(as_json)
+        saved = 1 - rendered['estimated_tokens'] / json_tokens if json_tokens else 0
+        print(f"{os.path.basename(path)[:40]:40} {len(as_json):>11} {json_tokens:>8} "
+              f"{rendered['chars']:>9} {rendered['estimated_tokens']:>8} {saved:>6.0%}")
+
+        totals['json_chars'] += len(as_json)
+        totals['json_tokens'] += json_tokens
+        totals['compact_chars'] += rendered['chars']
+        totals['compact_tokens'] += rendered['estimated_tokens']
+
+    if totals['json_tokens']:
+        saved = 1 - totals['compact_tokens'] / totals['json_tokens']
+        print(f"{'TOTAL':40} {totals['json_chars']:>11} {totals['json_tokens']:>8} "
+              f"{totals['compact_chars']:>9} {totals['compact_tokens']:>8} {saved:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Minimal fake Ollama HTTP server for local testing and benchmarks.
+
+Serves just enough of the Ollama API for OllamaClient, with a configurable
+per-request delay and a cap on how many requests are processed at once
+(like OLLAMA_NUM_PARALLEL). It can also simulate prompt-prefix KV-cache reuse
+per slot, model unloading once keep_alive expires and outages (fail_status):
+
+    python benchmarks/stub_ollama.py --port 11434 --delay 0.5 --parallel 4
+
+It can also be started in-process:
+
+    with StubOllamaServer(delay=0.2) as server:
+        client.base_url = server.url
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Request handler implementing a subset of the Ollama API."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.server.fail_status:
+            self._send_json(self.server.fail_status, {"error": "simulated failure"})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": f"{self.server.model}:latest", "model": f"{self.server.model}:latest"}]})
+        elif self.path == "/api/ps":
+            self._send_json(200, {"models": self.server.loaded_models()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path == "/api/generate":
+            payload = self._read_json()
+            prompt = payload.get("prompt", "")
+        elif self.path == "/api/chat":
+            payload = self._read_json()
+            prompt = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in payload.get("messages", []))
+        else:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        self.server.record_connection(self.client_address)
+        if self.server.fail_status:
+            self._send_json(self.server.fail_status, {"error": "simulated failure"})
+            return
+
+        model = payload.get("model", self.server.model)
+        if not prompt:
+            # No prompt: Ollama just loads the model, or unloads it when keep_alive is 0
+            load_delay = 0.0
+            if self.server.parse_keep_alive(payload.get("keep_alive"), self.server.default_keep_alive) != 0:
+                load_delay, _ = self.server.prefill_delay(prompt)
+                time.sleep(load_delay)
+            self.server.release_model(payload.get("keep_alive"))
+            self._send_json(200, dict(self._body(model, "", done=True), load_duration=int(load_delay * 1e9)))
+            return
+
+        with self.server.slots:
+            self.server.track_active(+1)
+            try:
+                # Simulated model load and prompt processing, then the fixed per-request delay
+                load_delay, prefill = self.server.prefill_delay(prompt)
+                time.sleep(load_delay + prefill)
+                time.sleep(self.server.delay)
+            finally:
+                self.server.track_active(-1)
+
+        text = f"Stub feedback for a {len(prompt)} character prompt."
+        timings = {"load_duration": int(load_delay * 1e9)}
+
+        if payload.get("stream", True):
+            self._send_stream(model, text.split(" "), timings)
+        else:
+            self._send_json(200, dict(self._body(model, text, done=True), **timings))
+        self.server.release_model(payload.get("keep_alive"))
+
+    def _body(self, model, text, done):
+        if self.path == "/api/chat":
+            return {"model": model, "message": {"role": "assistant", "content": text}, "done": done}
+        return {"model": model, "response": text, "done": done}
+
+    def _send_stream(self, model, words, timings):
+        """Send an NDJSON response one word per chunk, like Ollama's streaming mode."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for i, word in enumerate(words):
+            chunk = self._body(model, word if i == 0 else " " + word, done=False)
+            self._write_chunk(json.dumps(chunk).encode("utf-8") + b"\n")
+            time.sleep(self.server.token_delay)
+        self._write_chunk(json.dumps(dict(self._body(model, "", done=True), **timings)).encode("utf-8") + b"\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubOllamaServer(ThreadingHTTPServer):
+    """Threaded stub server recording request concurrency and connection reuse."""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.1, parallel=4, model="gemma3", token_delay=0.01,
+                 prefill_per_char=0.0, load_delay=0.0, default_keep_alive=300.0, fail_status=None):
+        super().__init__((host, port), StubOllamaHandler)
+        self.delay = delay
+        # HTTP status returned to every request, to simulate an outage (None to serve normally)
+        self.fail_status = fail_status
+        self.token_delay = token_delay
+        # Prompt processing cost per character not covered by a cached prefix
+        self.prefill_per_char = prefill_per_char
+        # Cost of loading the model after it was unloaded
+        self.load_delay = load_delay
+        # Seconds the model stays loaded when a request sends no keep_alive (Ollama defaults to 5m)
+        self.default_keep_alive = default_keep_alive
+        # One cached prompt per parallel slot, like Ollama's per-slot KV cache
+        self.slot_prompts = [""] * parallel
+        self.loaded_until = 0.0
+        self.cached_chars = 0
+        self.prompt_chars = 0
+        self.model = model
+        # Memory reported for the loaded model by /api/ps
+        self.model_size = 5 * 1024 ** 3
+        self.slots = threading.BoundedSemaphore(parallel)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+        self.connections = set()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def track_active(self, delta):
+        with self.lock:
+            self.active += delta
+            self.max_active = max(self.max_active, self.active)
+
+    def record_connection(self, client_address):
+        with self.lock:
+            self.requests += 1
+            self.connections.add(client_address)
+
+    @staticmethod
+    def parse_keep_alive(value, default):
+        """Convert an Ollama keep_alive value ("30m", "10s", seconds, -1) into seconds."""
+        if value is None:
+            return default
+        if isinstance(value, (int, float)):
+            return float("inf") if value < 0 else float(value)
+        units = {"s": 1, "m": 60, "h": 3600}
+        if value[-1:] in units:
+            return float(value[:-1]) * units[value[-1]]
+        return float(value)
+
+    def prefill_delay(self, prompt):
+        """
+        Work out the simulated time to first token for a prompt.
+
+        The longest prefix shared with a prompt cached in any slot is free; the rest
+        costs prefill_per_char. An unloaded model costs load_delay and loses its caches.
+
+        Returns:
+            tuple: Seconds spent loading the model and processing the prompt.
+        """
+        with self.lock:
+            now = time.monotonic()
+            delay = 0.0
+            if now > self.loaded_until:
+                delay += self.load_delay
+                self.slot_prompts = [""] * len(self.slot_prompts)
+
+            if not prompt:
+                self.loaded_until = float("inf")
+                return delay, 0.0
+
+            best_slot, reused = 0, 0
+            for slot, cached in enumerate(self.slot_prompts):
+                shared = 0
+                limit = min(len(cached), len(prompt))
+                while shared < limit and cached[shared] == prompt[shared]:
+                    shared += 1
+                if shared > reused or (shared == reused and not cached):
+                    best_slot, reused = slot, shared
+            self.slot_prompts[best_slot] = prompt
+
+            self.cached_chars += reused
+            self.prompt_chars += len(prompt)
+            # The model stays loaded while requests run; the keep_alive timer starts when they finish
+            self.loaded_until = float("inf")
+            return delay, (len(prompt) - reused) * self.prefill_per_char
+
+    def loaded_models(self):
+        """Describe the loaded model the way /api/ps does (empty once keep_alive has expired)."""
+        with self.lock:
+            remaining = self.loaded_until - time.monotonic()
+        if remaining <= 0:
+            return []
+        # Ollama reports a far-future expiry for models kept loaded indefinitely
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=min(remaining, 100 * 365 * 86400))
+        name = f"{self.model}:latest"
+        return [{"name": name, "model": name, "size": self.model_size, "size_vram": self.model_size,
+                 "expires_at": expires_at.isoformat()}]
+
+    def release_model(self, keep_alive):
+        """Start the keep_alive countdown after a request completes."""
+        with self.lock:
+            ttl = self.parse_keep_alive(keep_alive, self.default_keep_alive)
+            self.loaded_until = time.monotonic() + ttl
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def handle_error(self, request, client_address):
+        # Clients that time out and hang up are expected when simulating a hung server
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds spent per generate request")
+    parser.add_argument("--parallel", type=int, default=4, help="Requests processed at once")
+    parser.add_argument("--model", default="gemma3")
+    parser.add_argument("--prefill-per-char", type=float, default=0.0,
+                        help="Seconds of prompt processing per uncached character")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="Seconds to load an unloaded model")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(args.host, args.port, args.delay, args.parallel, args.model,
+                              prefill_per_char=args.prefill_per_char, load_delay=args.load_delay)
+    print(f"Stub Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
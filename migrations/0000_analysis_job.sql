@@ -0,0 +1,19 @@
+-- Job queue for background analysis, graded by worker.py. Databases created
+-- from schema.sql before the queue was added have no analysis_job table, and
+-- the later migrations that add columns to it need it to exist.
+CREATE TABLE IF NOT EXISTS analysis_job (
+    id SERIAL PRIMARY KEY,
+    batch_id VARCHAR(36) NOT NULL,
+    submission_id INTEGER NOT NULL REFERENCES submission(id) ON DELETE CASCADE,
+    criteria_id INTEGER REFERENCES criteria(id) ON DELETE SET NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id VARCHAR(64),
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS ix_analysis_job_batch_id ON analysis_job (batch_id);
+CREATE INDEX IF NOT EXISTS ix_analysis_job_submission_id ON analysis_job (submission_id);
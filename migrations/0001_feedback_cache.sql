@@ -0,0 +1,13 @@
+-- Feedback cache table and per-job cache bookkeeping
+ALTER TABLE analysis_job ADD COLUMN IF NOT EXISTS bypass_cache BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE analysis_job ADD COLUMN IF NOT EXISTS cache_hit BOOLEAN;
+
+CREATE TABLE IF NOT EXISTS feedback_cache_entry (
+    key VARCHAR(64) PRIMARY KEY,
+    model VARCHAR(255) NOT NULL,
+    feedback TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,3 @@
+-- Record where each file lives in the uploaded ZIP so it can be extracted on demand
+ALTER TABLE submission ADD COLUMN IF NOT EXISTS archive_path TEXT;
+ALTER TABLE submission_file ADD COLUMN IF NOT EXISTS archive_member TEXT;
@@ -0,0 +1,8 @@
+-- Indexes for the latest-first listings, file lookups and cascade deletes.
+-- CONCURRENTLY avoids locking writes on large tables; psql -f runs each
+-- statement in its own transaction, which CONCURRENTLY requires.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_criteria_created_at ON criteria (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_submission_created_at ON submission (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_submission_unanalyzed_created_at ON submission (created_at) WHERE analyzed = false;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_submission_file_submission_id_filename ON submission_file (submission_id, filename);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_job_submission_id ON analysis_job (submission_id);
@@ -0,0 +1,13 @@
+-- Store extracted notebook content compressed and deduplicated outside the submission row.
+-- Afterwards run `python backfill_notebook_content.py` to move existing rows over.
+CREATE TABLE IF NOT EXISTS notebook_content (
+    content_hash VARCHAR(64) PRIMARY KEY,
+    encoding VARCHAR(16) NOT NULL DEFAULT 'zlib',
+    data BYTEA NOT NULL,
+    raw_size INTEGER NOT NULL DEFAULT 0,
+    stored_size INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE submission ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64) REFERENCES notebook_content(content_hash);
+CREATE INDEX IF NOT EXISTS ix_submission_content_hash ON submission (content_hash);
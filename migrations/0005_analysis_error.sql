@@ -0,0 +1,2 @@
+-- Record failed analyses on the submission instead of saving the error text as feedback
+ALTER TABLE submission ADD COLUMN IF NOT EXISTS analysis_error TEXT;
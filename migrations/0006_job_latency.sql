@@ -0,0 +1,4 @@
+-- Record whether each analysis waited for Ollama to load the model, and how long it took
+ALTER TABLE analysis_job ADD COLUMN IF NOT EXISTS cold_start BOOLEAN;
+ALTER TABLE analysis_job ADD COLUMN IF NOT EXISTS load_ms INTEGER;
+ALTER TABLE analysis_job ADD COLUMN IF NOT EXISTS latency_ms INTEGER;
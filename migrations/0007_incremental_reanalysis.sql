@@ -0,0 +1,5 @@
+-- Match re-uploaded folders to their existing submission, and remember which
+-- inputs each submission's feedback was generated from so only stale ones are
+-- regraded. Existing feedback has no fingerprint and counts as stale once.
+ALTER TABLE submission ADD COLUMN IF NOT EXISTS feedback_fingerprint VARCHAR(64);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_submission_folder_name ON submission (folder_name);
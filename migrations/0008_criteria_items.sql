@@ -0,0 +1,11 @@
+-- Store the criteria parsed out of each assessment criteria document, one row
+-- per criterion, for per-criterion grading. Criteria uploaded before this have
+-- no items and are graded as a whole until they are uploaded again.
+CREATE TABLE IF NOT EXISTS criteria_item (
+    id SERIAL PRIMARY KEY,
+    criteria_id INTEGER NOT NULL REFERENCES criteria(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_criteria_item_criteria_id_position ON criteria_item (criteria_id, position);
@@ -1,3 +1,5 @@
+import json
+import zlib
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 
@@ -10,7 +12,10 @@ class Criteria(db.Model):
     name = db.Column(db.String(255), nullable=False)
     text = db.Column(db.Text, nullable=False)
     file_path = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    items = db.relationship('CriteriaItem', backref='criteria', lazy=True, order_by='CriteriaItem.position',
+                            cascade="all, delete-orphan")
     
     def to_dict(self):
         return {
@@ -18,35 +23,104 @@ class Criteria(db.Model):
             'name': self.name,
             'text': self.text,
             'file_path': self.file_path,
+            'items': [item.text for item in self.items],
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class CriteriaItem(db.Model):
+    """A single criterion parsed from the assessment criteria text"""
+    id = db.Column(db.Integer, primary_key=True)
+    criteria_id = db.Column(db.Integer, db.ForeignKey('criteria.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # 0-based order within the criteria
+    text = db.Column(db.Text, nullable=False)
+
+    # Loads a criteria's items in order
+    __table_args__ = (
+        db.Index('ix_criteria_item_criteria_id_position', 'criteria_id', 'position'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'criteria_id': self.criteria_id,
+            'position': self.position,
+            'text': self.text
+        }
+
 class Submission(db.Model):
     """Submission model for storing student submissions"""
     id = db.Column(db.Integer, primary_key=True)
-    folder_name = db.Column(db.String(255), nullable=False)
+    folder_name = db.Column(db.String(255), nullable=False, index=True)
     notebook_file = db.Column(db.String(255), nullable=True)  # Main notebook file
     file_path = db.Column(db.String(512), nullable=True)  # Path to extracted folder
-    notebook_content = db.Column(db.JSON, nullable=True)  # Store notebook content as JSON
+    archive_path = db.Column(db.String(512), nullable=True)  # ZIP the submission was uploaded in
+    # Notebook content lives in notebook_content; this legacy in-row copy is emptied by the backfill
+    legacy_notebook_content = db.deferred(db.Column('notebook_content', db.JSON, nullable=True))
+    content_hash = db.Column(db.String(64), db.ForeignKey('notebook_content.content_hash'), nullable=True, index=True)
     feedback = db.Column(db.Text, nullable=True)
     analyzed = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    analysis_error = db.Column(db.Text, nullable=True)  # Why the last analysis attempt failed, if it did
+    # Hash of the notebook, criteria and settings the current feedback was generated from
+    feedback_fingerprint = db.Column(db.String(64), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     files = db.relationship('SubmissionFile', backref='submission', lazy=True, cascade="all, delete-orphan")
+    content = db.relationship('NotebookContent', lazy='select')
+
+    __table_args__ = (
+        # Only ungraded rows, in upload order: what "analyze what's left" scans
+        db.Index('ix_submission_unanalyzed_created_at', 'created_at',
+                 postgresql_where=db.text('analyzed = false'), sqlite_where=db.text('analyzed = 0')),
+    )
     
-    def to_dict(self):
-        return {
+    @property
+    def notebook_content(self):
+        """Extracted notebook content, fetched and decompressed on first access."""
+        if self.content is not None:
+            return self.content.load()
+        return self.legacy_notebook_content
+
+    def to_dict(self, include_feedback=True):
+        data = {
             'id': self.id,
             'folder_name': self.folder_name,
             'notebook_file': self.notebook_file,
             'file_path': self.file_path,
             'files': [file.filename for file in self.files],
-            'feedback': self.feedback,
             'analyzed': self.analyzed,
+            'analysis_error': self.analysis_error,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_feedback:
+            data['feedback'] = self.feedback
+        return data
+
+class NotebookContent(db.Model):
+    """Compressed extracted notebook content, shared by submissions with identical notebooks"""
+    content_hash = db.Column(db.String(64), primary_key=True)  # SHA-256 of the canonical JSON
+    encoding = db.Column(db.String(16), nullable=False, default='zlib')
+    data = db.Column(db.LargeBinary, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False, default=0)  # Bytes of canonical JSON before compression
+    stored_size = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def load(self):
+        """Decode the stored content, once per loaded row."""
+        if getattr(self, '_decoded', None) is None:
+            raw = zlib.decompress(self.data) if self.encoding == 'zlib' else self.data
+            self._decoded = json.loads(raw)
+        return self._decoded
+
+    def to_dict(self):
+        return {
+            'content_hash': self.content_hash,
+            'encoding': self.encoding,
+            'raw_size': self.raw_size,
+            'stored_size': self.stored_size,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
 
 class SubmissionFile(db.Model):
     """Individual files within a submission"""
@@ -54,7 +128,13 @@ class SubmissionFile(db.Model):
     submission_id = db.Column(db.Integer, db.ForeignKey('submission.id'), nullable=False)
     filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(512), nullable=False)  # Full path to file
+    archive_member = db.Column(db.String(1024), nullable=True)  # Name inside the ZIP, for on-demand extraction
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Serves view_file lookups and, through its leading column, cascade deletes
+    __table_args__ = (
+        db.Index('ix_submission_file_submission_id_filename', 'submission_id', 'filename'),
+    )
     
     def to_dict(self):
         return {
@@ -62,6 +142,7 @@ class SubmissionFile(db.Model):
             'submission_id': self.submission_id,
             'filename': self.filename,
             'file_path': self.file_path,
+            'archive_member': self.archive_member,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -80,4 +161,65 @@ class AnalysisSettings(db.Model):
             'postamble': self.postamble,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+class AnalysisJob(db.Model):
+    """Queued analysis of a single submission"""
+    id = db.Column(db.Integer, primary_key=True)
+    batch_id = db.Column(db.String(36), nullable=False, index=True)  # Groups jobs enqueued together
+    submission_id = db.Column(db.Integer, db.ForeignKey('submission.id', ondelete='CASCADE'), nullable=False, index=True)
+    criteria_id = db.Column(db.Integer, db.ForeignKey('criteria.id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker_id = db.Column(db.String(64), nullable=True)  # Worker currently holding the job
+    error = db.Column(db.Text, nullable=True)
+    bypass_cache = db.Column(db.Boolean, nullable=False, default=False)  # Always regenerate feedback
+    cache_hit = db.Column(db.Boolean, nullable=True)  # Whether feedback came from the cache
+    cold_start = db.Column(db.Boolean, nullable=True)  # Whether Ollama had to load the model first
+    load_ms = db.Column(db.Integer, nullable=True)  # Model load time Ollama reported for the job's requests
+    latency_ms = db.Column(db.Integer, nullable=True)  # Time taken to grade the job when Ollama was called
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    submission = db.relationship('Submission', backref=db.backref('jobs', lazy=True, cascade="all, delete-orphan"))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'batch_id': self.batch_id,
+            'submission_id': self.submission_id,
+            'criteria_id': self.criteria_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'worker_id': self.worker_id,
+            'error': self.error,
+            'bypass_cache': self.bypass_cache,
+            'cache_hit': self.cache_hit,
+            'cold_start': self.cold_start,
+            'load_ms': self.load_ms,
+            'latency_ms': self.latency_ms,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class FeedbackCacheEntry(db.Model):
+    """Generated feedback keyed by a hash of everything that went into the prompt"""
+    key = db.Column(db.String(64), primary_key=True)  # SHA-256 of the prompt inputs
+    model = db.Column(db.String(255), nullable=False)
+    feedback = db.Column(db.Text, nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'model': self.model,
+            'size_bytes': self.size_bytes,
+            'hit_count': self.hit_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None
+        }
@@ -7,28 +7,62 @@ CREATE TABLE criteria (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_criteria_created_at ON criteria (created_at);
+
+-- Table: criteria_item
+CREATE TABLE criteria_item (
+    id SERIAL PRIMARY KEY,
+    criteria_id INTEGER NOT NULL REFERENCES criteria(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE INDEX ix_criteria_item_criteria_id_position ON criteria_item (criteria_id, position);
+
+-- Table: notebook_content
+CREATE TABLE notebook_content (
+    content_hash VARCHAR(64) PRIMARY KEY,
+    encoding VARCHAR(16) NOT NULL DEFAULT 'zlib',
+    data BYTEA NOT NULL,
+    raw_size INTEGER NOT NULL DEFAULT 0,
+    stored_size INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Table: submission
 CREATE TABLE submission (
     id SERIAL PRIMARY KEY,
     folder_name TEXT NOT NULL,
     notebook_file TEXT,
     file_path TEXT,
-    notebook_content JSONB,
+    archive_path TEXT,
+    notebook_content JSONB,  -- legacy in-row copy, moved out by backfill_notebook_content.py
+    content_hash VARCHAR(64) REFERENCES notebook_content(content_hash),
     feedback TEXT,
     analyzed BOOLEAN DEFAULT FALSE,
+    analysis_error TEXT,
+    feedback_fingerprint VARCHAR(64),  -- inputs the current feedback was generated from
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_submission_folder_name ON submission (folder_name);
+CREATE INDEX ix_submission_created_at ON submission (created_at);
+CREATE INDEX ix_submission_content_hash ON submission (content_hash);
+CREATE INDEX ix_submission_unanalyzed_created_at ON submission (created_at) WHERE analyzed = false;
+
 -- Table: submission_file
 CREATE TABLE submission_file (
     id SERIAL PRIMARY KEY,
     submission_id INTEGER NOT NULL REFERENCES submission(id) ON DELETE CASCADE,
     filename TEXT NOT NULL,
     file_path TEXT NOT NULL,
+    archive_member TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX ix_submission_file_submission_id_filename ON submission_file (submission_id, filename);
+
 -- Table: analysis_settings
 CREATE TABLE analysis_settings (
     id SERIAL PRIMARY KEY,
@@ -38,6 +72,40 @@ CREATE TABLE analysis_settings (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Table: analysis_job
+CREATE TABLE analysis_job (
+    id SERIAL PRIMARY KEY,
+    batch_id VARCHAR(36) NOT NULL,
+    submission_id INTEGER NOT NULL REFERENCES submission(id) ON DELETE CASCADE,
+    criteria_id INTEGER REFERENCES criteria(id) ON DELETE SET NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id VARCHAR(64),
+    error TEXT,
+    bypass_cache BOOLEAN NOT NULL DEFAULT FALSE,
+    cache_hit BOOLEAN,
+    cold_start BOOLEAN,
+    load_ms INTEGER,
+    latency_ms INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX ix_analysis_job_batch_id ON analysis_job (batch_id);
+CREATE INDEX ix_analysis_job_submission_id ON analysis_job (submission_id);
+
+-- Table: feedback_cache_entry
+CREATE TABLE feedback_cache_entry (
+    key VARCHAR(64) PRIMARY KEY,
+    model VARCHAR(255) NOT NULL,
+    feedback TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Trigger function to auto-update updated_at fields
 CREATE OR REPLACE FUNCTION set_updated_at()
 RETURNS TRIGGER AS $$
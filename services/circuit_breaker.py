@@ -0,0 +1,96 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker guarding calls to a remote service.
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    refused without being attempted. Once reset_timeout seconds have passed a
+    single trial call is let through (half-open); its success closes the circuit
+    and its failure opens it again for another reset_timeout.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        """
+        Initialize the breaker in the closed state.
+
+        Args:
+            name (str): Name used in log messages.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds to wait before letting a trial call through.
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        """Current state, moving from open to half-open once the reset timeout has passed."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def retry_after(self):
+        """Seconds until an open circuit lets a trial call through (0 if it is not open)."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self):
+        """
+        Decide whether a call may be attempted now.
+
+        Returns:
+            bool: False while the circuit is open, or while another caller's trial
+            call is in flight.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit at the threshold or after a failed trial."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self._failures} consecutive failures; "
+                        f"failing fast for {self.reset_timeout}s")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
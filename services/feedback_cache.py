@@ -0,0 +1,197 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from models import db, FeedbackCacheEntry, AnalysisJob
+
+logger = logging.getLogger(__name__)
+
+
+class FeedbackCache:
+    """
+    Content-addressed store of generated feedback.
+
+    Entries are keyed by a hash of every input that shapes the prompt, so an
+    unchanged submission graded with unchanged settings is served without calling
+    Ollama. Entries expire after a maximum age and the least recently used ones are
+    evicted once the entry count or total size exceeds its limit.
+    """
+
+    def __init__(self):
+        """Initialize the cache with limits from the environment."""
+        self.enabled = os.environ.get("FEEDBACK_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.max_entries = int(os.environ.get("FEEDBACK_CACHE_MAX_ENTRIES", 5000))
+        self.max_bytes = int(os.environ.get("FEEDBACK_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+        self.max_age = timedelta(days=float(os.environ.get("FEEDBACK_CACHE_MAX_AGE_DAYS", 30)))
+
+    @staticmethod
+    def make_key(model, temperature, preamble, criteria_text, notebook_content, postamble, variant=''):
+        """
+        Compute the cache key for a set of prompt inputs.
+
+        The notebook content is serialized canonically (sorted keys, no whitespace)
+        so that equal content always hashes the same regardless of key order.
+
+        Args:
+            model (str): Ollama model name.
+            temperature (float): Sampling temperature.
+            preamble (str): Text added before the prompt.
+            criteria_text (str): Assessment criteria.
+            notebook_content (dict): Extracted notebook content.
+            postamble (str): Text added after the prompt.
+            variant (str): Identifies the prompt template, so template changes miss.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        canonical = json.dumps(
+            [variant, model, temperature, preamble or '', criteria_text or '',
+             notebook_content, postamble or ''],
+            sort_keys=True, separators=(',', ':'), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """
+        Look up cached feedback.
+
+        Args:
+            key (str): Cache key from make_key.
+
+        Returns:
+            str: The cached feedback, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        entry = db.session.get(FeedbackCacheEntry, key)
+        if entry is None:
+            return None
+
+        if entry.created_at and entry.created_at < datetime.utcnow() - self.max_age:
+            db.session.delete(entry)
+            db.session.commit()
+            return None
+
+        entry.hit_count += 1
+        entry.last_used_at = datetime.utcnow()
+        db.session.commit()
+        return entry.feedback
+
+    def put(self, key, model, feedback):
+        """
+        Store feedback, replacing any existing entry, then enforce the limits.
+
+        A failed write is logged and rolled back rather than raised, since the
+        feedback itself has already been generated.
+
+        Args:
+            key (str): Cache key from make_key.
+            model (str): Ollama model name.
+            feedback (str): The generated feedback.
+        """
+        if not self.enabled:
+            return
+
+        now = datetime.utcnow()
+        values = {
+            'model': model,
+            'feedback': feedback,
+            'size_bytes': len(feedback.encode('utf-8')),
+            'created_at': now,
+            'last_used_at': now
+        }
+        try:
+            statement = self._upsert(values)
+            if statement is not None:
+                db.session.execute(statement.values(key=key, hit_count=0, **values))
+            else:
+                db.session.merge(FeedbackCacheEntry(key=key, **values))
+            db.session.commit()
+            self.evict()
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not store feedback in the cache: {str(e)}")
+            db.session.rollback()
+
+    @staticmethod
+    def _upsert(values):
+        """INSERT that overwrites an entry another worker stored for the same key first, if supported."""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            statement = postgresql.insert(FeedbackCacheEntry)
+        elif dialect == 'sqlite':
+            statement = sqlite.insert(FeedbackCacheEntry)
+        else:
+            return None
+        return statement.on_conflict_do_update(index_elements=[FeedbackCacheEntry.key], set_=values)
+
+    def evict(self):
+        """
+        Remove expired entries, then least recently used ones until within limits.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        removed = FeedbackCacheEntry.query.filter(
+            FeedbackCacheEntry.created_at < datetime.utcnow() - self.max_age
+        ).delete(synchronize_session=False)
+
+        count, total_bytes = db.session.query(
+            db.func.count(FeedbackCacheEntry.key),
+            db.func.coalesce(db.func.sum(FeedbackCacheEntry.size_bytes), 0)
+        ).one()
+
+        if count > self.max_entries or total_bytes > self.max_bytes:
+            doomed = []
+            oldest_first = db.session.query(FeedbackCacheEntry.key, FeedbackCacheEntry.size_bytes) \
+                .order_by(FeedbackCacheEntry.last_used_at).yield_per(500)
+            for key, size_bytes in oldest_first:
+                if count <= self.max_entries and total_bytes <= self.max_bytes:
+                    break
+                doomed.append(key)
+                count -= 1
+                total_bytes -= size_bytes or 0
+            removed += FeedbackCacheEntry.query.filter(
+                FeedbackCacheEntry.key.in_(doomed)
+            ).delete(synchronize_session=False)
+
+        db.session.commit()
+        if removed:
+            logger.debug(f"Evicted {removed} feedback cache entries")
+        return removed
+
+    def stats(self):
+        """
+        Report cache size and hit/miss counts.
+
+        Hits and misses are recorded on analysis jobs, so the counts cover every
+        worker process.
+
+        Returns:
+            dict: Entry count, total size, hits, misses and hit rate.
+        """
+        entries, total_bytes = db.session.query(
+            db.func.count(FeedbackCacheEntry.key),
+            db.func.coalesce(db.func.sum(FeedbackCacheEntry.size_bytes), 0)
+        ).one()
+        lookups = dict(
+            db.session.query(AnalysisJob.cache_hit, db.func.count(AnalysisJob.id))
+            .filter(AnalysisJob.cache_hit.isnot(None))
+            .group_by(AnalysisJob.cache_hit)
+            .all()
+        )
+        hits = lookups.get(True, 0)
+        misses = lookups.get(False, 0)
+        return {
+            'enabled': self.enabled,
+            'entries': entries,
+            'size_bytes': int(total_bytes),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None
+        }
@@ -0,0 +1,477 @@
+import os
+import time
+import hashlib
+import logging
+from datetime import datetime
+
+from models import db
+from services.notebook_renderer import NotebookRenderer, estimate_tokens
+from services.prompt_builder import PromptBuilder
+from services.notebook_store import NotebookStore
+from services.feedback_cache import FeedbackCache
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionGrader:
+    """
+    Service that grades a single submission against the assessment criteria.
+    """
+
+    # Bump when the prompt template changes so cached feedback for the old template misses
+    PROMPT_VERSION = '4'
+    # Same, for the prompts that evaluate one criterion at a time
+    CRITERION_PROMPT_VERSION = '1'
+
+    def __init__(self, ollama_client, feedback_cache=None, notebook_renderer=None, prompt_builder=None):
+        """
+        Initialize the grader.
+
+        Args:
+            ollama_client (OllamaClient): Client used to generate feedback.
+            feedback_cache (FeedbackCache): Optional cache of previously generated feedback.
+            notebook_renderer (NotebookRenderer): Renders notebook content as prompt text.
+            prompt_builder (PromptBuilder): Lays out prompts as chat messages.
+        """
+        self.ollama_client = ollama_client
+        self.feedback_cache = feedback_cache
+        self.notebook_renderer = notebook_renderer or NotebookRenderer()
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.temperature = float(os.environ.get("OLLAMA_TEMPERATURE", 0.7))
+        self.max_tokens = int(os.environ.get("OLLAMA_MAX_TOKENS", 2048))
+        # Smallest notebook chunk worth sending when the criteria leave little room
+        self.min_chunk_tokens = int(os.environ.get("NOTEBOOK_MIN_CHUNK_TOKENS", 512))
+        # Stream tokens from Ollama and save partial feedback so the UI can show it live
+        self.stream = os.environ.get("OLLAMA_STREAM", "true").lower() in ("1", "true", "yes")
+        self.flush_interval = float(os.environ.get("FEEDBACK_FLUSH_SECONDS", 1.0))
+        # "per_criterion" evaluates each parsed criterion with its own prompt; "whole" sends them all at once
+        self.per_criterion = os.environ.get("GRADING_MODE", "whole").lower().replace('-', '_') == "per_criterion"
+
+    def notebook_token_budget(self, criteria, settings):
+        """
+        Work out how many notebook tokens fit in one prompt.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+
+        Returns:
+            int: Estimated tokens available for notebook content; zero or less when
+            the criteria and settings alone fill the context window.
+        """
+        return self._token_budget(self.prompt_builder.evaluation_messages(criteria, settings, ''))
+
+    def criterion_token_budget(self, items, settings):
+        """
+        Work out how many notebook tokens fit in the prompt for every criterion.
+
+        Args:
+            items (list): Criterion texts.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+
+        Returns:
+            int: Estimated tokens available for notebook content.
+        """
+        longest = max(items, key=len)
+        return self._token_budget(self.prompt_builder.criterion_messages(longest, settings, ''))
+
+    def _token_budget(self, empty_messages):
+        overhead = estimate_tokens(self.prompt_builder.as_text(empty_messages))
+        available = self.ollama_client.num_ctx - self.max_tokens - overhead
+        # Leave headroom for the estimate being lower than the real tokenizer count;
+        # zero or less when the prompt leaves no room for the notebook at all
+        return int(available * 0.9)
+
+    def criteria_items(self, criteria):
+        """
+        Return the criteria to evaluate one at a time.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+
+        Returns:
+            list: Criterion texts in order; empty when grading against the whole
+            criteria, either by configuration or because none were parsed.
+        """
+        if not self.per_criterion:
+            return []
+        return [item.text for item in criteria.items]
+
+    def cache_key(self, submission, criteria, settings):
+        """
+        Compute the feedback cache key for grading a submission.
+
+        Args:
+            submission (Submission): The submission to grade.
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+
+        Returns:
+            str: The cache key.
+        """
+        return self._inputs_key(submission.notebook_content, criteria, settings)
+
+    def _inputs_key(self, notebook_content, criteria, settings):
+        criteria_text = criteria.text
+        # Context size decides whether the notebook is chunked, which changes the output
+        variant = f"{self.PROMPT_VERSION}:{self.ollama_client.num_ctx}:{self.max_tokens}"
+        items = self.criteria_items(criteria)
+        if items:
+            # Per-criterion feedback is built from the parsed items, not the criteria text
+            criteria_text = "\x1e".join(items)
+            variant += f":criteria:{self.CRITERION_PROMPT_VERSION}"
+        return FeedbackCache.make_key(
+            model=self.ollama_client.model,
+            temperature=self.temperature,
+            preamble=settings.preamble,
+            criteria_text=criteria_text,
+            notebook_content=notebook_content,
+            postamble=settings.postamble,
+            variant=variant
+        )
+
+    def _criterion_key(self, notebook_content, criterion, settings):
+        """Cache key of one criterion's evaluation, shared by every criteria document containing it."""
+        return FeedbackCache.make_key(
+            model=self.ollama_client.model,
+            temperature=self.temperature,
+            preamble=settings.preamble,
+            criteria_text=criterion,
+            notebook_content=notebook_content,
+            postamble=settings.postamble,
+            variant=f"criterion:{self.CRITERION_PROMPT_VERSION}:{self.ollama_client.num_ctx}:{self.max_tokens}"
+        )
+
+    def inputs_fingerprint(self, criteria, settings):
+        """
+        Hash everything other than the notebook that shapes a submission's feedback.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        # The cache key with the notebook left out; fingerprint() adds it per submission
+        return self._inputs_key(None, criteria, settings)
+
+    def fingerprint(self, submission, criteria, settings, inputs_fingerprint=None):
+        """
+        Compute the fingerprint stored with feedback generated for a submission.
+
+        The notebook is identified by its content hash, so checking whether many
+        submissions are stale needs no notebook content.
+
+        Args:
+            submission (Submission): The submission.
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            inputs_fingerprint (str): Precomputed inputs_fingerprint(criteria, settings).
+
+        Returns:
+            str: Hex SHA-256 digest.
+        """
+        if inputs_fingerprint is None:
+            inputs_fingerprint = self.inputs_fingerprint(criteria, settings)
+        # Rows not yet moved out by the backfill still hold their content in-row
+        content_hash = submission.content_hash or NotebookStore.make_hash(submission.notebook_content)
+        return hashlib.sha256(f"{inputs_fingerprint}:{content_hash}".encode('utf-8')).hexdigest()
+
+    def stale_submission_ids(self, submissions, criteria, settings):
+        """
+        Find submissions whose feedback is missing or was generated from a different
+        notebook, criteria, settings or model than the current ones.
+
+        Args:
+            submissions (list): Submissions to check.
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+
+        Returns:
+            set: IDs of the stale submissions.
+        """
+        inputs_fingerprint = self.inputs_fingerprint(criteria, settings)
+        return {
+            submission.id for submission in submissions
+            if submission.feedback_fingerprint is None
+            or submission.feedback_fingerprint != self.fingerprint(submission, criteria, settings, inputs_fingerprint)
+        }
+
+    def grade(self, submission, criteria, settings, bypass_cache=False):
+        """
+        Generate feedback for a submission and store it.
+
+        Args:
+            submission (Submission): The submission to grade.
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            bypass_cache (bool): Regenerate even if cached feedback exists.
+
+        Returns:
+            tuple: The feedback and whether it was served from the cache: True when the
+            whole feedback, or in per-criterion mode every criterion's evaluation, was
+            cached. None when the cache was not consulted (no cache, disabled or bypassed).
+
+        Raises:
+            OllamaError: If feedback could not be generated. The error is recorded on
+            the submission's analysis_error and its previous feedback is kept.
+        """
+        cache_key = None
+        cache_hit = None
+        feedback = None
+
+        if self.feedback_cache is not None and self.feedback_cache.enabled:
+            cache_key = self.cache_key(submission, criteria, settings)
+            # Only lookups count towards the hit and miss stats
+            if not bypass_cache:
+                feedback = self.feedback_cache.get(cache_key)
+                cache_hit = feedback is not None
+
+        if feedback is None:
+            previous_feedback = submission.feedback
+            try:
+                feedback, all_cached = self._generate(submission, criteria, settings, bypass_cache)
+            except Exception as e:
+                # Keep the last good feedback rather than partial text, and flag the failure
+                db.session.rollback()
+                submission.feedback = previous_feedback
+                submission.analysis_error = str(e)
+                submission.updated_at = datetime.utcnow()
+                db.session.commit()
+                raise
+
+            if all_cached:
+                cache_hit = True
+            if cache_key and feedback:
+                self.feedback_cache.put(cache_key, self.ollama_client.model, feedback)
+
+        # Update submission with feedback
+        submission.feedback = feedback
+        submission.analyzed = True
+        submission.analysis_error = None
+        submission.feedback_fingerprint = self.fingerprint(submission, criteria, settings)
+        submission.updated_at = datetime.utcnow()
+        db.session.commit()
+
+        logger.debug(f"Analyzed submission: {submission.id} (cache hit: {cache_hit})")
+        return feedback, cache_hit
+
+    def _generate(self, submission, criteria, settings, bypass_cache=False):
+        """
+        Generate feedback, splitting notebooks that do not fit the context window.
+
+        In per-criterion mode each criterion is evaluated separately; notebooks too
+        large for that are graded against the whole criteria instead.
+
+        Args:
+            submission (Submission): The submission being graded.
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            bypass_cache (bool): Regenerate cached per-criterion evaluations too.
+
+        Returns:
+            tuple: The generated feedback, and whether every part of it came from the
+            cache (only possible in per-criterion mode).
+
+        Raises:
+            ValueError: If the notebook does not fit in one prompt and the criteria and
+            settings leave too little of the context window to grade it in chunks.
+        """
+        rendered = self.notebook_renderer.render(submission.notebook_content)
+
+        items = self.criteria_items(criteria)
+        if items:
+            criterion_budget = self.criterion_token_budget(items, settings)
+            if 0 < criterion_budget and rendered['estimated_tokens'] <= criterion_budget:
+                return self._grade_per_criterion(submission, items, settings, rendered['text'], bypass_cache)
+            logger.info(f"Submission {submission.id} is too large to grade per criterion, "
+                        f"grading against the whole criteria")
+
+        budget = self.notebook_token_budget(criteria, settings)
+        logger.debug(
+            f"Rendered notebook for submission {submission.id}: {rendered['chars']} chars, "
+            f"~{rendered['estimated_tokens']} tokens (budget {budget}), "
+            f"{rendered['truncated_outputs']} outputs truncated"
+        )
+
+        if 0 < budget and rendered['estimated_tokens'] <= budget:
+            return self._complete(
+                submission, self.prompt_builder.evaluation_messages(criteria, settings, rendered['text'])), False
+
+        if budget < self.min_chunk_tokens:
+            # Chunks this small would overflow the context or say nothing useful
+            logger.warning(f"Submission {submission.id} can't be graded: ~{max(budget, 0)} tokens of "
+                           f"the {self.ollama_client.num_ctx}-token context are left for the notebook")
+            raise ValueError(
+                f"The criteria, preamble and postamble leave room for only ~{max(budget, 0)} notebook "
+                f"tokens in the {self.ollama_client.num_ctx}-token context window, less than the "
+                f"{self.min_chunk_tokens} needed to grade it in parts. Raise OLLAMA_NUM_CTX or "
+                f"shorten the criteria.")
+
+        return self._grade_in_chunks(submission, criteria, settings, budget), False
+
+    def _grade_per_criterion(self, submission, items, settings, notebook_text, bypass_cache=False):
+        """
+        Evaluate a notebook against each criterion separately and assemble the results.
+
+        Evaluations are cached per criterion, so when a new criteria document changes
+        one criterion only that one is sent to Ollama. The rest are sent concurrently.
+
+        Args:
+            submission (Submission): The submission being graded.
+            items (list): Criterion texts.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            notebook_text (str): Notebook rendered by NotebookRenderer.
+            bypass_cache (bool): Regenerate cached evaluations.
+
+        Returns:
+            tuple: The assembled feedback, and whether every evaluation came from the cache.
+        """
+        evaluations = [None] * len(items)
+        keys = [None] * len(items)
+        if self.feedback_cache is not None and self.feedback_cache.enabled:
+            for position, item in enumerate(items):
+                keys[position] = self._criterion_key(submission.notebook_content, item, settings)
+                if not bypass_cache:
+                    evaluations[position] = self.feedback_cache.get(keys[position])
+
+        missing = [position for position, evaluation in enumerate(evaluations) if evaluation is None]
+        logger.debug(f"Grading submission {submission.id} against {len(items)} criteria, "
+                     f"{len(items) - len(missing)} cached")
+
+        prompts = [self.prompt_builder.criterion_messages(items[position], settings, notebook_text)
+                   for position in missing]
+        last_flush = time.monotonic()
+        for index, evaluation in self.ollama_client.generate_many(
+                prompts, temperature=self.temperature, max_tokens=self.max_tokens // 2):
+            position = missing[index]
+            evaluations[position] = evaluation
+            if keys[position] and evaluation:
+                self.feedback_cache.put(keys[position], self.ollama_client.model, evaluation)
+            if self.stream and time.monotonic() - last_flush >= self.flush_interval:
+                # Show the criteria evaluated so far while the rest are generated
+                submission.feedback = self.assemble_feedback(items, evaluations)
+                db.session.commit()
+                last_flush = time.monotonic()
+
+        return self.assemble_feedback(items, evaluations), not missing
+
+    @staticmethod
+    def assemble_feedback(items, evaluations):
+        """
+        Lay out per-criterion evaluations as one piece of feedback, in criteria order.
+
+        Args:
+            items (list): Criterion texts.
+            evaluations (list): Evaluation of each criterion; None for ones not done yet,
+                which are left out.
+
+        Returns:
+            str: A heading per criterion followed by its evaluation.
+        """
+        return "\n\n".join(
+            f"### {PromptBuilder.normalize(item)}\n\n{evaluation.strip()}"
+            for item, evaluation in zip(items, evaluations) if evaluation is not None
+        )
+
+    def _grade_in_chunks(self, submission, criteria, settings, budget):
+        """
+        Grade an oversized notebook with map-reduce.
+
+        Each chunk is reviewed concurrently, then the notes are merged into a single
+        evaluation. Notes that are themselves too long for one prompt are condensed
+        in groups first.
+
+        Args:
+            submission (Submission): The submission being graded.
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            budget (int): Estimated notebook tokens that fit in one prompt.
+
+        Returns:
+            str: The merged feedback.
+        """
+        chunks = self.notebook_renderer.render_chunks(submission.notebook_content, budget)
+        logger.info(f"Submission {submission.id} exceeds the context window, grading in {len(chunks)} chunks")
+
+        prompts = [
+            self.prompt_builder.chunk_messages(criteria, settings, chunk, part, len(chunks))
+            for part, chunk in enumerate(chunks, start=1)
+        ]
+        notes = self._generate_all(prompts)
+
+        while estimate_tokens("\n\n".join(notes)) > budget and len(notes) > 1:
+            groups = self._group_notes(notes, budget)
+            if len(groups) == len(notes):
+                # Every note already fills the budget on its own; merging can't shrink further
+                break
+            notes = self._generate_all(
+                [self.prompt_builder.reduce_messages(criteria, settings, group) for group in groups])
+
+        return self._complete(submission, self.prompt_builder.reduce_messages(criteria, settings, notes))
+
+    def _generate_all(self, prompts):
+        """
+        Run prompts concurrently and return the responses in prompt order.
+
+        Returns:
+            list: Responses in prompt order.
+        """
+        responses = [None] * len(prompts)
+        for index, response in self.ollama_client.generate_many(
+                prompts, temperature=self.temperature, max_tokens=self.max_tokens // 2):
+            responses[index] = response
+        return responses
+
+    @staticmethod
+    def _group_notes(notes, budget):
+        """Pack consecutive notes into groups whose combined size fits the budget."""
+        groups = [[]]
+        group_tokens = 0
+        for note in notes:
+            tokens = estimate_tokens(note)
+            if groups[-1] and group_tokens + tokens > budget:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(note)
+            group_tokens += tokens
+        return groups
+
+    def _complete(self, submission, messages):
+        """
+        Send the final messages whose response becomes the submission's feedback.
+
+        Args:
+            submission (Submission): The submission being graded.
+            messages (list): Chat messages from the prompt builder.
+
+        Returns:
+            str: The generated feedback.
+        """
+        if self.stream:
+            return self._stream_feedback(submission, messages)
+        return self.ollama_client.chat(messages, temperature=self.temperature, max_tokens=self.max_tokens)
+
+    def _stream_feedback(self, submission, messages):
+        """
+        Stream feedback from Ollama, periodically saving the partial text.
+
+        Args:
+            submission (Submission): The submission being graded.
+            messages (list): Chat messages to send to Ollama.
+
+        Returns:
+            str: The complete feedback.
+        """
+        parts = []
+        last_flush = time.monotonic()
+
+        for chunk in self.ollama_client.stream_chat(messages, temperature=self.temperature, max_tokens=self.max_tokens):
+            parts.append(chunk)
+            if time.monotonic() - last_flush >= self.flush_interval:
+                submission.feedback = ''.join(parts)
+                db.session.commit()
+                last_flush = time.monotonic()
+
+        return ''.join(parts)
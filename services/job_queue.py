@@ -0,0 +1,322 @@
+import os
+import uuid
+import logging
+from datetime import datetime, timedelta
+
+from models import db, AnalysisJob, Submission
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    Database-backed queue of analysis jobs.
+
+    Jobs live in the analysis_job table, so the queue survives restarts and can be
+    drained by any number of worker processes sharing the same database.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    ACTIVE_STATUSES = (PENDING, RUNNING)
+
+    def __init__(self):
+        """Initialize the queue with lease and retry settings from the environment."""
+        # A running job whose worker has not finished it within the lease is considered abandoned
+        self.lease_seconds = int(os.environ.get("ANALYSIS_JOB_LEASE_SECONDS", 1800))
+        self.max_attempts = int(os.environ.get("ANALYSIS_JOB_MAX_ATTEMPTS", 3))
+
+    def enqueue(self, submission_ids, criteria_id=None, bypass_cache=False):
+        """
+        Enqueue one job per submission.
+
+        Submissions that already have a pending or running job are not queued twice.
+
+        Args:
+            submission_ids (list): IDs of the submissions to analyze.
+            criteria_id (int): ID of the criteria to grade against.
+            bypass_cache (bool): Regenerate feedback even if a cached result exists.
+
+        Returns:
+            tuple: The batch ID and the list of created jobs.
+        """
+        batch_id = str(uuid.uuid4())
+
+        already_queued = {
+            row.submission_id for row in
+            db.session.query(AnalysisJob.submission_id).filter(
+                AnalysisJob.submission_id.in_(submission_ids),
+                AnalysisJob.status.in_(self.ACTIVE_STATUSES)
+            )
+        }
+
+        jobs = []
+        for submission_id in submission_ids:
+            if submission_id in already_queued:
+                logger.debug(f"Submission {submission_id} already has an active job, skipping")
+                continue
+            job = AnalysisJob(
+                batch_id=batch_id,
+                submission_id=submission_id,
+                criteria_id=criteria_id,
+                bypass_cache=bypass_cache,
+                status=self.PENDING
+            )
+            db.session.add(job)
+            jobs.append(job)
+
+        db.session.commit()
+        logger.info(f"Enqueued {len(jobs)} analysis jobs in batch {batch_id}")
+        return batch_id, jobs
+
+    def claim(self, worker_id):
+        """
+        Atomically claim the oldest pending job for a worker.
+
+        Uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it and a
+        conditional UPDATE on the status column everywhere, so two workers can never
+        claim the same job.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker.
+
+        Returns:
+            AnalysisJob: The claimed job, or None if the queue is empty.
+        """
+        while True:
+            candidate = db.session.query(AnalysisJob.id).filter(
+                AnalysisJob.status == self.PENDING
+            ).order_by(AnalysisJob.id).limit(1).with_for_update(skip_locked=True).first()
+
+            if candidate is None:
+                db.session.commit()
+                return None
+
+            claimed = db.session.query(AnalysisJob).filter(
+                AnalysisJob.id == candidate.id,
+                AnalysisJob.status == self.PENDING
+            ).update({
+                'status': self.RUNNING,
+                'worker_id': worker_id,
+                'started_at': datetime.utcnow(),
+                'attempts': AnalysisJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+
+            if claimed:
+                return db.session.get(AnalysisJob, candidate.id)
+            # Another worker won the race for this job; try the next one
+
+    def complete(self, job):
+        """
+        Mark a job as finished successfully.
+
+        Args:
+            job (AnalysisJob): The job to complete.
+        """
+        job.status = self.DONE
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def fail(self, job, error):
+        """
+        Record a failed attempt, re-queueing the job while it has attempts left.
+
+        Args:
+            job (AnalysisJob): The job that failed.
+            error (str): Description of the failure.
+        """
+        job.error = error
+        job.worker_id = None
+        if job.attempts < self.max_attempts:
+            job.status = self.PENDING
+        else:
+            job.status = self.FAILED
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    def postpone(self, job, error):
+        """
+        Put a job back in the queue without counting the attempt against it.
+
+        Used when the job could not run for reasons outside its control, such as
+        Ollama being down, so a long outage does not exhaust every job's attempts.
+
+        Args:
+            job (AnalysisJob): The job to return to the queue.
+            error (str): Why it could not run.
+        """
+        job.error = error
+        job.worker_id = None
+        job.status = self.PENDING
+        job.attempts = max(0, job.attempts - 1)
+        db.session.commit()
+
+    def release(self, worker_id):
+        """
+        Return every running job held by a worker to the queue (used on shutdown).
+
+        Args:
+            worker_id (str): Identifier of the worker shutting down.
+
+        Returns:
+            int: Number of jobs released.
+        """
+        released = AnalysisJob.query.filter(
+            AnalysisJob.status == self.RUNNING,
+            AnalysisJob.worker_id == worker_id
+        ).update({
+            'status': self.PENDING,
+            'worker_id': None,
+            'attempts': AnalysisJob.attempts - 1
+        }, synchronize_session=False)
+        db.session.commit()
+        return released
+
+    def requeue_stale(self):
+        """
+        Re-queue running jobs whose lease has expired, e.g. after a worker crash.
+
+        Finished jobs are never touched, so a restart resumes only unfinished work.
+
+        Returns:
+            int: Number of jobs re-queued.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        requeued = AnalysisJob.query.filter(
+            AnalysisJob.status == self.RUNNING,
+            AnalysisJob.started_at < cutoff
+        ).update({
+            'status': self.PENDING,
+            'worker_id': None
+        }, synchronize_session=False)
+        db.session.commit()
+        if requeued:
+            logger.info(f"Re-queued {requeued} stale analysis jobs")
+        return requeued
+
+    def active_count(self):
+        """
+        Count jobs still waiting or running, across every batch.
+
+        Returns:
+            int: Number of pending and running jobs; 0 once the queue has drained.
+        """
+        return AnalysisJob.query.filter(AnalysisJob.status.in_(self.ACTIVE_STATUSES)).count()
+
+    def batch_progress(self, batch_id):
+        """
+        Summarize the state of a batch.
+
+        Args:
+            batch_id (str): The batch to summarize.
+
+        Returns:
+            dict: Job counts per status plus the batch total.
+        """
+        counts = dict(
+            db.session.query(AnalysisJob.status, db.func.count(AnalysisJob.id))
+            .filter(AnalysisJob.batch_id == batch_id)
+            .group_by(AnalysisJob.status)
+            .all()
+        )
+        progress = {status: counts.get(status, 0)
+                    for status in (self.PENDING, self.RUNNING, self.DONE, self.FAILED)}
+        progress['total'] = sum(counts.values())
+        return progress
+
+    def batch_report(self, batch_id, include_jobs=False):
+        """
+        Report a batch's progress with throughput and an estimated time to completion.
+
+        Computed from the analysis_job table on every call, so every web worker sees
+        the same numbers no matter which process queued the batch.
+
+        Args:
+            batch_id (str): The batch to report on.
+            include_jobs (bool): Add the state of each submission in the batch.
+
+        Returns:
+            dict: Counts per status, current (finished jobs) and total, throughput in
+            submissions per minute, eta_seconds (None until a job has finished) and
+            the count and average Ollama latency of cold and warm jobs.
+        """
+        progress = self.batch_progress(batch_id)
+        first_started, last_finished = db.session.query(
+            db.func.min(AnalysisJob.started_at),
+            db.func.max(AnalysisJob.finished_at)
+        ).filter(AnalysisJob.batch_id == batch_id).one()
+
+        finished = progress[self.DONE] + progress[self.FAILED]
+        remaining = progress[self.PENDING] + progress[self.RUNNING]
+        in_progress = remaining > 0
+
+        throughput = None
+        eta_seconds = None
+        if first_started and finished:
+            end = datetime.utcnow() if in_progress else (last_finished or datetime.utcnow())
+            elapsed = max((end - first_started).total_seconds(), 1.0)
+            throughput = finished / elapsed * 60
+            eta_seconds = round(remaining / throughput * 60) if in_progress else 0
+
+        report = {
+            'in_progress': in_progress,
+            'batch_id': batch_id,
+            'current': finished,
+            'total': progress['total'],
+            'pending': progress[self.PENDING],
+            'running': progress[self.RUNNING],
+            'done': progress[self.DONE],
+            'failed': progress[self.FAILED],
+            'started_at': first_started.isoformat() if first_started else None,
+            'throughput_per_minute': round(throughput, 2) if throughput is not None else None,
+            'eta_seconds': eta_seconds,
+            'latency': self._latency_summary(batch_id)
+        }
+
+        if include_jobs:
+            rows = db.session.query(AnalysisJob, Submission.folder_name).join(
+                Submission, AnalysisJob.submission_id == Submission.id
+            ).filter(AnalysisJob.batch_id == batch_id).order_by(AnalysisJob.id).all()
+            report['jobs'] = [
+                {
+                    'submission_id': job.submission_id,
+                    'folder_name': folder_name,
+                    'status': job.status,
+                    'attempts': job.attempts,
+                    'error': job.error,
+                    'cache_hit': job.cache_hit,
+                    'cold_start': job.cold_start,
+                    'latency_ms': job.latency_ms,
+                    'started_at': job.started_at.isoformat() if job.started_at else None,
+                    'finished_at': job.finished_at.isoformat() if job.finished_at else None
+                }
+                for job, folder_name in rows
+            ]
+
+        return report
+
+    def _latency_summary(self, batch_id):
+        """Count and average Ollama latency of the batch's jobs that did and did not wait for a model load."""
+        rows = db.session.query(
+            AnalysisJob.cold_start,
+            db.func.count(AnalysisJob.id),
+            db.func.avg(AnalysisJob.latency_ms),
+            db.func.avg(AnalysisJob.load_ms)
+        ).filter(
+            AnalysisJob.batch_id == batch_id,
+            AnalysisJob.cold_start.isnot(None)
+        ).group_by(AnalysisJob.cold_start).all()
+
+        summary = {'cold': {'jobs': 0, 'avg_latency_ms': None, 'avg_load_ms': None},
+                   'warm': {'jobs': 0, 'avg_latency_ms': None, 'avg_load_ms': None}}
+        for cold_start, count, avg_latency, avg_load in rows:
+            summary['cold' if cold_start else 'warm'] = {
+                'jobs': count,
+                'avg_latency_ms': round(avg_latency) if avg_latency is not None else None,
+                'avg_load_ms': round(avg_load) if avg_load is not None else None
+            }
+        return summary
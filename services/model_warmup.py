@@ -0,0 +1,81 @@
+import os
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWarmer:
+    """
+    Keeps the Ollama model loaded for the length of a grading batch.
+
+    When a batch is queued the model is loaded on every host in the background,
+    with an explicit keep_alive window, so the first submission does not pay for
+    the cold load. Once the queue drains the model is unloaded, instead of holding
+    GPU memory until Ollama's own keep_alive runs out.
+    """
+
+    def __init__(self, ollama_client, keep_alive=None, enabled=None):
+        """
+        Initialize the warmer.
+
+        Args:
+            ollama_client (OllamaClient): Client whose hosts and model are managed.
+            keep_alive (str): How long a preloaded model stays loaded without requests.
+            enabled (bool): Preload and release the model at all.
+        """
+        if enabled is None:
+            enabled = os.environ.get("OLLAMA_WARMUP", "true").lower() in ("1", "true", "yes")
+        if keep_alive is None:
+            keep_alive = os.environ.get("OLLAMA_WARMUP_KEEP_ALIVE", ollama_client.keep_alive)
+        self.client = ollama_client
+        self.keep_alive = keep_alive
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def warm_up(self):
+        """
+        Load the model on every host in rotation and wait for it.
+
+        Returns:
+            dict: Load round trip in milliseconds per host URL (None where it failed).
+        """
+        if not self.enabled:
+            return {}
+        results = self.client.load_model(self.keep_alive)
+        for url, elapsed_ms in results.items():
+            if elapsed_ms is not None:
+                logger.info(f"Preloaded {self.client.model} on {url} in {elapsed_ms:.0f} ms "
+                            f"(keep_alive {self.keep_alive})")
+        return results
+
+    def warm_up_async(self):
+        """
+        Start loading the model in a background thread.
+
+        Does nothing if a warm-up is already running.
+
+        Returns:
+            threading.Thread: The warm-up thread, or None when disabled.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.warm_up, name="ollama-warmup", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def release(self):
+        """
+        Unload the model from every host in rotation (keep_alive 0).
+
+        Returns:
+            dict: Round trip in milliseconds per host URL (None where it failed).
+        """
+        if not self.enabled:
+            return {}
+        results = self.client.load_model(0)
+        logger.info(f"Released {self.client.model} on {len(results)} Ollama host(s)")
+        return results
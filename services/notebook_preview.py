@@ -0,0 +1,160 @@
+import os
+import html
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+
+class NotebookPreviewCache:
+    """
+    Renders stored notebook content as HTML and keeps the result on disk.
+
+    Rendered previews are keyed by notebook content hash, so every submission
+    with the same notebook shares one file and a notebook is rendered once no
+    matter how often reviewers open it. Reading a preview refreshes its
+    modification time; when the cache grows past max_bytes the least recently
+    used previews are deleted.
+    """
+
+    # Bump when the rendered markup changes so previews rendered the old way are not served
+    RENDER_VERSION = '1'
+
+    def __init__(self, cache_dir, max_bytes=None):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory the rendered previews are stored in.
+            max_bytes (int): Total size of previews kept before the oldest are evicted.
+        """
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("NOTEBOOK_PREVIEW_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def etag(self, content_hash):
+        """ETag of the preview of some notebook content; changes with RENDER_VERSION."""
+        return f"{content_hash}-v{self.RENDER_VERSION}"
+
+    def _path(self, content_hash):
+        return os.path.join(self.cache_dir, f"{self.etag(content_hash)}.html")
+
+    def get(self, content_hash, load_content):
+        """
+        Return the rendered preview of some notebook content, rendering it on a miss.
+
+        Args:
+            content_hash (str): Hash the content is stored under.
+            load_content (callable): Returns the notebook content; only called on a miss.
+
+        Returns:
+            str: HTML fragment with one block per cell.
+        """
+        path = self._path(content_hash)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                fragment = f.read()
+            # Mark as recently used for eviction
+            os.utime(path)
+            return fragment
+        except FileNotFoundError:
+            pass
+
+        fragment = self.render(load_content())
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write under a temporary name so concurrent readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(fragment)
+            os.replace(tmp_path, path)
+        except OSError:
+            os.remove(tmp_path)
+            raise
+        logger.debug(f"Rendered notebook preview {content_hash} ({len(fragment)} chars)")
+
+        self.evict()
+        return fragment
+
+    def evict(self):
+        """
+        Delete the least recently used previews until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of previews deleted.
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.html'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process evicted it first
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} notebook previews")
+        return removed
+
+    @staticmethod
+    def render(notebook_content):
+        """
+        Render notebook content as an HTML fragment.
+
+        Everything from the notebook is escaped; HTML outputs are shown as their
+        plain-text alternative so student markup never runs in the viewer.
+
+        Args:
+            notebook_content (dict): Content from NotebookProcessor.extract_notebook_content.
+
+        Returns:
+            str: The HTML fragment.
+        """
+        language = html.escape(notebook_content.get('metadata', {}).get('language_info') or 'python')
+        if language == 'unknown':
+            language = 'python'
+
+        parts = []
+        for cell in notebook_content.get('cells', []):
+            cell_type = cell.get('cell_type')
+            source = html.escape(cell.get('source', ''))
+            if cell_type == 'markdown':
+                parts.append(f'<div class="nb-cell nb-markdown">{source}</div>')
+                continue
+            if cell_type != 'code':
+                parts.append(f'<div class="nb-cell nb-raw"><pre>{source}</pre></div>')
+                continue
+
+            outputs = []
+            for output in cell.get('outputs', []):
+                output_type = output.get('output_type')
+                if output_type == 'stream':
+                    css = 'nb-stderr' if output.get('name') == 'stderr' else 'nb-stdout'
+                    outputs.append(f'<pre class="nb-output {css}">{html.escape(output.get("text", ""))}</pre>')
+                elif output_type in ('display_data', 'execute_result'):
+                    data = output.get('data', {})
+                    if 'text/plain' in data:
+                        outputs.append(f'<pre class="nb-output">{html.escape(data["text/plain"])}</pre>')
+                    else:
+                        kinds = ', '.join(html.escape(kind) for kind in data) or 'empty'
+                        outputs.append(f'<div class="nb-output nb-placeholder">[{kinds} output]</div>')
+                elif output_type == 'error':
+                    outputs.append('<div class="nb-output nb-placeholder">[error output]</div>')
+
+            parts.append(
+                f'<div class="nb-cell nb-code">'
+                f'<pre><code class="language-{language}">{source}</code></pre>{"".join(outputs)}</div>'
+            )
+        return '\n'.join(parts)
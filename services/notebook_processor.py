@@ -1,20 +1,82 @@
 import os
+import re
 import zipfile
 import json
 import nbformat
 import logging
 import shutil
+import posixpath
+from collections import defaultdict
+from concurrent.futures.process import BrokenProcessPool
+
+from services.process_pool import get_pool, discard_pool
 
 logger = logging.getLogger(__name__)
 
+# A non-text MIME type key with a string or list-of-strings value, e.g. "image/png": "iVBOR..."
+_BINARY_OUTPUT_PATTERN = re.compile(
+    rb'"((?!text/)[\w.+-]+/[\w.+-]+)"\s*:\s*'
+    rb'(?:"[^"\\]*(?:\\.[^"\\]*)*"|\[\s*(?:"[^"\\]*(?:\\.[^"\\]*)*"\s*,?\s*)*\])'
+)
+
+# Archive last opened by this parse worker process, and the file it was opened from
+_worker_zip = None
+_worker_zip_key = None
+
+
+def _open_worker_zip(zip_path):
+    """Return the archive at zip_path, reusing the open one while the file is unchanged."""
+    global _worker_zip, _worker_zip_key
+    stat = os.stat(zip_path)
+    key = (zip_path, stat.st_mtime_ns, stat.st_size)
+    if key != _worker_zip_key:
+        if _worker_zip is not None:
+            _worker_zip.close()
+            _worker_zip, _worker_zip_key = None, None
+        _worker_zip = zipfile.ZipFile(zip_path, 'r')
+        _worker_zip_key = key
+    return _worker_zip
+
+
+def _parse_notebook_member(zip_path, member_name, fast_parse):
+    """Parse one notebook from an archive (runs in a worker process)."""
+    processor = NotebookProcessor(parse_workers=1, fast_parse=fast_parse)
+    return processor.extract_notebook_content_from_zip(_open_worker_zip(zip_path), member_name)
+
+
 class NotebookProcessor:
     """
     Service for processing Jupyter notebook files from ZIP archives.
     """
     
+    def __init__(self, max_extract_size=None, parse_workers=None, fast_parse=None):
+        """
+        Initialize the processor.
+
+        Args:
+            max_extract_size (int): Largest non-notebook file, in bytes, extracted
+                during ingestion. Larger files are extracted on demand.
+            parse_workers (int): Processes used to parse notebooks; 1 parses serially.
+            fast_parse (bool): Load v4 notebooks as plain JSON, skipping nbformat
+                validation and base64 output payloads.
+        """
+        if max_extract_size is None:
+            max_extract_size = int(os.environ.get("MAX_EXTRACT_FILE_SIZE", 50 * 1024 * 1024))
+        if parse_workers is None:
+            parse_workers = int(os.environ.get("NOTEBOOK_PARSE_WORKERS", os.cpu_count() or 1))
+        if fast_parse is None:
+            fast_parse = os.environ.get("NOTEBOOK_FAST_PARSE", "true").lower() == "true"
+        self.max_extract_size = max_extract_size
+        self.parse_workers = max(1, parse_workers)
+        self.fast_parse = fast_parse
+
     def process_zip(self, zip_path, extract_dir):
         """
-        Extract a ZIP file and process any Jupyter notebooks found.
+        Process the Jupyter notebooks in a ZIP file without extracting the whole archive.
+
+        Notebooks are parsed directly from the archive. Other files are extracted
+        only if they are no larger than max_extract_size; the rest can be extracted
+        later with extract_member.
         
         Args:
             zip_path (str): Path to the ZIP file.
@@ -30,45 +92,177 @@ class NotebookProcessor:
             raise FileNotFoundError(f"ZIP file not found: {zip_path}")
         
         try:
-            # Extract the ZIP file
             with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            # Find all folders that contain notebook files
-            notebooks = []
-            
-            for root, dirs, files in os.walk(extract_dir):
-                ipynb_files = [f for f in files if f.endswith('.ipynb')]
-                
-                if not ipynb_files:
-                    continue
-                
-                # Process each notebook in the current directory
-                for ipynb_file in ipynb_files:
-                    full_path = os.path.join(root, ipynb_file)
-                    
-                    # Get relative folder path from extract directory
-                    rel_path = os.path.relpath(root, extract_dir)
-                    folder_name = rel_path if rel_path != '.' else ''
-                    
-                    # List all files in the directory
-                    all_files = os.listdir(root)
-                    
-                    # Extract notebook content
-                    notebook_content = self.extract_notebook_content(full_path)
-                    
+                # Group archive members by directory, skipping macOS resource forks
+                members_by_dir = defaultdict(list)
+                for member in zip_ref.infolist():
+                    if member.is_dir() or member.filename.startswith('__MACOSX/'):
+                        continue
+                    relative_path = self.safe_member_path(member.filename)
+                    if relative_path is None:
+                        logger.warning(f"Skipping archive member with an unsafe path: {member.filename!r}")
+                        continue
+                    members_by_dir[posixpath.dirname(relative_path)].append((relative_path, member))
+
+                entries = []
+                skipped = 0
+
+                for dir_name in sorted(members_by_dir):
+                    members = members_by_dir[dir_name]
+
+                    for relative_path, member in members:
+                        if relative_path.endswith('.ipynb'):
+                            continue
+                        if member.file_size <= self.max_extract_size:
+                            self._extract(zip_ref, member, relative_path, extract_dir)
+                        else:
+                            skipped += 1
+                            logger.debug(f"Deferring extraction of large file {member.filename} ({member.file_size} bytes)")
+
+                    folder_dir = os.path.join(extract_dir, *dir_name.split('/')) if dir_name else extract_dir
+                    files = {posixpath.basename(relative_path): member.filename for relative_path, member in members}
+
+                    for relative_path, member in members:
+                        if relative_path.endswith('.ipynb'):
+                            entries.append((dir_name, folder_dir, files, member))
+
+                # Parse the notebooks straight from the archive stream
+                contents = self._parse_notebooks(zip_path, zip_ref, [entry[3] for entry in entries])
+
+                notebooks = []
+                for (dir_name, folder_dir, files, member), notebook_content in zip(entries, contents):
+                    ipynb_file = posixpath.basename(self.safe_member_path(member.filename))
                     notebooks.append({
-                        'folder_name': folder_name or os.path.basename(ipynb_file),
-                        'files': all_files,
-                        'notebook_path': full_path,
+                        'folder_name': dir_name or ipynb_file,
+                        'notebook_file': ipynb_file,
+                        'files': list(files),
+                        'members': files,
+                        'folder_path': folder_dir,
+                        'notebook_path': os.path.join(folder_dir, ipynb_file),
                         'notebook_content': notebook_content
                     })
-            
+
+            if skipped:
+                logger.info(f"Deferred extraction of {skipped} files larger than {self.max_extract_size} bytes")
             return notebooks
         except Exception as e:
             logger.error(f"Error processing ZIP file: {str(e)}")
             raise Exception(f"Failed to process ZIP file: {str(e)}")
-    
+
+    def _parse_notebooks(self, zip_path, zip_ref, members):
+        """
+        Parse notebook archive members, in parallel when configured.
+
+        Results keep the order of members. A notebook that fails to parse, or whose
+        worker process dies, gets the usual error content without affecting the rest.
+
+        Args:
+            zip_path (str): Path to the ZIP file, opened by the worker processes.
+            zip_ref (zipfile.ZipFile): The open archive, used when parsing serially.
+            members (list): Notebook archive entries.
+
+        Returns:
+            list: Notebook content dictionaries, one per member.
+        """
+        if self.parse_workers <= 1 or len(members) <= 1:
+            return [self.extract_notebook_content_from_zip(zip_ref, member) for member in members]
+
+        logger.debug(f"Parsing {len(members)} notebooks with {self.parse_workers} processes")
+        pool = get_pool('notebook_parse', self.parse_workers)
+        contents = []
+        broken = False
+        try:
+            futures = [pool.submit(_parse_notebook_member, zip_path, member.filename, self.fast_parse)
+                       for member in members]
+        except BrokenProcessPool as e:
+            discard_pool('notebook_parse', pool)
+            logger.error(f"Notebook parse pool is broken, parsing serially: {str(e)}")
+            return [self.extract_notebook_content_from_zip(zip_ref, member) for member in members]
+
+        for member, future in zip(members, futures):
+            try:
+                contents.append(future.result())
+            except Exception as e:
+                broken = broken or isinstance(e, BrokenProcessPool)
+                logger.error(f"Error parsing notebook {member.filename}: {str(e)}")
+                contents.append(self._error_content(e))
+        if broken:
+            # A worker died; start fresh processes for the next upload
+            discard_pool('notebook_parse', pool)
+        return contents
+
+    def extract_member(self, zip_path, member_name, extract_dir):
+        """
+        Extract a single file from a submissions archive on demand.
+
+        Args:
+            zip_path (str): Path to the ZIP file.
+            member_name (str): Name of the file inside the archive.
+            extract_dir (str): Directory the archive is extracted into.
+
+        Returns:
+            str: Path of the extracted file.
+
+        Raises:
+            ValueError: If the member's path would leave extract_dir.
+        """
+        relative_path = self.safe_member_path(member_name)
+        if relative_path is None:
+            raise ValueError(f"Unsafe archive member path: {member_name!r}")
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            return self._extract(zip_ref, zip_ref.getinfo(member_name), relative_path, extract_dir)
+
+    @staticmethod
+    def safe_member_path(member_name):
+        """
+        Normalize an archive member name to a relative path that stays inside the extraction directory.
+
+        Follows ZipFile._extract_member: backslashes count as separators and empty
+        and '.' components are dropped. Unlike zipfile, names that are absolute,
+        carry a drive letter or contain '..' are rejected rather than rewritten,
+        so a crafted name can't be mistaken for another student's file.
+
+        Args:
+            member_name (str): Name of the file inside the archive.
+
+        Returns:
+            str: The '/'-separated relative path, or None if the name is unsafe.
+        """
+        name = member_name.replace('\\', '/')
+        if name.startswith('/') or re.match(r'[A-Za-z]:', name):
+            return None
+        parts = [part for part in name.split('/') if part not in ('', '.')]
+        if not parts or '..' in parts:
+            return None
+        return '/'.join(parts)
+
+    @staticmethod
+    def _extract(zip_ref, member, relative_path, extract_dir):
+        """Write one archive member to extract_dir/relative_path and return that path."""
+        target = os.path.join(extract_dir, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with zip_ref.open(member) as source, open(target, 'wb') as destination:
+            shutil.copyfileobj(source, destination)
+        return target
+
+    def extract_notebook_content_from_zip(self, zip_ref, member):
+        """
+        Extract content from a Jupyter notebook stored in an open ZIP archive.
+
+        Args:
+            zip_ref (zipfile.ZipFile): The open archive.
+            member (zipfile.ZipInfo or str): The notebook's archive entry or name.
+
+        Returns:
+            dict: Dictionary containing notebook cells and metadata.
+        """
+        try:
+            with zip_ref.open(member) as raw:
+                return self._extract_from_bytes(raw.read())
+        except Exception as e:
+            logger.error(f"Error extracting content from notebook: {str(e)}")
+            return self._error_content(e)
+
     def extract_notebook_content(self, notebook_path):
         """
         Extract content from a Jupyter notebook file.
@@ -83,57 +277,120 @@ class NotebookProcessor:
             Exception: If there's an error processing the notebook.
         """
         try:
-            # Read the notebook
-            with open(notebook_path, 'r', encoding='utf-8') as f:
-                notebook = nbformat.read(f, as_version=4)
-            
-            # Extract cells
-            cells = []
-            for cell in notebook.cells:
-                cell_content = {
-                    'cell_type': cell.cell_type,
-                    'source': cell.source,
-                }
-                
-                # If it's a code cell, include outputs
-                if cell.cell_type == 'code' and hasattr(cell, 'outputs'):
-                    outputs = []
-                    for output in cell.outputs:
-                        output_data = {'output_type': output.output_type}
-                        
-                        if output.output_type == 'stream':
-                            output_data['text'] = output.get('text', '')
-                            output_data['name'] = output.get('name', '')
-                        elif output.output_type in ['display_data', 'execute_result']:
-                            # Handle different data formats (text, images, etc.)
-                            data = {}
-                            for data_type, content in output.get('data', {}).items():
-                                if data_type.startswith('text/'):
-                                    data[data_type] = content
-                                else:
-                                    # Just note that there was binary data
-                                    data[data_type] = "[binary data]"
-                            output_data['data'] = data
-                        
-                        outputs.append(output_data)
-                    
-                    cell_content['outputs'] = outputs
-                
-                cells.append(cell_content)
-            
-            # Extract metadata
-            metadata = {
-                'kernel_spec': notebook.metadata.get('kernelspec', {}).get('name', 'unknown'),
-                'language_info': notebook.metadata.get('language_info', {}).get('name', 'unknown'),
-            }
-            
-            return {
-                'cells': cells,
-                'metadata': metadata
-            }
+            with open(notebook_path, 'rb') as f:
+                return self._extract_from_bytes(f.read())
         except Exception as e:
             logger.error(f"Error extracting content from notebook: {str(e)}")
-            return {
-                'cells': [{'cell_type': 'markdown', 'source': f'Error processing notebook: {str(e)}'}],
-                'metadata': {'error': str(e)}
+            return self._error_content(e)
+
+    def _extract_from_bytes(self, raw):
+        """
+        Extract cells and metadata from the raw bytes of a notebook.
+
+        Args:
+            raw (bytes): The .ipynb file contents.
+
+        Returns:
+            dict: Dictionary containing notebook cells and metadata.
+        """
+        if self.fast_parse:
+            notebook = self._fast_load(raw)
+            if notebook is not None:
+                return self._summarize(notebook)
+        return self._summarize(nbformat.reads(raw.decode('utf-8'), as_version=4))
+
+    @staticmethod
+    def _fast_load(raw):
+        """
+        Load a v4 notebook as plain JSON, without nbformat and its schema validation.
+
+        Values of non-text MIME types in output data (base64 images, PDFs and the
+        like) are replaced in the raw bytes before decoding, so those strings are
+        never built. Cell ids and other fields nbformat would normalize are left as
+        they are; only the fields read by _summarize matter.
+
+        Args:
+            raw (bytes): The .ipynb file contents.
+
+        Returns:
+            dict: The decoded notebook, or None if it is not nbformat 4 and must go
+            through nbformat's converters.
+
+        Raises:
+            ValueError: If the file is not valid JSON.
+        """
+        notebook = json.loads(_BINARY_OUTPUT_PATTERN.sub(rb'"\1": "[binary data]"', raw))
+        if not isinstance(notebook, dict) or notebook.get('nbformat') != 4:
+            return None
+        return notebook
+
+    def _summarize(self, notebook):
+        """
+        Reduce a loaded notebook to the cells, outputs and metadata used for grading.
+
+        Args:
+            notebook (dict): Notebook from nbformat or _fast_load.
+
+        Returns:
+            dict: Dictionary containing notebook cells and metadata.
+        """
+        # Extract cells
+        cells = []
+        for cell in notebook.get('cells', []):
+            cell_content = {
+                'cell_type': cell.get('cell_type'),
+                'source': self._join(cell.get('source', '')),
             }
+
+            # If it's a code cell, include outputs
+            if cell.get('cell_type') == 'code' and 'outputs' in cell:
+                outputs = []
+                for output in cell['outputs']:
+                    output_data = {'output_type': output.get('output_type')}
+
+                    if output_data['output_type'] == 'stream':
+                        output_data['text'] = self._join(output.get('text', ''))
+                        output_data['name'] = output.get('name', '')
+                    elif output_data['output_type'] in ['display_data', 'execute_result']:
+                        # Handle different data formats (text, images, etc.)
+                        data = {}
+                        for data_type, content in output.get('data', {}).items():
+                            if data_type.startswith('text/'):
+                                data[data_type] = self._join(content)
+                            else:
+                                # Just note that there was binary data
+                                data[data_type] = "[binary data]"
+                        output_data['data'] = data
+
+                    outputs.append(output_data)
+
+                cell_content['outputs'] = outputs
+
+            cells.append(cell_content)
+
+        # Extract metadata
+        notebook_metadata = notebook.get('metadata', {})
+        metadata = {
+            'kernel_spec': notebook_metadata.get('kernelspec', {}).get('name', 'unknown'),
+            'language_info': notebook_metadata.get('language_info', {}).get('name', 'unknown'),
+        }
+
+        return {
+            'cells': cells,
+            'metadata': metadata
+        }
+
+    @staticmethod
+    def _join(value):
+        """Join multi-line notebook strings, which may be stored as lists of lines."""
+        if isinstance(value, list):
+            return ''.join(value)
+        return value
+
+    @staticmethod
+    def _error_content(error):
+        """Placeholder content for a notebook that could not be read."""
+        return {
+            'cells': [{'cell_type': 'markdown', 'source': f'Error processing notebook: {str(error)}'}],
+            'metadata': {'error': str(error)}
+        }
@@ -0,0 +1,235 @@
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Word pieces and individual punctuation marks, roughly how BPE tokenizers split text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """
+    Estimate how many tokens a model will see for some text, without a tokenizer.
+
+    Counts words (long words as several pieces) and punctuation marks, which tracks
+    common BPE tokenizers closely enough for budgeting prompts.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PATTERN.findall(text))
+
+
+class NotebookRenderer:
+    """
+    Service for rendering extracted notebook content as compact prompt text.
+
+    Works on the cell structure produced by NotebookProcessor.extract_notebook_content
+    and emits one marker line per cell followed by its raw source, instead of
+    indented JSON with escaped newlines.
+    """
+
+    def __init__(self, max_output_chars=None):
+        """
+        Initialize the renderer.
+
+        Args:
+            max_output_chars (int): Longest text kept per cell output before truncating.
+        """
+        if max_output_chars is None:
+            max_output_chars = int(os.environ.get("NOTEBOOK_PROMPT_MAX_OUTPUT_CHARS", 1000))
+        self.max_output_chars = max_output_chars
+
+    def render(self, notebook_content):
+        """
+        Render a notebook as compact prompt text.
+
+        Args:
+            notebook_content (dict): Notebook content from extract_notebook_content.
+
+        Returns:
+            dict: The rendered text with its size in characters, estimated tokens and
+            number of outputs that were truncated.
+        """
+        notebook_content = notebook_content or {}
+        blocks = []
+        truncated = 0
+
+        metadata = notebook_content.get('metadata', {})
+        if metadata.get('language_info') not in (None, 'unknown'):
+            blocks.append(f"Notebook language: {metadata['language_info']}")
+
+        for index, cell in enumerate(notebook_content.get('cells', []), start=1):
+            text, cell_truncated = self.render_cell(index, cell)
+            blocks.append(text)
+            truncated += cell_truncated
+
+        text = "\n\n".join(blocks)
+        return {
+            'text': text,
+            'chars': len(text),
+            'estimated_tokens': estimate_tokens(text),
+            'truncated_outputs': truncated
+        }
+
+    def render_chunks(self, notebook_content, max_tokens):
+        """
+        Render a notebook as a sequence of chunks that each fit a token budget.
+
+        Cells are kept whole and in order where possible; a single cell larger than
+        the budget is split on line boundaries.
+
+        Args:
+            notebook_content (dict): Notebook content from extract_notebook_content.
+            max_tokens (int): Estimated token budget per chunk.
+
+        Returns:
+            list: Dictionaries with the chunk text, the first and last cell numbers it
+            covers and its estimated token count.
+        """
+        max_tokens = max(1, max_tokens)
+        chunks = []
+        current = []
+        current_tokens = 0
+        first_cell = None
+        last_cell = None
+
+        def flush():
+            if current:
+                chunks.append({
+                    'text': "\n\n".join(current),
+                    'first_cell': first_cell,
+                    'last_cell': last_cell,
+                    'estimated_tokens': current_tokens
+                })
+
+        cells = (notebook_content or {}).get('cells', [])
+        for index, cell in enumerate(cells, start=1):
+            text, _ = self.render_cell(index, cell)
+            tokens = estimate_tokens(text)
+            pieces = [(text, tokens)] if tokens <= max_tokens else self._split_text(text, max_tokens)
+
+            for piece, piece_tokens in pieces:
+                if current and current_tokens + piece_tokens > max_tokens:
+                    flush()
+                    current, current_tokens, first_cell = [], 0, None
+                current.append(piece)
+                current_tokens += piece_tokens
+                if first_cell is None:
+                    first_cell = index
+                last_cell = index
+
+        flush()
+        return chunks
+
+    @staticmethod
+    def _split_text(text, max_tokens):
+        """
+        Split text that exceeds the budget into line-aligned pieces.
+
+        Args:
+            text (str): Rendered cell text.
+            max_tokens (int): Estimated token budget per piece.
+
+        Returns:
+            list: (piece, estimated_tokens) tuples.
+        """
+        pieces = []
+        lines = []
+        tokens = 0
+        for line in text.split("\n"):
+            line_tokens = estimate_tokens(line)
+            # A single enormous line (e.g. minified data) is cut by characters
+            while line_tokens > max_tokens:
+                cut = max(1, len(line) * max_tokens // line_tokens)
+                # Token density varies along the line, so shrink the cut until the piece fits
+                cut_tokens = estimate_tokens(line[:cut])
+                while cut > 1 and cut_tokens > max_tokens:
+                    cut = max(1, cut * max_tokens // cut_tokens)
+                    cut_tokens = estimate_tokens(line[:cut])
+                if lines:
+                    pieces.append(("\n".join(lines), tokens))
+                    lines, tokens = [], 0
+                pieces.append((line[:cut], cut_tokens))
+                line = line[cut:]
+                line_tokens = estimate_tokens(line)
+            if lines and tokens + line_tokens > max_tokens:
+                pieces.append(("\n".join(lines), tokens))
+                lines, tokens = [], 0
+            lines.append(line)
+            tokens += line_tokens
+        if lines:
+            pieces.append(("\n".join(lines), tokens))
+        return pieces
+
+    def render_cell(self, index, cell):
+        """
+        Render a single cell with its outputs.
+
+        Args:
+            index (int): 1-based position of the cell in the notebook.
+            cell (dict): Cell from extract_notebook_content.
+
+        Returns:
+            tuple: The rendered text and the number of truncated outputs.
+        """
+        lines = [f"[cell {index}: {cell.get('cell_type', 'unknown')}]", self._join(cell.get('source', '')).rstrip()]
+        truncated = 0
+
+        for output in cell.get('outputs', []):
+            output_text, was_truncated = self.render_output(output)
+            if output_text:
+                lines.append(output_text)
+            truncated += was_truncated
+
+        return "\n".join(line for line in lines if line), truncated
+
+    def render_output(self, output):
+        """
+        Render a single code cell output, truncating long text.
+
+        Args:
+            output (dict): Output from extract_notebook_content.
+
+        Returns:
+            tuple: The rendered text and whether it was truncated.
+        """
+        output_type = output.get('output_type', 'unknown')
+
+        if output_type == 'stream':
+            label = f"[output: {output.get('name') or 'stream'}]"
+            body = self._join(output.get('text', ''))
+        elif output_type in ('display_data', 'execute_result'):
+            data = output.get('data', {})
+            text_types = [key for key in data if key.startswith('text/')]
+            other_types = [key for key in data if not key.startswith('text/')]
+            # text/plain is the most compact representation; fall back to any other text type
+            preferred = 'text/plain' if 'text/plain' in data else (text_types[0] if text_types else None)
+            label = f"[output: {preferred or output_type}]"
+            body = self._join(data[preferred]) if preferred else ''
+            if other_types:
+                body = (body + "\n" if body else '') + f"[{', '.join(other_types)} omitted]"
+        else:
+            return f"[output: {output_type}]", False
+
+        body = body.rstrip()
+        if not body:
+            return '', False
+
+        was_truncated = len(body) > self.max_output_chars
+        if was_truncated:
+            omitted = len(body) - self.max_output_chars
+            body = body[:self.max_output_chars] + f"\n... [{omitted} more characters truncated]"
+
+        return f"{label}\n{body}", was_truncated
+
+    @staticmethod
+    def _join(value):
+        """Join multi-line notebook strings, which may be stored as lists of lines."""
+        if isinstance(value, list):
+            return ''.join(value)
+        return value or ''
@@ -0,0 +1,212 @@
+import os
+import json
+import zlib
+import hashlib
+import logging
+
+from sqlalchemy import func, insert, null
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import undefer
+
+from models import db, Submission, NotebookContent
+
+logger = logging.getLogger(__name__)
+
+
+class NotebookStore:
+    """
+    Service that stores extracted notebook content out of the submission row.
+
+    Content is serialized as canonical JSON, compressed with zlib and keyed by the
+    SHA-256 of the JSON, so identical resubmissions share one row. Submissions
+    reference it by content_hash and decompress it only when it is read.
+    """
+
+    ENCODING = 'zlib'
+
+    def __init__(self, compression_level=None):
+        """
+        Initialize the store.
+
+        Args:
+            compression_level (int): zlib level from 1 (fastest) to 9 (smallest).
+        """
+        if compression_level is None:
+            compression_level = int(os.environ.get("NOTEBOOK_CONTENT_COMPRESSION_LEVEL", 6))
+        self.compression_level = compression_level
+
+    @staticmethod
+    def serialize(content):
+        """
+        Serialize notebook content to canonical JSON bytes.
+
+        Args:
+            content (dict): Extracted notebook content.
+
+        Returns:
+            bytes: The JSON, with sorted keys and no insignificant whitespace.
+        """
+        return json.dumps(content, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    @classmethod
+    def make_hash(cls, content):
+        """
+        Compute the key under which notebook content is stored.
+
+        Args:
+            content (dict): Extracted notebook content.
+
+        Returns:
+            str: Hex SHA-256 digest of the canonical JSON.
+        """
+        return hashlib.sha256(cls.serialize(content)).hexdigest()
+
+    def put_many(self, contents):
+        """
+        Store notebook contents, skipping any that are already stored.
+
+        Adds to the current session; the caller commits.
+
+        Args:
+            contents (list): Extracted notebook content dictionaries.
+
+        Returns:
+            list: The content hash of each item, in order.
+        """
+        hashes = []
+        new_rows = {}
+        for content in contents:
+            raw = self.serialize(content)
+            content_hash = hashlib.sha256(raw).hexdigest()
+            hashes.append(content_hash)
+            if content_hash not in new_rows:
+                new_rows[content_hash] = raw
+
+        if new_rows:
+            existing = set(db.session.scalars(
+                db.select(NotebookContent.content_hash).where(NotebookContent.content_hash.in_(list(new_rows)))
+            ))
+            rows = []
+            for content_hash, raw in new_rows.items():
+                if content_hash in existing:
+                    continue
+                data = zlib.compress(raw, self.compression_level)
+                rows.append({
+                    'content_hash': content_hash,
+                    'encoding': self.ENCODING,
+                    'data': data,
+                    'raw_size': len(raw),
+                    'stored_size': len(data)
+                })
+            if rows:
+                db.session.execute(self._insert_ignoring_duplicates(), rows)
+            logger.debug(f"Stored {len(rows)} new notebook contents, {len(contents) - len(rows)} already present")
+
+        return hashes
+
+    def put(self, content):
+        """
+        Store one notebook's content.
+
+        Args:
+            content (dict): Extracted notebook content.
+
+        Returns:
+            str: Its content hash.
+        """
+        return self.put_many([content])[0]
+
+    @staticmethod
+    def _insert_ignoring_duplicates():
+        """INSERT that tolerates a concurrent upload storing the same content first."""
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            return postgresql.insert(NotebookContent).on_conflict_do_nothing()
+        if dialect == 'sqlite':
+            return sqlite.insert(NotebookContent).on_conflict_do_nothing()
+        return insert(NotebookContent)
+
+    def prune(self, content_hashes=None):
+        """
+        Delete stored content no submission references any more.
+
+        Args:
+            content_hashes (list): Only consider these hashes, e.g. those of just-deleted
+                submissions. By default the whole table is checked.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        referenced = db.select(Submission.content_hash).where(Submission.content_hash.isnot(None))
+        query = NotebookContent.query.filter(NotebookContent.content_hash.not_in(referenced))
+        if content_hashes is not None:
+            query = query.filter(NotebookContent.content_hash.in_(content_hashes))
+        removed = query.delete(synchronize_session=False)
+        db.session.commit()
+        if removed:
+            logger.info(f"Pruned {removed} unreferenced notebook contents")
+        return removed
+
+    def backfill(self, batch_size=200):
+        """
+        Move notebook content still held in submission rows into the content table.
+
+        Works in batches, committing after each, so it can be interrupted and rerun.
+
+        Args:
+            batch_size (int): Submissions converted per transaction.
+
+        Returns:
+            int: Number of submissions converted.
+        """
+        converted = 0
+        while True:
+            batch = Submission.query.options(undefer(Submission.legacy_notebook_content)).filter(
+                Submission.content_hash.is_(None),
+                Submission.legacy_notebook_content.isnot(None)
+            ).order_by(Submission.id).limit(batch_size).all()
+            if not batch:
+                return converted
+
+            hashes = self.put_many([submission.legacy_notebook_content for submission in batch])
+            for submission, content_hash in zip(batch, hashes):
+                submission.content_hash = content_hash
+                # SQL NULL rather than a JSON null, so the row no longer counts as legacy
+                submission.legacy_notebook_content = null()
+            db.session.commit()
+            converted += len(batch)
+            logger.info(f"Moved notebook content of {converted} submissions")
+
+    def stats(self):
+        """
+        Report how much space notebook content takes and what storing it this way saves.
+
+        Returns:
+            dict: Submission and content row counts; logical_bytes, the canonical JSON
+            of every submission's notebook as if stored per row; unique_bytes after
+            deduplication; stored_bytes after compression; and the saved fraction.
+        """
+        submissions, legacy = db.session.query(
+            func.count(Submission.id),
+            func.count(Submission.legacy_notebook_content)
+        ).one()
+        unique, unique_bytes, stored_bytes = db.session.query(
+            func.count(NotebookContent.content_hash),
+            func.coalesce(func.sum(NotebookContent.raw_size), 0),
+            func.coalesce(func.sum(NotebookContent.stored_size), 0)
+        ).one()
+        referencing, logical_bytes = db.session.query(
+            func.count(Submission.id),
+            func.coalesce(func.sum(NotebookContent.raw_size), 0)
+        ).join(NotebookContent, Submission.content_hash == NotebookContent.content_hash).one()
+
+        return {
+            'submissions': submissions,
+            'submissions_with_content': referencing,
+            'submissions_with_legacy_content': legacy,
+            'unique_contents': unique,
+            'logical_bytes': logical_bytes,
+            'unique_bytes': unique_bytes,
+            'stored_bytes': stored_bytes,
+            'saved_fraction': 1 - stored_bytes / logical_bytes if logical_bytes else 0.0
+        }
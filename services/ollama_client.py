@@ -3,29 +3,467 @@ import json
 import logging
 import os
 import time
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+from services.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
+# Collects the timings of requests made in the current context; set by OllamaClient.measure()
+_request_timings = contextvars.ContextVar('ollama_request_timings', default=None)
+
+
+class OllamaError(Exception):
+    """Ollama rejected a request or failed part-way through a response."""
+
+
+class OllamaUnavailableError(OllamaError):
+    """Ollama could not be reached, timed out or kept failing after every retry."""
+
+
+class CircuitOpenError(OllamaUnavailableError):
+    """Ollama has failed repeatedly and calls are refused until the circuit resets."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RequestTimings:
+    """
+    Latency of the Ollama requests made inside OllamaClient.measure().
+
+    A request counts as cold when Ollama reports spending at least
+    cold_threshold_ms loading the model before answering it.
+    """
+
+    def __init__(self, cold_threshold_ms):
+        self.cold_threshold_ms = cold_threshold_ms
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def record(self, url, latency_ms, load_ms):
+        """
+        Record one completed request.
+
+        Args:
+            url (str): Host that served it.
+            latency_ms (float): Round trip, from sending the request to the last byte.
+            load_ms (float): Model load time reported by Ollama, or None if not reported.
+        """
+        cold = load_ms is not None and load_ms >= self.cold_threshold_ms
+        with self._lock:
+            self.requests.append({'url': url, 'latency_ms': latency_ms, 'load_ms': load_ms, 'cold': cold})
+
+    @property
+    def cold_start(self):
+        """Whether any request waited for the model to load (None if none were made)."""
+        return any(r['cold'] for r in self.requests) if self.requests else None
+
+    @property
+    def load_ms(self):
+        """Total model load time across the requests (None if none were made)."""
+        return round(sum(r['load_ms'] or 0 for r in self.requests)) if self.requests else None
+
+
+class OllamaBackend:
+    """
+    One Ollama host, with the number of requests currently sent to it and a
+    circuit breaker that takes it out of rotation while it keeps failing.
+    """
+
+    def __init__(self, url, max_concurrency, failure_threshold, reset_timeout):
+        """
+        Initialize the backend.
+
+        Args:
+            url (str): Base URL of the host, e.g. "http://gpu1:11434".
+            max_concurrency (int): Requests the host serves at once (its OLLAMA_NUM_PARALLEL).
+            failure_threshold (int): Consecutive failures that take the host out of rotation.
+            reset_timeout (float): Seconds before a failed host is health-checked again.
+        """
+        self.url = url
+        self.max_concurrency = max_concurrency
+        self.outstanding = 0
+        self.circuit = CircuitBreaker(f"ollama {url}", failure_threshold, reset_timeout)
+
+    @property
+    def healthy(self):
+        """Whether the host is in rotation."""
+        return self.circuit.state == CircuitBreaker.CLOSED
+
+    @property
+    def has_capacity(self):
+        return self.outstanding < self.max_concurrency
+
+    @property
+    def load(self):
+        """Fraction of the host's request slots in use."""
+        return self.outstanding / self.max_concurrency
+
 
 class OllamaClient:
     """
     Client for interacting with the Ollama API to analyze notebooks.
+
+    Requests are spread over one or more Ollama hosts: each goes to the healthy
+    host with the fewest requests outstanding relative to its slots. A host that
+    keeps failing is taken out of rotation and re-admitted once a health check
+    against /api/tags succeeds.
     """
 
+    # Errors worth retrying: the server is overloaded, restarting or briefly unreachable
+    RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
     def __init__(self):
         """Initialize the Ollama client with default settings."""
-        # Remove any whitespace from the URL in case there's a leading space in .env
-        api_url = os.environ.get("OLLAMA_API_URL", "http://localhost:11434")
-        self.base_url = api_url.strip()
         self.model = os.environ.get("OLLAMA_MODEL", "gemma3")
-        self.max_retries = 3
-        self.retry_delay = 2  # seconds
 
-        # Log the API URL being used (without exposing sensitive information)
+        # Attempts per request, with exponential backoff and full jitter between them
+        self.max_retries = max(1, int(os.environ.get("OLLAMA_MAX_RETRIES", 3)))
+        self.retry_base_delay = float(os.environ.get("OLLAMA_RETRY_BASE_DELAY", 1.0))
+        self.retry_max_delay = float(os.environ.get("OLLAMA_RETRY_MAX_DELAY", 30.0))
+        # The read timeout bounds the wait for each piece of the response, not the whole generation
+        self.timeout = (
+            float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", 5)),
+            float(os.environ.get("OLLAMA_READ_TIMEOUT", 300))
+        )
+        # Health checks only list models, so they get the connect timeout for both phases
+        self.health_timeout = float(os.environ.get("OLLAMA_HEALTH_TIMEOUT", self.timeout[0]))
+        self.circuit_failures = int(os.environ.get("OLLAMA_CIRCUIT_FAILURES", 5))
+        self.circuit_reset_seconds = float(os.environ.get("OLLAMA_CIRCUIT_RESET_SECONDS", 30))
+
+        # Context window requested from Ollama; its small default silently truncates long prompts
+        self.num_ctx = int(os.environ.get("OLLAMA_NUM_CTX", 8192))
+        # How long Ollama keeps the model (and its prompt KV cache) loaded after a request
+        self.keep_alive = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+        # Reported load times at or above this mark a request as a cold start
+        self.cold_threshold_ms = float(os.environ.get("OLLAMA_COLD_LOAD_MS", 500))
+
+        # Match Ollama's OLLAMA_NUM_PARALLEL so we never queue more requests on a host than it serves at once
+        self.parallel_per_host = max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", 4)))
+        # Guards the backends' outstanding counts; waited on when every healthy host is busy
+        self._capacity = threading.Condition()
+        self.session = requests.Session()
+
+        # OLLAMA_API_URLS lists several hosts; OLLAMA_API_URL is the single-host setting.
+        # Remove any whitespace from the URLs in case there's a leading space in .env
+        api_urls = os.environ.get("OLLAMA_API_URLS") or os.environ.get("OLLAMA_API_URL", "http://localhost:11434")
+        self.base_urls = [url.strip() for url in api_urls.split(",") if url.strip()]
+
+        # Log the API URLs being used (without exposing sensitive information)
         logger.info(
-            f"Ollama API configured with base URL: {self.base_url} and model: {self.model}"
+            f"Ollama API configured with base URLs: {', '.join(self.base_urls)} and model: {self.model}"
         )
 
+    @property
+    def base_urls(self):
+        """Base URLs of the Ollama hosts requests are spread over."""
+        return [backend.url for backend in self.backends]
+
+    @base_urls.setter
+    def base_urls(self, urls):
+        if not urls:
+            raise ValueError("At least one Ollama URL is required")
+        self.backends = [
+            OllamaBackend(url, self.parallel_per_host, self.circuit_failures, self.circuit_reset_seconds)
+            for url in urls
+        ]
+        # Persistent keep-alive connections, one per concurrent request slot on each host
+        adapter = HTTPAdapter(pool_connections=len(self.backends), pool_maxsize=self.parallel_per_host)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @property
+    def base_url(self):
+        """Base URL of the first Ollama host."""
+        return self.backends[0].url
+
+    @base_url.setter
+    def base_url(self, url):
+        self.base_urls = [url]
+
+    @property
+    def max_concurrency(self):
+        """Requests that can be in flight at once across every host."""
+        return sum(backend.max_concurrency for backend in self.backends)
+
+    def _options(self, temperature, max_tokens):
+        """Build the Ollama model options for a generation request."""
+        return {
+            "temperature": temperature,
+            "num_predict": max_tokens,
+            "num_ctx": self.num_ctx
+        }
+
+    def _backoff_delay(self, attempt):
+        """Seconds to wait before retry number attempt + 1: full jitter over an exponential cap."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    def _is_retryable(self, error):
+        """Whether a failed request may succeed if sent again."""
+        if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+            return error.response.status_code in self.RETRYABLE_STATUS_CODES
+        return isinstance(error, requests.exceptions.RequestException)
+
+    @contextmanager
+    def measure(self):
+        """
+        Record the timings of every request made inside the block, including those
+        generate_many sends from its pool threads.
+
+        Yields:
+            RequestTimings: Filled in as requests complete.
+        """
+        timings = RequestTimings(self.cold_threshold_ms)
+        token = _request_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            _request_timings.reset(token)
+
+    def _record_timing(self, backend, started, result):
+        """Log a completed request's latency and add it to the active measure() block, if any."""
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        # Ollama reports durations in nanoseconds
+        load_ms = result.get('load_duration') / 1e6 if result.get('load_duration') is not None else None
+        logger.debug(f"Ollama at {backend.url} answered in {latency_ms} ms (model load: {load_ms} ms)")
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.record(backend.url, latency_ms, load_ms)
+
+    def _check_backend(self, backend):
+        """
+        Health-check one host by listing its models.
+
+        Success puts the host back in rotation; failure counts against it.
+
+        Returns:
+            bool: True if the host answered.
+        """
+        try:
+            response = self.session.get(f"{backend.url}/api/tags", timeout=self.health_timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Health check of Ollama at {backend.url} failed: {str(e)}")
+            backend.circuit.record_failure()
+            return False
+        backend.circuit.record_success()
+        return True
+
+    def _readmit_backends(self):
+        """Health-check hosts that have been out of rotation for their reset timeout."""
+        for backend in self.backends:
+            # allow() lets exactly one caller run the check for a half-open host
+            if backend.circuit.state == CircuitBreaker.HALF_OPEN and backend.circuit.allow():
+                if self._check_backend(backend):
+                    logger.info(f"Ollama at {backend.url} passed its health check; back in rotation")
+
+    def _acquire_backend(self, avoid=None):
+        """
+        Reserve a request slot on the healthy host with the fewest requests outstanding.
+
+        Waits while every healthy host is busy.
+
+        Args:
+            avoid (OllamaBackend): Host whose last attempt failed; used only if no other has room.
+
+        Returns:
+            OllamaBackend: The host to send the request to; release it with _release_backend.
+
+        Raises:
+            CircuitOpenError: If every host is out of rotation.
+        """
+        self._readmit_backends()
+        with self._capacity:
+            while True:
+                healthy = [backend for backend in self.backends if backend.healthy]
+                if not healthy:
+                    retry_after = min(backend.circuit.retry_after() for backend in self.backends)
+                    raise CircuitOpenError(
+                        f"Every Ollama host is failing; not sending requests for {retry_after:.0f}s",
+                        retry_after)
+
+                free = [backend for backend in healthy if backend.has_capacity]
+                preferred = [backend for backend in free if backend is not avoid] or free
+                if preferred:
+                    backend = min(preferred, key=lambda b: b.load)
+                    backend.outstanding += 1
+                    return backend
+                # Woken when a request finishes; the timeout re-checks hosts leaving rotation
+                self._capacity.wait(timeout=1.0)
+
+    def _release_backend(self, backend):
+        """Return a request slot reserved by _acquire_backend."""
+        with self._capacity:
+            backend.outstanding -= 1
+            self._capacity.notify_all()
+
+    def _record_failure(self, backend, attempt, error):
+        """
+        Record a failed attempt against its host and wait before the next one.
+
+        Raises:
+            OllamaError: If the error is not worth retrying.
+            OllamaUnavailableError: If this was the last attempt.
+        """
+        logger.warning(f"Attempt {attempt + 1} on {backend.url} failed: {str(error)}")
+        if not self._is_retryable(error):
+            # Ollama answered, so it is up; the request itself was bad
+            backend.circuit.record_success()
+            raise OllamaError(f"Ollama rejected the request: {str(error)}") from error
+
+        backend.circuit.record_failure()
+        if attempt >= self.max_retries - 1:
+            logger.error(f"Ollama request failed after {self.max_retries} attempts: {str(error)}")
+            raise OllamaUnavailableError(
+                f"Ollama request failed after {self.max_retries} attempts: {str(error)}") from error
+
+        delay = self._backoff_delay(attempt)
+        logger.debug(f"Retrying in {delay:.1f} seconds...")
+        time.sleep(delay)
+
+    def _post(self, path, payload, extract):
+        """
+        POST a non-streaming request to Ollama with retries.
+
+        Args:
+            path (str): API path, e.g. "/api/generate".
+            payload (dict): JSON request body.
+            extract (callable): Pulls the generated text out of the response JSON.
+
+        Returns:
+            str: Generated text.
+
+        Raises:
+            OllamaError: If Ollama rejected the request.
+            OllamaUnavailableError: If every attempt failed or the circuit is open.
+        """
+        logger.debug(f"Sending request to Ollama {path} using model: {self.model}")
+
+        failed = None
+        for attempt in range(self.max_retries):
+            backend = self._acquire_backend(avoid=failed)
+            try:
+                logger.debug(f"Attempt {attempt + 1} to connect to Ollama at {backend.url}")
+                started = time.perf_counter()
+                try:
+                    response = self.session.post(f"{backend.url}{path}", json=payload, timeout=self.timeout)
+                finally:
+                    self._release_backend(backend)
+                
+                if response.status_code != 200:
+                    logger.warning(f"Ollama returned status code {response.status_code}")
+                    logger.warning(f"Response: {response.text[:200]}...")
+                    
+                response.raise_for_status()
+
+                result = response.json()
+                backend.circuit.record_success()
+                self._record_timing(backend, started, result)
+                logger.debug("Successfully received response from Ollama")
+                return extract(result)
+            except requests.exceptions.RequestException as e:
+                failed = backend
+                self._record_failure(backend, attempt, e)
+
+    def _post_stream(self, path, payload, extract):
+        """
+        POST a streaming request to Ollama, decoding the NDJSON response as it arrives.
+
+        Failures before the first chunk are retried like _post.
+
+        Args:
+            path (str): API path, e.g. "/api/generate".
+            payload (dict): JSON request body.
+            extract (callable): Pulls the generated text out of each chunk.
+
+        Yields:
+            str: Pieces of the generated text, in order.
+
+        Raises:
+            OllamaError: If Ollama rejected the request or the stream broke part-way.
+            OllamaUnavailableError: If every attempt failed or the circuit is open.
+        """
+        logger.debug(f"Streaming request to Ollama {path}")
+
+        failed = None
+        for attempt in range(self.max_retries):
+            backend = self._acquire_backend(avoid=failed)
+            received_any = False
+            final_chunk = {}
+            try:
+                logger.debug(f"Attempt {attempt + 1} to connect to Ollama at {backend.url}")
+                started = time.perf_counter()
+                try:
+                    with self.session.post(f"{backend.url}{path}", json=payload, stream=True,
+                                           timeout=self.timeout) as response:
+                        if response.status_code != 200:
+                            logger.warning(f"Ollama returned status code {response.status_code}")
+                        response.raise_for_status()
+
+                        for line in response.iter_lines():
+                            if not line:
+                                continue
+                            chunk = json.loads(line)
+                            if chunk.get('error'):
+                                # Ollama answered, so it is up; it could not serve this request
+                                backend.circuit.record_success()
+                                raise OllamaError(f"Ollama reported an error: {chunk['error']}")
+                            text = extract(chunk)
+                            if text:
+                                received_any = True
+                                yield text
+                            if chunk.get('done'):
+                                # The last chunk carries the request's timings
+                                final_chunk = chunk
+                                break
+                finally:
+                    self._release_backend(backend)
+
+                backend.circuit.record_success()
+                self._record_timing(backend, started, final_chunk)
+                logger.debug("Finished streaming response from Ollama")
+                return
+            except requests.exceptions.RequestException as e:
+                if received_any:
+                    # Part of the answer has already been handed to the caller
+                    backend.circuit.record_failure()
+                    raise OllamaError(f"Ollama stream broke off: {str(e)}") from e
+                failed = backend
+                self._record_failure(backend, attempt, e)
+
+    def _generate_payload(self, prompt, temperature, max_tokens, stream):
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "options": self._options(temperature, max_tokens),
+            "keep_alive": self.keep_alive,
+            "stream": stream
+        }
+
+    def _chat_payload(self, messages, temperature, max_tokens, stream):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "options": self._options(temperature, max_tokens),
+            "keep_alive": self.keep_alive,
+            "stream": stream
+        }
+
+    @staticmethod
+    def _generate_text(result):
+        return result.get('response', '')
+
+    @staticmethod
+    def _chat_text(result):
+        return result.get('message', {}).get('content', '')
+
     def generate_feedback(self, prompt, temperature=0.7, max_tokens=2048):
         """
         Generate feedback for a notebook using Ollama.
@@ -37,89 +475,160 @@ class OllamaClient:
             
         Returns:
             str: Generated feedback text.
+
+        Raises:
+            OllamaError: If the request was rejected or Ollama is unavailable.
+        """
+        payload = self._generate_payload(prompt, temperature, max_tokens, stream=False)
+        return self._post("/api/generate", payload, self._generate_text)
+
+    def stream_feedback(self, prompt, temperature=0.7, max_tokens=2048):
+        """
+        Generate feedback using Ollama's streaming mode.
+
+        Ollama answers with one JSON object per line (NDJSON); each is decoded as it
+        arrives so callers can show text immediately instead of waiting for the whole
+        response.
+        
+        Args:
+            prompt (str): The prompt to send to Ollama.
+            temperature (float): Controls randomness in generation (0.0-1.0).
+            max_tokens (int): Maximum number of tokens to generate.
             
+        Yields:
+            str: Pieces of the generated feedback text, in order.
+
         Raises:
-            Exception: If there's an error communicating with Ollama.
+            OllamaError: If the request was rejected, the stream broke off or Ollama
+            is unavailable.
         """
-        url = f"{self.base_url}/api/generate"
-        logger.debug(f"Sending request to Ollama at {url}")
+        payload = self._generate_payload(prompt, temperature, max_tokens, stream=True)
+        yield from self._post_stream("/api/generate", payload, self._generate_text)
 
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": False
-        }
+    def chat(self, messages, temperature=0.7, max_tokens=2048):
+        """
+        Generate feedback from chat messages using Ollama's /api/chat endpoint.
+
+        Args:
+            messages (list): Chat messages, e.g. from PromptBuilder.
+            temperature (float): Controls randomness in generation (0.0-1.0).
+            max_tokens (int): Maximum number of tokens to generate.
+
+        Returns:
+            str: Generated feedback text.
+
+        Raises:
+            OllamaError: If the request was rejected or Ollama is unavailable.
+        """
+        payload = self._chat_payload(messages, temperature, max_tokens, stream=False)
+        return self._post("/api/chat", payload, self._chat_text)
+
+    def stream_chat(self, messages, temperature=0.7, max_tokens=2048):
+        """
+        Stream feedback from chat messages using Ollama's /api/chat endpoint.
+
+        Args:
+            messages (list): Chat messages, e.g. from PromptBuilder.
+            temperature (float): Controls randomness in generation (0.0-1.0).
+            max_tokens (int): Maximum number of tokens to generate.
+
+        Yields:
+            str: Pieces of the generated feedback text, in order.
+
+        Raises:
+            OllamaError: If the request was rejected, the stream broke off or Ollama
+            is unavailable.
+        """
+        payload = self._chat_payload(messages, temperature, max_tokens, stream=True)
+        yield from self._post_stream("/api/chat", payload, self._chat_text)
+
+    def generate_many(self, prompts, temperature=0.7, max_tokens=2048):
+        """
+        Generate feedback for several prompts concurrently.
+
+        At most max_concurrency requests are in flight at once, spread over the
+        healthy hosts and sharing the pooled keep-alive connections.
         
-        logger.debug(f"Using model: {self.model}")
+        Args:
+            prompts (list): Prompt strings, or lists of chat messages for /api/chat.
+            temperature (float): Controls randomness in generation (0.0-1.0).
+            max_tokens (int): Maximum number of tokens to generate.
+            
+        Yields:
+            tuple: (index, feedback) pairs in completion order, where index is the
+            position of the prompt in the input list.
 
-        # Try with retries
-        for attempt in range(self.max_retries):
+        Raises:
+            OllamaError: As soon as any prompt fails; prompts not yet sent are cancelled.
+        """
+        def run(prompt):
+            if isinstance(prompt, list):
+                return self.chat(prompt, temperature, max_tokens)
+            return self.generate_feedback(prompt, temperature, max_tokens)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # Each prompt runs in a copy of the caller's context so measure() sees its timings
+            futures = {
+                executor.submit(contextvars.copy_context().run, run, prompt): index
+                for index, prompt in enumerate(prompts)
+            }
             try:
-                logger.debug(f"Attempt {attempt + 1} to connect to Ollama")
-                response = requests.post(url, json=payload)
-                
-                if response.status_code != 200:
-                    logger.warning(f"Ollama returned status code {response.status_code}")
-                    logger.warning(f"Response: {response.text[:200]}...")
-                    
-                response.raise_for_status()
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
-                result = response.json()
-                logger.debug("Successfully received response from Ollama")
-                return result.get('response', '')
+    def load_model(self, keep_alive):
+        """
+        Load the model on every host in rotation without generating anything, or
+        unload it with keep_alive 0.
+
+        Args:
+            keep_alive: How long Ollama keeps the model loaded, e.g. "30m"; 0 unloads it.
+
+        Returns:
+            dict: Round trip in milliseconds per host URL, or None where the request failed.
+        """
+        payload = {"model": self.model, "keep_alive": keep_alive, "stream": False}
+
+        def load(backend):
+            try:
+                started = time.perf_counter()
+                response = self.session.post(f"{backend.url}/api/generate", json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                return round((time.perf_counter() - started) * 1000, 1)
             except requests.exceptions.RequestException as e:
-                logger.warning(f"Attempt {attempt + 1} failed: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    logger.debug(f"Retrying in {self.retry_delay} seconds...")
-                    time.sleep(self.retry_delay)
-                else:
-                    error_msg = f"Failed to generate feedback after {self.max_retries} attempts: {str(e)}"
-                    logger.error(error_msg)
-
-                    # Return a fallback message if Ollama is not available
-                    return (
-                        "Error: Unable to generate automated feedback due to Ollama service unavailability. "
-                        "Please check that Ollama is running locally or provide the correct OLLAMA_API_URL "
-                        "environment variable.")
+                logger.warning(f"Could not set keep_alive {keep_alive} for {self.model} on {backend.url}: {str(e)}")
+                return None
+
+        backends = [backend for backend in self.backends if backend.healthy]
+        if not backends:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+            return dict(zip([backend.url for backend in backends], executor.map(load, backends)))
+
+    def check_backends(self):
+        """
+        Health-check every host now, taking failing ones out of rotation and
+        putting recovered ones back.
+
+        Returns:
+            dict: Whether each host answered, by base URL.
+        """
+        return {backend.url: self._check_backend(backend) for backend in self.backends}
 
     def is_available(self):
         """
         Check if the Ollama service is available.
+
+        Lists the models of each host (/api/tags) rather than running a generation.
         
         Returns:
-            bool: True if Ollama is available, False otherwise.
+            bool: True if at least one Ollama host answered, False otherwise.
         """
-        try:
-            # Try checking models API endpoint instead of tags
-            logger.debug(f"Checking Ollama availability at {self.base_url}/api/models")
-            response = requests.get(f"{self.base_url}/api/models")
-            status_code = response.status_code
-            logger.debug(f"Ollama API response status: {status_code}")
-            
-            if status_code != 200:
-                # If models endpoint fails, try a simple generate request with a small prompt
-                logger.debug("Models endpoint failed, trying simple generate request")
-                generate_url = f"{self.base_url}/api/generate"
-                test_payload = {
-                    "model": self.model,
-                    "prompt": "Hello",
-                    "stream": False
-                }
-                
-                generate_response = requests.post(generate_url, json=test_payload)
-                status_code = generate_response.status_code
-                logger.debug(f"Generate API response status: {status_code}")
-                
-                if status_code != 200:
-                    logger.warning(f"Ollama API returned non-200 status: {status_code}")
-                    if hasattr(generate_response, 'text'):
-                        logger.warning(f"Response text: {generate_response.text[:200]}")
-                
-                return status_code == 200
-            
-            return True
-        except Exception as e:
-            logger.error(f"Error checking Ollama availability: {str(e)}")
-            return False
+        results = self.check_backends()
+        for url, ok in results.items():
+            if not ok:
+                logger.warning(f"Ollama at {url} did not answer its health check")
+        return any(results.values())
@@ -0,0 +1,136 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaHealth:
+    """
+    Cheap health checks of the Ollama hosts that never run the model.
+
+    Each host is asked for its installed models (/api/tags) and the models it
+    has loaded (/api/ps). The report says whether the configured model is
+    installed and loaded, how much memory it takes and how long the round trip
+    took. Reports are cached for a few seconds so that repeated clicks and
+    polling cost at most one check per TTL.
+    """
+
+    def __init__(self, ollama_client, ttl=None):
+        """
+        Initialize the health checker.
+
+        Args:
+            ollama_client (OllamaClient): Client whose hosts, session and timeouts are used.
+            ttl (float): Seconds a report is reused before the hosts are checked again.
+        """
+        if ttl is None:
+            ttl = float(os.environ.get("OLLAMA_HEALTH_TTL", 10))
+        self.client = ollama_client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._report = None
+        self._checked_at = 0.0
+
+    def check(self, force=False):
+        """
+        Report the health of every Ollama host.
+
+        Args:
+            force (bool): Check the hosts even if the cached report is still fresh.
+
+        Returns:
+            dict: available (any host reachable with the model installed), model,
+            model_loaded (on any host), checked_at, cached, and per-host reports.
+        """
+        # Callers arriving during a check wait for its result rather than starting their own
+        with self._lock:
+            if not force and self._report is not None and time.monotonic() - self._checked_at < self.ttl:
+                return dict(self._report, cached=True)
+
+            backends = self.client.backends
+            with ThreadPoolExecutor(max_workers=len(backends)) as executor:
+                hosts = list(executor.map(self._check_host, backends))
+
+            self._report = {
+                'available': any(host['reachable'] and host['model_installed'] for host in hosts),
+                'model': self.client.model,
+                'model_loaded': any(host['model_loaded'] for host in hosts),
+                'checked_at': datetime.utcnow().isoformat(),
+                'hosts': hosts
+            }
+            self._checked_at = time.monotonic()
+            return dict(self._report, cached=False)
+
+    def _matches_model(self, entry):
+        """Whether a model listed by Ollama is the configured one ("gemma3" matches "gemma3:latest")."""
+        name = entry.get('name') or entry.get('model') or ''
+        model = self.client.model
+        return name == model or (':' not in model and name == f"{model}:latest")
+
+    def _get(self, backend, path):
+        response = self.client.session.get(f"{backend.url}{path}", timeout=self.client.health_timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _check_host(self, backend):
+        """
+        Check one host.
+
+        A host that answers is put back in rotation; one that does not counts a
+        failure against its circuit breaker.
+
+        Returns:
+            dict: url, reachable, in_rotation, latency_ms of the /api/tags round
+            trip, model_installed, model_loaded, size_bytes, size_vram_bytes,
+            expires_at and error.
+        """
+        host = {
+            'url': backend.url,
+            'reachable': False,
+            'in_rotation': backend.healthy,
+            'latency_ms': None,
+            'model_installed': False,
+            'model_loaded': False,
+            'size_bytes': None,
+            'size_vram_bytes': None,
+            'expires_at': None,
+            'error': None
+        }
+
+        try:
+            start = time.perf_counter()
+            tags = self._get(backend, "/api/tags")
+            host['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Ollama at {backend.url} failed its health check: {str(e)}")
+            backend.circuit.record_failure()
+            host['error'] = str(e)
+            host['in_rotation'] = backend.healthy
+            return host
+
+        backend.circuit.record_success()
+        host['reachable'] = True
+        host['in_rotation'] = True
+        host['model_installed'] = any(self._matches_model(entry) for entry in tags.get('models', []))
+
+        try:
+            running = self._get(backend, "/api/ps")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # Older Ollama versions have no /api/ps; the host is still usable
+            logger.debug(f"Could not list loaded models on {backend.url}: {str(e)}")
+            host['error'] = f"Could not list loaded models: {str(e)}"
+            return host
+
+        loaded = next((entry for entry in running.get('models', []) if self._matches_model(entry)), None)
+        if loaded is not None:
+            host['model_loaded'] = True
+            host['size_bytes'] = loaded.get('size')
+            host['size_vram_bytes'] = loaded.get('size_vram')
+            host['expires_at'] = loaded.get('expires_at')
+        return host
@@ -1,17 +1,120 @@
 import PyPDF2
 import os
 import logging
+import re
+import hashlib
+import tempfile
+from concurrent.futures.process import BrokenProcessPool
+
+from services.process_pool import get_pool, discard_pool
 
 logger = logging.getLogger(__name__)
 
+# PDF last opened by this page extraction worker process, and the file it was opened from
+_worker_reader = None
+_worker_reader_key = None
+
+
+def _open_worker_reader(pdf_path):
+    """Return a reader for pdf_path, reusing the open one while the file is unchanged."""
+    global _worker_reader, _worker_reader_key
+    stat = os.stat(pdf_path)
+    key = (pdf_path, stat.st_mtime_ns, stat.st_size)
+    if key != _worker_reader_key:
+        _worker_reader, _worker_reader_key = None, None
+        _worker_reader = PyPDF2.PdfReader(pdf_path)
+        _worker_reader_key = key
+    return _worker_reader
+
+
+def _extract_page_range(pdf_path, start, stop):
+    """Extract the text of a range of pages from a PDF (runs in a worker process)."""
+    reader = _open_worker_reader(pdf_path)
+    return [reader.pages[page_num].extract_text() for page_num in range(start, stop)]
+
+
 class PDFProcessor:
     """
     Service for processing PDF files containing assessment criteria.
+
+    Pages of large PDFs are extracted in parallel worker processes, and the
+    extracted text is cached on disk by the PDF's SHA-256 so uploading the
+    same rubric again does not parse it again.
     """
-    
+
+    # Bump when extraction changes so text extracted the old way is not served
+    EXTRACT_VERSION = '1'
+
+    # Start of a numbered ("3. ", "12) ") or bulleted ("• ", "- ", "* ") criterion
+    _NUMBERED_ITEM = re.compile(r'\d+[.)]\s')
+    _BULLETED_ITEM = re.compile(r'(?:•\s*|[*-]\s)')
+
+    def __init__(self, cache_dir=None, extract_workers=None, min_parallel_pages=None):
+        """
+        Initialize the processor.
+
+        Args:
+            cache_dir (str): Directory extracted text is cached in; None disables the cache.
+            extract_workers (int): Processes used to extract pages; 1 extracts serially.
+            min_parallel_pages (int): Smallest page count worth starting worker processes for.
+        """
+        if cache_dir is None:
+            cache_dir = os.environ.get("PDF_TEXT_CACHE_DIR") or None
+        if extract_workers is None:
+            extract_workers = int(os.environ.get("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+        if min_parallel_pages is None:
+            min_parallel_pages = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 16))
+        self.cache_dir = cache_dir
+        self.extract_workers = max(1, extract_workers)
+        self.min_parallel_pages = max(1, min_parallel_pages)
+
+    @staticmethod
+    def file_hash(pdf_path):
+        """
+        Compute the SHA-256 of a file without reading it into memory at once.
+
+        Args:
+            pdf_path (str): Path to the file.
+
+        Returns:
+            str: Hex digest of the file contents.
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _cache_path(self, pdf_hash):
+        return os.path.join(self.cache_dir, f"{pdf_hash}-v{self.EXTRACT_VERSION}.txt")
+
+    def _read_cached(self, pdf_hash):
+        try:
+            with open(self._cache_path(pdf_hash), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_cached(self, pdf_hash, text):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write under a temporary name so concurrent readers never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, self._cache_path(pdf_hash))
+        except OSError as e:
+            # The text is still returned; only the next upload misses the cache
+            logger.warning(f"Could not cache extracted PDF text: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def extract_text(self, pdf_path):
         """
         Extract text from a PDF file.
+
+        Text already extracted from a PDF with the same contents is returned
+        from the cache without opening the PDF.
         
         Args:
             pdf_path (str): Path to the PDF file.
@@ -26,50 +129,90 @@ class PDFProcessor:
             raise FileNotFoundError(f"PDF file not found: {pdf_path}")
         
         try:
+            pdf_hash = None
+            if self.cache_dir:
+                pdf_hash = self.file_hash(pdf_path)
+                text = self._read_cached(pdf_hash)
+                if text is not None:
+                    logger.debug(f"Using cached text for PDF {pdf_hash}")
+                    return text
+
             with open(pdf_path, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                # Extract text from each page
-                for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    text += page.extract_text() + "\n\n"
-                
-                return text.strip()
+                pages = self._extract_pages(pdf_path, reader)
+
+            # Join once rather than growing a string page by page
+            text = "\n\n".join(pages).strip()
+            if pdf_hash:
+                self._write_cached(pdf_hash, text)
+            return text
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+    def _extract_pages(self, pdf_path, reader):
+        """
+        Extract the text of every page, in parallel when the PDF is large enough.
+
+        Each worker process opens the PDF once and extracts contiguous ranges
+        of pages, so the document is parsed once per worker rather than once per page.
+
+        Args:
+            pdf_path (str): Path to the PDF file, opened by the worker processes.
+            reader (PyPDF2.PdfReader): The open PDF, used when extracting serially.
+
+        Returns:
+            list: Text of each page, in page order.
+        """
+        page_count = len(reader.pages)
+        workers = min(self.extract_workers, page_count // self.min_parallel_pages)
+        if workers <= 1:
+            return [page.extract_text() for page in reader.pages]
+
+        # A few ranges per worker keeps workers busy when some pages are slower than others
+        range_size = -(-page_count // (workers * 4))
+        ranges = [(start, min(start + range_size, page_count)) for start in range(0, page_count, range_size)]
+        logger.debug(f"Extracting {page_count} PDF pages with {workers} processes")
+        pool = get_pool('pdf_extract', self.extract_workers)
+        try:
+            futures = [pool.submit(_extract_page_range, pdf_path, start, stop) for start, stop in ranges]
+            return [text for future in futures for text in future.result()]
+        except BrokenProcessPool:
+            # A worker died; start fresh processes for the next upload
+            discard_pool('pdf_extract', pool)
+            raise
     
     def extract_criteria(self, text):
         """
         Extract structured criteria from the raw PDF text.
-        This is a simple implementation that could be enhanced with NLP techniques.
+
+        If any line is numbered, each numbered line starts a criterion and
+        bulleted lines are sub-points of the criterion above them; otherwise each
+        bulleted line starts one. Continuation lines are joined to the current
+        criterion, and text before the first one, such as a title, is dropped.
         
         Args:
             text (str): Raw text extracted from the PDF.
             
         Returns:
-            list: List of criteria items extracted from the text.
+            list: List of criteria items extracted from the text; empty if no
+            line is numbered or bulleted.
         """
-        # Split by lines and look for numbered or bulleted items
-        lines = text.split('\n')
+        lines = [line.strip() for line in text.split('\n') if line.strip()]
+        if any(self._NUMBERED_ITEM.match(line) for line in lines):
+            item_marker = self._NUMBERED_ITEM
+        else:
+            item_marker = self._BULLETED_ITEM
+
         criteria = []
         current_item = None
-        
         for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Check if line starts with a number or bullet (simple heuristic)
-            if (line[0].isdigit() and line[1:3] in ['. ', ') ']) or line[0] in ['•', '-', '*']:
+            if item_marker.match(line):
                 if current_item:
                     criteria.append(current_item)
                 current_item = line
             elif current_item:
                 current_item += " " + line
-            else:
-                current_item = line
         
         # Add the last item if it exists
         if current_item:
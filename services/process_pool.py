@@ -0,0 +1,67 @@
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# name -> (max_workers, pool); kept for the life of the process
+_pools = {}
+_lock = threading.Lock()
+
+
+def _mp_context():
+    """
+    Start workers with forkserver where available, else spawn.
+
+    Never fork: forking the web process copies the locks held by its other
+    threads and its open database connections into every worker.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # The server would import __main__ by default, which may be the web app or the
+        # job worker; naming a module instead still passes it our sys.path
+        context.set_forkserver_preload(['services'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def get_pool(name, max_workers):
+    """
+    Return the process pool registered under a name, starting it on first use.
+
+    Pools are shared by every request in the process, so later uploads skip
+    starting workers. Work is submitted by module-level functions that take
+    everything they need as arguments.
+
+    Args:
+        name (str): What the pool is for, e.g. "notebook_parse".
+        max_workers (int): Worker processes; a pool of a different size replaces the old one.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+    with _lock:
+        workers, pool = _pools.get(name, (None, None))
+        if pool is not None and workers == max_workers:
+            return pool
+        if pool is not None:
+            pool.shutdown(wait=False)
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=_mp_context())
+        _pools[name] = (max_workers, pool)
+        logger.debug(f"Started the {name} process pool with {max_workers} workers")
+        return pool
+
+
+def discard_pool(name, pool):
+    """
+    Drop a pool whose workers died (BrokenProcessPool); the next get_pool starts a new one.
+
+    Args:
+        name (str): Name the pool was registered under.
+        pool (ProcessPoolExecutor): The broken pool.
+    """
+    with _lock:
+        if _pools.get(name, (None, None))[1] is pool:
+            del _pools[name]
+    pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import logging
+
+from models import db, Submission, AnalysisJob
+from services.job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+
+def sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class ProgressStream:
+    """
+    Turns a batch's progress and partial feedback into Server-Sent Events.
+
+    The stream holds no connection or thread of its own: each call to poll()
+    reads the job table once and returns the events to send, so the WSGI route
+    can sleep between polls on its request thread and the ASGI route on the
+    event loop. The stream finishes when the batch does, or with a 'timeout'
+    event after max_seconds, after which clients fall back to polling.
+    """
+
+    # Send a comment line when idle this long, so proxies keep the connection open
+    KEEPALIVE_SECONDS = 15
+
+    def __init__(self, job_queue, batch_id, max_seconds=None):
+        """
+        Initialize the stream.
+
+        Args:
+            job_queue (JobQueue): Queue the batch's progress is read from.
+            batch_id (str): The batch to follow, or None when there is none.
+            max_seconds (float): How long the stream runs before handing over to polling.
+        """
+        if max_seconds is None:
+            max_seconds = float(os.environ.get("ANALYSIS_STREAM_MAX_SECONDS", 120))
+        self.job_queue = job_queue
+        self.batch_id = batch_id
+        self.finished = False
+        self.last_counts = None
+        self.sent_feedback = {}
+        self.finished_jobs = set()
+        self.last_sent = time.monotonic()
+        self.deadline = self.last_sent + max_seconds
+
+    @staticmethod
+    def poll_interval():
+        """Seconds to wait between polls."""
+        return float(os.environ.get("ANALYSIS_STREAM_POLL_SECONDS", 0.5))
+
+    def poll(self):
+        """
+        Read the batch once; must run in an application context.
+
+        Returns:
+            list: Events to send, in order. finished is set once the last has been returned.
+        """
+        if not self.batch_id:
+            self.finished = True
+            return [sse('done', {'in_progress': False})]
+
+        events = []
+        current = self.job_queue.batch_report(self.batch_id)
+
+        # Only running jobs and jobs that finished since the last poll have new text
+        jobs = db.session.query(AnalysisJob.id, AnalysisJob.submission_id, AnalysisJob.status, AnalysisJob.error).filter(
+            AnalysisJob.batch_id == self.batch_id,
+            AnalysisJob.status.in_([JobQueue.RUNNING, JobQueue.DONE, JobQueue.FAILED])
+        ).all()
+        active = [job for job in jobs if job.id not in self.finished_jobs]
+        feedback_by_id = dict(
+            db.session.query(Submission.id, Submission.feedback)
+            .filter(Submission.id.in_([job.submission_id for job in active]))
+            .all()
+        ) if active else {}
+        # End the read transaction so the next poll sees the workers' commits
+        db.session.rollback()
+
+        for job in active:
+            feedback = feedback_by_id.get(job.submission_id) or ''
+            done = job.status != JobQueue.RUNNING
+            if done:
+                self.finished_jobs.add(job.id)
+            if feedback != self.sent_feedback.get(job.submission_id) or done:
+                self.sent_feedback[job.submission_id] = feedback
+                events.append(sse('feedback', {
+                    'submission_id': job.submission_id,
+                    'feedback': feedback,
+                    'status': job.status,
+                    'error': job.error if job.status == JobQueue.FAILED else None,
+                    'done': done
+                }))
+
+        # Re-send when the counts change; the ETA alone is refreshed with them
+        counts = tuple(current[key] for key in ('pending', 'running', 'done', 'failed'))
+        if counts != self.last_counts:
+            self.last_counts = counts
+            events.append(sse('progress', current))
+
+        now = time.monotonic()
+        if not current['in_progress']:
+            events.append(sse('done', current))
+            self.finished = True
+        elif now >= self.deadline:
+            events.append(sse('timeout', current))
+            self.finished = True
+        elif not events and now - self.last_sent > self.KEEPALIVE_SECONDS:
+            events.append(": keepalive\n\n")
+
+        if events:
+            self.last_sent = now
+        return events
@@ -0,0 +1,164 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PromptBuilder:
+    """
+    Service that lays out grading prompts as Ollama chat messages.
+
+    Everything shared by a batch (preamble and criteria) goes into a system message
+    that is normalized and placed first, so every request in the batch starts with
+    a byte-identical prefix and Ollama can reuse the KV cache it computed for the
+    previous request. Per-submission content always comes after it.
+    """
+
+    EVALUATION_FOCUS = (
+        "Please provide a detailed evaluation focusing on:\n"
+        "1. Meeting the assignment requirements\n"
+        "2. Code quality and organization\n"
+        "3. Documentation and comments\n"
+        "4. Results and conclusions\n"
+        "5. Areas for improvement"
+    )
+
+    CRITERION_FOCUS = (
+        "Evaluate the notebook against this criterion only. State whether it is met, "
+        "partially met or not met, point to the cells that show it, and suggest specific improvements."
+    )
+
+    @staticmethod
+    def normalize(text):
+        """
+        Normalize text so that equal content always produces identical bytes.
+
+        Converts line endings to \\n, strips trailing whitespace from each line and
+        leading/trailing blank lines from the whole text.
+
+        Args:
+            text (str): Text to normalize.
+
+        Returns:
+            str: The normalized text.
+        """
+        if not text:
+            return ''
+        lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        return '\n'.join(line.rstrip() for line in lines).strip('\n')
+
+    def system_message(self, criteria, settings):
+        """
+        Build the system message shared by every prompt in a batch.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+
+        Returns:
+            dict: Chat message with role "system".
+        """
+        content = f"{self.normalize(settings.preamble)}\n\nASSESSMENT CRITERIA:\n{self.normalize(criteria.text)}"
+        return {'role': 'system', 'content': content}
+
+    def evaluation_messages(self, criteria, settings, notebook_text):
+        """
+        Build the messages that evaluate a whole notebook.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            notebook_text (str): Notebook rendered by NotebookRenderer.
+
+        Returns:
+            list: Chat messages.
+        """
+        content = (
+            f"NOTEBOOK CONTENT:\n{notebook_text}\n\n"
+            f"{self.EVALUATION_FOCUS}\n\n"
+            f"{self.normalize(settings.postamble)}"
+        )
+        return [self.system_message(criteria, settings), {'role': 'user', 'content': content.rstrip()}]
+
+    def criterion_messages(self, criterion, settings, notebook_text):
+        """
+        Build the messages that evaluate a whole notebook against a single criterion.
+
+        Only the preamble goes into the system message and the criterion comes after
+        the notebook, so the prompts for every criterion of one submission share the
+        preamble and notebook as their prefix.
+
+        Args:
+            criterion (str): Text of one criterion, e.g. a CriteriaItem's text.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            notebook_text (str): Notebook rendered by NotebookRenderer.
+
+        Returns:
+            list: Chat messages.
+        """
+        content = (
+            f"NOTEBOOK CONTENT:\n{notebook_text}\n\n"
+            f"ASSESSMENT CRITERION:\n{self.normalize(criterion)}\n\n"
+            f"{self.CRITERION_FOCUS}\n\n"
+            f"{self.normalize(settings.postamble)}"
+        )
+        return [
+            {'role': 'system', 'content': self.normalize(settings.preamble)},
+            {'role': 'user', 'content': content.rstrip()}
+        ]
+
+    def chunk_messages(self, criteria, settings, chunk, part, total_parts):
+        """
+        Build the messages that review one chunk of an oversized notebook.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            chunk (dict): Chunk from NotebookRenderer.render_chunks.
+            part (int): 1-based position of the chunk.
+            total_parts (int): Number of chunks in the notebook.
+
+        Returns:
+            list: Chat messages.
+        """
+        content = (
+            f"NOTEBOOK CONTENT (part {part} of {total_parts}, "
+            f"cells {chunk['first_cell']}-{chunk['last_cell']}):\n{chunk['text']}\n\n"
+            "This is only part of the notebook. Write concise review notes on how this part "
+            "meets the assessment criteria: requirements addressed, code quality, documentation, "
+            "results, and problems found. The notes from every part will be combined later."
+        )
+        return [self.system_message(criteria, settings), {'role': 'user', 'content': content}]
+
+    def reduce_messages(self, criteria, settings, notes):
+        """
+        Build the messages that merge chunk notes into one evaluation.
+
+        Args:
+            criteria (Criteria): The assessment criteria.
+            settings (AnalysisSettings): Prompt preamble and postamble.
+            notes (list): Review notes, one per notebook part, in order.
+
+        Returns:
+            list: Chat messages.
+        """
+        joined_notes = "\n\n".join(f"NOTES ON PART {i}:\n{note}" for i, note in enumerate(notes, start=1))
+        content = (
+            f"The notebook was too long to evaluate at once, so it was reviewed in {len(notes)} parts.\n\n"
+            f"{joined_notes}\n\n"
+            f"Combine these notes into one evaluation of the whole notebook.\n{self.EVALUATION_FOCUS}\n\n"
+            f"{self.normalize(settings.postamble)}"
+        )
+        return [self.system_message(criteria, settings), {'role': 'user', 'content': content.rstrip()}]
+
+    @staticmethod
+    def as_text(messages):
+        """
+        Flatten chat messages into plain text, e.g. for token estimates.
+
+        Args:
+            messages (list): Chat messages.
+
+        Returns:
+            str: The messages' contents separated by blank lines.
+        """
+        return "\n\n".join(message['content'] for message in messages)
@@ -0,0 +1,239 @@
+import os
+import shutil
+import logging
+
+from sqlalchemy import delete, insert, update
+
+from models import db, Submission, SubmissionFile
+from services.notebook_store import NotebookStore
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionIngester:
+    """
+    Service that stores the notebooks found in an uploaded ZIP as submissions.
+
+    In bulk mode all submissions are written with one multi-row INSERT ... RETURNING
+    and all their files with one executemany, instead of a flush per submission and
+    an ORM object per file.
+
+    In upsert mode a notebook that was uploaded before is matched by folder name
+    and notebook file name, so each notebook of a multi-notebook folder keeps its
+    own submission: if its content is unchanged the upload leaves it alone,
+    otherwise the existing submission is pointed at the new content and files,
+    keeping its feedback until it is regraded.
+    """
+
+    def __init__(self, bulk=None, notebook_store=None, upsert=None):
+        """
+        Initialize the ingester.
+
+        Args:
+            bulk (bool): Use bulk statements where the database supports them.
+            notebook_store (NotebookStore): Where notebook content is stored.
+            upsert (bool): Update submissions already uploaded under the same folder
+                name instead of adding duplicates.
+        """
+        if bulk is None:
+            bulk = os.environ.get("BULK_INGEST", "true").lower() == "true"
+        if upsert is None:
+            upsert = os.environ.get("UPSERT_SUBMISSIONS", "true").lower() == "true"
+        self.bulk = bulk
+        self.upsert = upsert
+        self.notebook_store = notebook_store or NotebookStore()
+
+    def ingest(self, notebooks, zip_path, extract_dir):
+        """
+        Add or update submissions and their files in the current session.
+
+        The caller commits or rolls back, then may prune replaced_content_hashes
+        with NotebookStore.prune and replaced_upload_dirs with prune_upload_dirs.
+
+        Args:
+            notebooks (list): Notebook dictionaries from NotebookProcessor.process_zip.
+            zip_path (str): Path to the uploaded ZIP.
+            extract_dir (str): Directory the ZIP was extracted to.
+
+        Returns:
+            dict: Number of submissions added, updated and unchanged, and the
+            content hashes and upload directories updated submissions no longer
+            reference.
+        """
+        result = {'added': 0, 'updated': 0, 'unchanged': 0, 'replaced_content_hashes': [],
+                  'replaced_upload_dirs': []}
+        if not notebooks:
+            return result
+        content_hashes = self.notebook_store.put_many([notebook['notebook_content'] for notebook in notebooks])
+
+        new = list(zip(notebooks, content_hashes))
+        if self.upsert:
+            new = self._update_existing(new, zip_path, extract_dir, result)
+        if not new:
+            return result
+
+        notebooks, content_hashes = [list(items) for items in zip(*new)]
+        if self.bulk and db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+            result['added'] = self._ingest_bulk(notebooks, content_hashes, zip_path, extract_dir)
+        else:
+            result['added'] = self._ingest_rows(notebooks, content_hashes, zip_path, extract_dir)
+        return result
+
+    def _update_existing(self, items, zip_path, extract_dir, result):
+        """
+        Apply uploads of notebooks that already have a submission.
+
+        Submissions are matched on folder name and notebook file name. A notebook
+        with the same content is left as it is. One whose content changed has its
+        newest submission repointed at the new content and files.
+
+        Args:
+            items (list): (notebook, content hash) pairs from the upload.
+            zip_path (str): Path to the uploaded ZIP.
+            extract_dir (str): Directory the ZIP was extracted to.
+            result (dict): Counts updated in place.
+
+        Returns:
+            list: The pairs whose notebook has no submission yet.
+        """
+        folder_names = {notebook['folder_name'] for notebook, _ in items}
+        existing = {}
+        rows = db.session.query(
+            Submission.id, Submission.folder_name, Submission.notebook_file, Submission.content_hash,
+            Submission.archive_path
+        ).filter(
+            Submission.folder_name.in_(folder_names)
+        ).order_by(Submission.created_at.desc(), Submission.id.desc())
+        for row in rows:
+            existing.setdefault((row.folder_name, row.notebook_file), []).append(row)
+
+        new = []
+        updates = []
+        file_rows = []
+        for notebook, content_hash in items:
+            matches = existing.get((notebook['folder_name'], notebook['notebook_file']))
+            if not matches:
+                new.append((notebook, content_hash))
+            elif any(row.content_hash == content_hash for row in matches):
+                result['unchanged'] += 1
+            else:
+                target = matches[0]
+                values = self._submission_values(notebook, content_hash, zip_path, extract_dir)
+                del values['analyzed']
+                updates.append(dict(values, id=target.id, analysis_error=None))
+                file_rows.extend(self._file_values(notebook, target.id))
+                if target.content_hash:
+                    result['replaced_content_hashes'].append(target.content_hash)
+                # The upload directory holds the archive and its extracted folders
+                if target.archive_path and target.archive_path != zip_path:
+                    upload_dir = os.path.dirname(target.archive_path)
+                    if upload_dir not in result['replaced_upload_dirs']:
+                        result['replaced_upload_dirs'].append(upload_dir)
+
+        if updates:
+            updated_ids = [values['id'] for values in updates]
+            # ORM bulk UPDATE by primary key: one executemany for every changed submission
+            db.session.execute(update(Submission), updates)
+            db.session.execute(
+                delete(SubmissionFile).where(SubmissionFile.submission_id.in_(updated_ids)),
+                execution_options={'synchronize_session': False}
+            )
+            if file_rows:
+                db.session.execute(insert(SubmissionFile), file_rows)
+            result['updated'] = len(updates)
+            logger.info(f"Updated {len(updates)} resubmitted folders, {result['unchanged']} unchanged")
+
+        return new
+
+    def prune_upload_dirs(self, upload_dirs, upload_folder):
+        """
+        Delete upload directories that no submission references any more.
+
+        Call after the ingest that repointed their submissions has been committed.
+        Never raises: a directory that can't be checked is left in place.
+
+        Args:
+            upload_dirs (list): Directories from the ingest's replaced_upload_dirs.
+            upload_folder (str): Only directories strictly inside this folder are deleted.
+
+        Returns:
+            int: Number of directories deleted.
+        """
+        upload_folder = os.path.realpath(upload_folder)
+        deleted = 0
+        for upload_dir in upload_dirs:
+            resolved = os.path.realpath(upload_dir)
+            if resolved == upload_folder or os.path.commonpath([upload_folder, resolved]) != upload_folder:
+                logger.warning(f"Not deleting {upload_dir}: outside the upload folder")
+                continue
+            # Other folders from the same upload may still point into it
+            prefix = upload_dir.rstrip(os.sep) + os.sep
+            try:
+                referenced = db.session.query(Submission.query.filter(
+                    Submission.archive_path.startswith(prefix, autoescape=True)
+                    | Submission.file_path.startswith(prefix, autoescape=True)
+                ).exists()).scalar()
+            except Exception as e:
+                # The upload is already committed; a leftover directory only costs disk space
+                logger.error(f"Could not check whether {upload_dir} is still used: {str(e)}")
+                db.session.rollback()
+                continue
+            if not referenced and os.path.isdir(upload_dir):
+                shutil.rmtree(upload_dir, ignore_errors=True)
+                deleted += 1
+        if deleted:
+            logger.info(f"Deleted {deleted} upload directories replaced by resubmissions")
+        return deleted
+
+    @staticmethod
+    def _submission_values(notebook, content_hash, zip_path, extract_dir):
+        return {
+            'folder_name': notebook['folder_name'],
+            'notebook_file': notebook['notebook_file'],
+            'file_path': os.path.join(extract_dir, notebook['folder_name']),
+            'archive_path': zip_path,
+            'content_hash': content_hash,
+            'analyzed': False
+        }
+
+    @staticmethod
+    def _file_values(notebook, submission_id):
+        # Notebooks and large files stay in the ZIP until viewed
+        return [
+            {
+                'submission_id': submission_id,
+                'filename': file_name,
+                'file_path': os.path.join(notebook['folder_path'], file_name),
+                'archive_member': notebook['members'][file_name]
+            }
+            for file_name in notebook['files']
+        ]
+
+    def _ingest_bulk(self, notebooks, content_hashes, zip_path, extract_dir):
+        """Insert every submission, then every file, in a handful of statements."""
+        submission_ids = db.session.scalars(
+            insert(Submission).returning(Submission.id, sort_by_parameter_order=True),
+            [self._submission_values(notebook, content_hash, zip_path, extract_dir)
+             for notebook, content_hash in zip(notebooks, content_hashes)]
+        ).all()
+
+        file_rows = []
+        for notebook, submission_id in zip(notebooks, submission_ids):
+            file_rows.extend(self._file_values(notebook, submission_id))
+        if file_rows:
+            db.session.execute(insert(SubmissionFile), file_rows)
+
+        logger.debug(f"Bulk inserted {len(submission_ids)} submissions and {len(file_rows)} files")
+        return len(submission_ids)
+
+    def _ingest_rows(self, notebooks, content_hashes, zip_path, extract_dir):
+        """Insert submissions one at a time through the ORM."""
+        for notebook, content_hash in zip(notebooks, content_hashes):
+            submission = Submission(**self._submission_values(notebook, content_hash, zip_path, extract_dir))
+            db.session.add(submission)
+            db.session.flush()  # Get the submission ID without committing
+
+            for values in self._file_values(notebook, submission.id):
+                db.session.add(SubmissionFile(**values))
+
+        return len(notebooks)
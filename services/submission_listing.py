@@ -0,0 +1,148 @@
+import json
+import base64
+import logging
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import defer, selectinload
+
+from models import Submission, SubmissionFile
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionListing:
+    """
+    Service that lists submissions for the table views without loading their content.
+
+    Rows are fetched without notebook content (and optionally feedback), with
+    their filenames loaded in one extra SELECT ... IN query, and are paginated by
+    keyset on (sort column, id) so deep pages cost the same as the first.
+    """
+
+    SORT_COLUMNS = {
+        'created_at': Submission.created_at,
+        'updated_at': Submission.updated_at,
+        'folder_name': Submission.folder_name,
+    }
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 1000
+    # Largest value of the SERIAL id column
+    MAX_ID = 2 ** 31 - 1
+
+    def query(self, analyzed=None, folder=None, include_feedback=True):
+        """
+        Build the base query for listing submissions.
+
+        Args:
+            analyzed (bool): Only return analyzed (True) or unanalyzed (False) submissions.
+            folder (str): Only return submissions whose folder name contains this text.
+            include_feedback (bool): Load the feedback column with each row.
+
+        Returns:
+            Query: Submission query with the listing load options applied.
+        """
+        options = [selectinload(Submission.files).load_only(SubmissionFile.filename)]
+        if not include_feedback:
+            options.append(defer(Submission.feedback))
+
+        query = Submission.query.options(*options)
+        if analyzed is not None:
+            query = query.filter(Submission.analyzed == analyzed)
+        if folder:
+            query = query.filter(Submission.folder_name.icontains(folder, autoescape=True))
+        return query
+
+    def page(self, limit=None, cursor=None, sort='created_at', order='desc',
+             analyzed=None, folder=None, include_feedback=False):
+        """
+        Fetch one page of submissions.
+
+        Args:
+            limit (int): Maximum rows to return, capped at MAX_LIMIT.
+            cursor (str): next_cursor from the previous page, or None for the first page.
+            sort (str): One of SORT_COLUMNS.
+            order (str): "asc" or "desc".
+            analyzed (bool): Filter on the analyzed flag.
+            folder (str): Filter on folder name.
+            include_feedback (bool): Include feedback text in each row.
+
+        Returns:
+            dict: The page's submissions and the cursor for the next page (None on the
+            last page).
+
+        Raises:
+            ValueError: If the sort, order, limit or cursor is invalid.
+        """
+        if sort not in self.SORT_COLUMNS:
+            raise ValueError(f"Unknown sort column: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Unknown sort order: {order}")
+        limit = self.DEFAULT_LIMIT if limit is None else limit
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        limit = min(limit, self.MAX_LIMIT)
+
+        column = self.SORT_COLUMNS[sort]
+        query = self.query(analyzed=analyzed, folder=folder, include_feedback=include_feedback)
+
+        if cursor:
+            last_value, last_id = self.decode_cursor(cursor, sort)
+            key = tuple_(column, Submission.id)
+            query = query.filter(key < (last_value, last_id) if order == 'desc' else key > (last_value, last_id))
+
+        if order == 'desc':
+            query = query.order_by(column.desc(), Submission.id.desc())
+        else:
+            query = query.order_by(column.asc(), Submission.id.asc())
+
+        # One extra row tells us whether another page exists
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = self.encode_cursor(getattr(last, sort), last.id)
+
+        return {
+            'submissions': [row.to_dict(include_feedback=include_feedback) for row in rows],
+            'next_cursor': next_cursor,
+            'limit': limit
+        }
+
+    @staticmethod
+    def encode_cursor(value, submission_id):
+        """Encode the sort value and id of the last row on a page."""
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value, submission_id]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor, sort):
+        """
+        Decode a cursor produced by encode_cursor.
+
+        Args:
+            cursor (str): The cursor.
+            sort (str): Sort column the cursor was produced for.
+
+        Returns:
+            tuple: The sort value and id of the last row on the previous page.
+
+        Raises:
+            ValueError: If the cursor is malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            value, submission_id = json.loads(raw)
+            if sort in ('created_at', 'updated_at'):
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, str):
+                raise TypeError(f"{sort} must be a string")
+            # Anything else would fail in the database rather than here
+            if type(submission_id) is not int or not 0 < submission_id <= SubmissionListing.MAX_ID:
+                raise ValueError("id out of range")
+            return value, submission_id
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -187,20 +187,40 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Check for analysis progress updates
+    // Describe a running batch, with throughput and time left once known
+    function describeProgress(data) {
+        let text = `Processing ${data.current} of ${data.total} submissions...`;
+        if (data.throughput_per_minute) {
+            text += ` (${data.throughput_per_minute}/min`;
+            if (data.eta_seconds !== null && data.eta_seconds !== undefined) {
+                text += data.eta_seconds < 60 ?
+                    ', less than a minute left' :
+                    `, about ${Math.round(data.eta_seconds / 60)} min left`;
+            }
+            text += ')';
+        }
+        return text;
+    }
+    
+    // Check for analysis progress updates from the background job queue
+    let analysisWasRunning = false;
     function checkAnalysisProgress() {
         fetch('/analysis-progress')
             .then(response => response.json())
             .then(data => {
+                const statusSpan = document.getElementById('analysisStatus');
                 if (data.in_progress) {
+                    analysisWasRunning = true;
                     // Update the status message
-                    const statusSpan = document.getElementById('analysisStatus');
                     if (statusSpan) {
-                        statusSpan.textContent = `Processing ${data.current} of ${data.total} submissions...`;
+                        statusSpan.textContent = describeProgress(data);
                     }
                     
                     // Check again in 2 seconds
                     setTimeout(checkAnalysisProgress, 2000);
+                } else if (analysisWasRunning) {
+                    // The batch just finished; reload to show the new feedback
+                    window.location.reload();
                 } else if (statusSpan) {
                     statusSpan.textContent = 'Select submissions to analyze from the table.';
                 }
@@ -208,9 +228,103 @@ document.addEventListener('DOMContentLoaded', function() {
             .catch(error => console.error('Error checking progress:', error));
     }
     
-    // Start checking for progress if we're on the main page
+    // Render partial feedback for a submission row as it streams in
+    function updateFeedbackRow(data) {
+        const row = document.querySelector(`tr[data-id="${data.submission_id}"]`);
+        if (!row) return;
+        
+        const feedbackCell = row.querySelector('.feedback-cell');
+        if (feedbackCell && data.feedback) {
+            const preview = document.createElement('div');
+            preview.className = 'feedback-preview';
+            preview.textContent = data.feedback.substring(0, 50) + '...';
+            feedbackCell.replaceChildren(preview);
+        }
+        
+        const viewBtn = row.querySelector('.view-feedback');
+        if (viewBtn) {
+            viewBtn.setAttribute('data-feedback', data.feedback);
+        }
+        
+        // Keep an open feedback modal in sync while text is still arriving
+        if (feedbackModal && feedbackModal.classList.contains('show') &&
+            document.getElementById('feedbackModalTitle').textContent === viewBtn?.getAttribute('data-folder')) {
+            document.getElementById('feedbackTextarea').value = data.feedback;
+        }
+        
+        const statusBadge = row.querySelector('.badge');
+        if (statusBadge) {
+            if (!data.done) {
+                statusBadge.textContent = 'Analyzing';
+                statusBadge.className = 'badge bg-info';
+            } else if (data.status === 'done') {
+                statusBadge.textContent = 'Analyzed';
+                statusBadge.className = 'badge bg-success';
+                statusBadge.removeAttribute('title');
+            } else if (data.status === 'failed') {
+                statusBadge.textContent = 'Failed';
+                statusBadge.className = 'badge bg-danger';
+                if (data.error) statusBadge.setAttribute('title', data.error);
+            }
+        }
+    }
+    
+    // Follow a running batch over Server-Sent Events, falling back to polling
+    function streamAnalysisProgress(batchId) {
+        const statusSpan = document.getElementById('analysisStatus');
+        const source = new EventSource('/analysis-stream?batch=' + encodeURIComponent(batchId));
+        analysisWasRunning = true;
+        
+        source.addEventListener('progress', function(event) {
+            const data = JSON.parse(event.data);
+            if (data.in_progress && statusSpan) {
+                statusSpan.textContent = describeProgress(data);
+            }
+        });
+        
+        source.addEventListener('feedback', function(event) {
+            updateFeedbackRow(JSON.parse(event.data));
+        });
+        
+        source.addEventListener('done', function(event) {
+            const data = JSON.parse(event.data);
+            source.close();
+            if (statusSpan) {
+                statusSpan.textContent = data.total ?
+                    `Analysis complete: ${data.current - data.failed} of ${data.total} submissions analyzed.` :
+                    'Select submissions to analyze from the table.';
+            }
+        });
+        
+        // The server ends long streams; keep following the batch by polling
+        source.addEventListener('timeout', function() {
+            source.close();
+            checkAnalysisProgress();
+        });
+        
+        source.onerror = function() {
+            source.close();
+            checkAnalysisProgress();
+        };
+    }
+    
+    // Only open a stream once an analysis has been started and is still running
+    function followAnalysisProgress() {
+        fetch('/analysis-progress')
+            .then(response => response.json())
+            .then(data => {
+                if (data.in_progress && window.EventSource) {
+                    streamAnalysisProgress(data.batch_id);
+                } else {
+                    checkAnalysisProgress();
+                }
+            })
+            .catch(error => console.error('Error checking progress:', error));
+    }
+    
+    // Start following progress if we're on the main page
     if (document.getElementById('analysisStatus')) {
-        checkAnalysisProgress();
+        followAnalysisProgress();
     }
 
     // Tooltips initialization
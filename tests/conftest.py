@@ -0,0 +1,91 @@
+import os
+import io
+import json
+import shutil
+import zipfile
+import tempfile
+
+import pytest
+
+# app.py configures itself at import time: it stores uploads under the working
+# directory and creates its tables in DATABASE_URL, so both point at scratch space
+WORK_DIR = tempfile.mkdtemp(prefix="assessment-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORK_DIR, 'test.db')}"
+os.environ["OLLAMA_WARMUP"] = "false"
+
+_cwd = os.getcwd()
+os.chdir(WORK_DIR)
+import app as app_module  # noqa: E402
+os.chdir(_cwd)
+from models import db, AnalysisSettings  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    """The Flask app inside an app context, with empty tables and upload folder."""
+    flask_app = app_module.app
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(AnalysisSettings(preamble="Evaluate the notebook.", postamble="Be concise."))
+        db.session.commit()
+        yield flask_app
+        db.session.remove()
+    shutil.rmtree(app_module.UPLOAD_FOLDER, ignore_errors=True)
+    os.makedirs(app_module.UPLOAD_FOLDER, exist_ok=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_notebook(source="print('hello')"):
+    """Serialize a one-cell notebook."""
+    return json.dumps({
+        'nbformat': 4, 'nbformat_minor': 5, 'metadata': {},
+        'cells': [{'cell_type': 'code', 'metadata': {}, 'execution_count': 1, 'source': source, 'outputs': []}]
+    })
+
+
+def make_zip(members):
+    """Build an in-memory ZIP from a mapping of member name to content."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def make_pdf(page_texts):
+    """Serialize a PDF with one line of text per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in page_texts:
+        stream = b"BT /F1 12 Tf 40 800 Td (%s) Tj ET" % text.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    buffer = io.BytesIO(b"%PDF-1.4\n")
+    buffer.seek(0, io.SEEK_END)
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(buffer.tell())
+        buffer.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = buffer.tell()
+    buffer.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        buffer.write(b"%010d 00000 n \n" % offset)
+    buffer.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return buffer.getvalue()
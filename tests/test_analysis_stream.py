@@ -0,0 +1,31 @@
+from models import db, Submission, AnalysisJob
+
+
+def add_job(status):
+    submission = Submission(folder_name='student')
+    db.session.add(submission)
+    db.session.flush()
+    db.session.add(AnalysisJob(batch_id='batch', submission_id=submission.id, status=status))
+    db.session.commit()
+
+
+def test_stream_hands_a_long_batch_back_to_polling(app, client, monkeypatch):
+    monkeypatch.setenv('ANALYSIS_STREAM_POLL_SECONDS', '0.05')
+    monkeypatch.setenv('ANALYSIS_STREAM_MAX_SECONDS', '0.2')
+    add_job('pending')
+
+    body = client.get('/analysis-stream?batch=batch').get_data(as_text=True)
+
+    assert 'event: progress' in body
+    assert body.rstrip().split('\n')[-2] == 'event: timeout'
+    assert 'event: done' not in body
+
+
+def test_stream_ends_when_the_batch_finishes(app, client):
+    add_job('done')
+
+    body = client.get('/analysis-stream?batch=batch').get_data(as_text=True)
+
+    assert 'event: feedback' in body
+    assert 'event: done' in body
+    assert 'event: timeout' not in body
@@ -0,0 +1,129 @@
+import time
+import json
+import asyncio
+import threading
+
+from asgi import ThreadPoolWsgiToAsgi, analysis_stream
+from models import db, Submission, AnalysisJob
+
+
+class Response:
+    """WSGI response iterable that records whether it was closed."""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def request(application, path='/', disconnect=None, query_string=b''):
+    """Send one GET through the ASGI application; returns the messages it sent."""
+    sent = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b''}
+        await (disconnect.wait() if disconnect else asyncio.Event().wait())
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string, 'http_version': '1.1',
+             'headers': [(b'host', b'localhost')]}
+    return application(scope, receive, send), sent
+
+
+def test_requests_run_concurrently_and_responses_are_closed():
+    responses = []
+    threads = set()
+
+    def app(environ, start_response):
+        threads.add(threading.current_thread().name)
+        start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', '5')])
+        responses.append(Response([b'hel', b'lo, world'], delay=0.2))
+        return responses[-1]
+
+    application = ThreadPoolWsgiToAsgi(app, threads=4)
+
+    async def main():
+        calls = [request(application) for _ in range(4)]
+        start = time.perf_counter()
+        await asyncio.gather(*(call for call, _ in calls))
+        return time.perf_counter() - start, [sent for _, sent in calls]
+
+    elapsed, sent = asyncio.run(main())
+
+    assert elapsed < 0.8
+    assert len(threads) == 4
+    assert all(response.closed for response in responses)
+    for messages in sent:
+        assert messages[0]['status'] == 200
+        assert b''.join(message.get('body', b'') for message in messages[1:]) == b'hello'
+
+
+def test_streaming_response_stops_when_the_client_disconnects():
+    response = Response(iter(lambda: b'data\n', None), delay=0.01)
+
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/event-stream')])
+        return response
+
+    application = ThreadPoolWsgiToAsgi(app, threads=1)
+
+    async def main():
+        disconnect = asyncio.Event()
+        call, sent = request(application, disconnect=disconnect)
+        task = asyncio.create_task(call)
+        await asyncio.sleep(0.1)
+        disconnect.set()
+        await asyncio.wait_for(task, 5)
+        return sent
+
+    sent = asyncio.run(main())
+
+    assert sent[0]['status'] == 200
+    assert response.closed
+
+
+def test_progress_streams_do_not_hold_request_threads(app, monkeypatch):
+    monkeypatch.setenv('ANALYSIS_STREAM_POLL_SECONDS', '0.05')
+    monkeypatch.setenv('ANALYSIS_STREAM_MAX_SECONDS', '0.5')
+    submission = Submission(folder_name='student')
+    db.session.add(submission)
+    db.session.flush()
+    db.session.add(AnalysisJob(batch_id='batch', submission_id=submission.id))
+    db.session.commit()
+
+    application = ThreadPoolWsgiToAsgi(app, threads=1, routes={'/analysis-stream': analysis_stream})
+
+    async def main():
+        streams = [request(application, '/analysis-stream', query_string=b'batch=batch') for _ in range(3)]
+        tasks = [asyncio.create_task(call) for call, _ in streams]
+        await asyncio.sleep(0.1)
+        # Served by the only request thread while all three streams are open
+        call, sent = request(application, '/analysis-progress', query_string=b'batch=batch')
+        await asyncio.wait_for(call, 0.3)
+        assert not any(task.done() for task in tasks)
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        return sent, [stream_sent for _, stream_sent in streams]
+
+    sent, streams = asyncio.run(main())
+
+    assert json.loads(b''.join(message.get('body', b'') for message in sent[1:]))['pending'] == 1
+    for messages in streams:
+        assert messages[0]['status'] == 200
+        body = b''.join(message.get('body', b'') for message in messages[1:]).decode()
+        assert body.startswith('event: progress')
+        assert body.rstrip().split('\n')[-2] == 'event: timeout'
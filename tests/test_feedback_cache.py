@@ -0,0 +1,25 @@
+from models import db, FeedbackCacheEntry
+from services.feedback_cache import FeedbackCache
+
+
+def test_put_replaces_an_entry_stored_by_another_worker(app):
+    cache = FeedbackCache()
+    assert cache.get('key') is None
+
+    # Another worker stores the same key between this worker's lookup and its write
+    with db.engine.begin() as connection:
+        connection.execute(db.insert(FeedbackCacheEntry).values(
+            key='key', model='model', feedback='theirs', size_bytes=6, hit_count=0))
+
+    cache.put('key', 'model', 'ours')
+
+    assert cache.get('key') == 'ours'
+    assert FeedbackCacheEntry.query.count() == 1
+
+
+def test_put_failure_does_not_raise(app):
+    FeedbackCacheEntry.__table__.drop(db.engine)
+    try:
+        FeedbackCache().put('key', 'model', 'feedback')
+    finally:
+        FeedbackCacheEntry.__table__.create(db.engine)
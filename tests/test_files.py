@@ -0,0 +1,81 @@
+from conftest import make_notebook, make_zip
+from models import db, Submission, SubmissionFile
+
+
+def upload(client, members):
+    response = client.post('/upload-submissions', data={'submissions_file': (make_zip(members), 'submissions.zip')})
+    assert response.status_code == 302
+
+
+def test_raw_file_refuses_paths_outside_the_upload_folder(client, tmp_path):
+    secret = tmp_path / 'secret.txt'
+    secret.write_text('secret')
+    submission = Submission(folder_name='mallory')
+    db.session.add(submission)
+    db.session.flush()
+    db.session.add(SubmissionFile(submission_id=submission.id, filename='secret.txt', file_path=str(secret)))
+    db.session.commit()
+
+    assert client.get(f'/raw-file/{submission.id}/secret.txt').status_code == 404
+    assert client.get(f'/view-file/{submission.id}/secret.txt').status_code == 404
+
+
+def test_delete_submission_leaves_folders_outside_the_upload_folder(client, tmp_path):
+    folder = tmp_path / 'elsewhere'
+    folder.mkdir()
+    submission = Submission(folder_name='mallory', file_path=str(folder))
+    db.session.add(submission)
+    db.session.commit()
+
+    client.get(f'/delete_submission/{submission.id}')
+
+    assert db.session.get(Submission, submission.id) is None
+    assert folder.is_dir()
+
+
+def test_uploaded_traversal_members_are_not_stored(client):
+    upload(client, {'alice/analysis.ipynb': make_notebook(), 'alice/../../escape.csv': 'owned'})
+
+    submission = Submission.query.one()
+    assert [f.filename for f in submission.files] == ['analysis.ipynb']
+
+
+def test_view_file_previews_each_notebook_from_its_own_content(client):
+    upload(client, {'alice/part1.ipynb': make_notebook('first_cell = 1'),
+                    'alice/part2.ipynb': make_notebook('second_cell = 2')})
+    part1 = Submission.query.filter_by(notebook_file='part1.ipynb').one()
+
+    own = client.get(f'/view-file/{part1.id}/part1.ipynb')
+    sibling = client.get(f'/view-file/{part1.id}/part2.ipynb')
+
+    assert b'Notebook Viewer' in own.data and b'Notebook Viewer' in sibling.data
+    assert b'first_cell' in own.data and b'second_cell' not in own.data
+    assert b'second_cell' in sibling.data and b'first_cell' not in sibling.data
+
+
+def test_raw_file_serves_ranges_and_revalidates(client):
+    upload(client, {'alice/analysis.ipynb': make_notebook(), 'alice/data.csv': 'id,value\n1,0.5\n'})
+    url = f'/raw-file/{Submission.query.one().id}/data.csv'
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.data == b'id,value\n1,0.5\n'
+    assert full.headers['Accept-Ranges'] == 'bytes'
+
+    partial = client.get(url, headers={'Range': 'bytes=3-7'})
+    assert partial.status_code == 206
+    assert partial.data == b'value'
+    assert partial.headers['Content-Range'] == 'bytes 3-7/15'
+
+    assert client.get(url, headers={'Range': 'bytes=100-'}).status_code == 416
+    assert client.get(url, headers={'If-None-Match': full.headers['ETag']}).status_code == 304
+    assert client.get(url, headers={'If-Modified-Since': full.headers['Last-Modified']}).status_code == 304
+
+
+def test_raw_file_serves_active_content_as_text(client):
+    upload(client, {'alice/analysis.ipynb': make_notebook(), 'alice/page.html': '<script>alert(1)</script>'})
+
+    response = client.get(f'/raw-file/{Submission.query.one().id}/page.html')
+
+    assert response.mimetype == 'text/plain'
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
@@ -0,0 +1,117 @@
+import pytest
+
+from models import db, Criteria, CriteriaItem, Submission, AnalysisSettings
+from services.feedback_cache import FeedbackCache
+from services.grader import SubmissionGrader
+from services.notebook_renderer import estimate_tokens
+from services.prompt_builder import PromptBuilder
+
+
+class Client:
+    """Stands in for OllamaClient, recording every prompt it is sent."""
+
+    model = 'model'
+
+    def __init__(self, num_ctx):
+        self.num_ctx = num_ctx
+        self.prompts = []
+
+    def chat(self, messages, temperature, max_tokens):
+        self.prompts.append(messages)
+        return 'Feedback'
+
+    def generate_many(self, prompts, temperature, max_tokens):
+        for index, messages in enumerate(prompts):
+            self.prompts.append(messages)
+            yield index, 'Notes'
+
+
+def make_grader(num_ctx, feedback_cache=None):
+    grader = SubmissionGrader(Client(num_ctx), feedback_cache)
+    grader.max_tokens = 256
+    grader.min_chunk_tokens = 128
+    grader.stream = False
+    return grader
+
+
+def make_submission(cells):
+    submission = Submission(folder_name='student', legacy_notebook_content={
+        'cells': [{'cell_type': 'code', 'source': source, 'outputs': []} for source in cells]
+    })
+    db.session.add(submission)
+    db.session.commit()
+    return submission
+
+
+def grade(grader, submission, criteria_text, items=(), bypass_cache=False):
+    criteria = Criteria(name='criteria', text=criteria_text)
+    criteria.items = [CriteriaItem(position=position, text=text) for position, text in enumerate(items)]
+    db.session.add(criteria)
+    db.session.commit()
+    return grader.grade(submission, criteria, AnalysisSettings.query.first(), bypass_cache=bypass_cache)
+
+
+def test_oversized_notebook_is_graded_in_prompts_that_fit(app):
+    grader = make_grader(num_ctx=1024)
+    submission = make_submission([f"total_{i} = sum(range({i}))\nprint(total_{i})" for i in range(200)])
+
+    feedback, _ = grade(grader, submission, "1. The code runs.")
+
+    prompts = grader.ollama_client.prompts
+    assert feedback == 'Feedback'
+    assert len(prompts) > 2
+    for messages in prompts:
+        assert estimate_tokens(PromptBuilder.as_text(messages)) + grader.max_tokens <= 1024
+
+
+def test_small_notebook_fits_even_when_chunks_would_not(app):
+    grader = make_grader(num_ctx=1024)
+    grader.min_chunk_tokens = 1024
+    submission = make_submission(["print('hello')"])
+
+    feedback, _ = grade(grader, submission, "1. The code runs.")
+
+    assert feedback == 'Feedback'
+    assert len(grader.ollama_client.prompts) == 1
+
+
+def test_criteria_that_leave_no_room_fail_without_calling_ollama(app):
+    grader = make_grader(num_ctx=1024)
+    submission = make_submission([f"value_{i} = {i}" for i in range(100)])
+
+    with pytest.raises(ValueError):
+        grade(grader, submission, " ".join(f"{i}. Criterion {i} is met." for i in range(300)))
+
+    assert grader.ollama_client.prompts == []
+    assert 'OLLAMA_NUM_CTX' in db.session.get(Submission, submission.id).analysis_error
+
+
+def test_cache_hits_and_misses_are_only_recorded_when_the_cache_is_consulted(app, monkeypatch):
+    grader = make_grader(num_ctx=4096, feedback_cache=FeedbackCache())
+    submission = make_submission(["print('hello')"])
+
+    assert grade(grader, submission, "1. The code runs.")[1] is False
+    assert grade(grader, submission, "1. The code runs.")[1] is True
+    assert grade(grader, submission, "1. The code runs.", bypass_cache=True)[1] is None
+
+    monkeypatch.setenv('FEEDBACK_CACHE_ENABLED', 'false')
+    grader.feedback_cache = FeedbackCache()
+    assert grade(grader, submission, "1. The code runs.")[1] is None
+
+
+def test_per_criterion_grading_is_a_hit_when_every_criterion_is_cached(app):
+    grader = make_grader(num_ctx=4096, feedback_cache=FeedbackCache())
+    grader.per_criterion = True
+    submission = make_submission(["print('hello')"])
+
+    assert grade(grader, submission, "1. Runs. 2. Prints.", items=['Runs.', 'Prints.'])[1] is False
+    calls = len(grader.ollama_client.prompts)
+
+    # A new document with the same criteria misses as a whole, but every criterion is cached
+    feedback, cache_hit = grade(grader, submission, "1. Runs.\n2. Prints.", items=['Runs.', 'Prints.'])
+    assert cache_hit is True
+    assert len(grader.ollama_client.prompts) == calls
+    assert feedback.count('Notes') == 2
+
+    # One new criterion has to be generated
+    assert grade(grader, submission, "1. Runs. 2. Exits.", items=['Runs.', 'Exits.'])[1] is False
@@ -0,0 +1,135 @@
+import os
+import json
+
+import nbformat
+import pytest
+
+from conftest import make_notebook, make_zip
+from services.notebook_processor import NotebookProcessor
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('alice/analysis.ipynb', 'alice/analysis.ipynb'),
+    ('./alice//data/./rows.csv', 'alice/data/rows.csv'),
+    ('alice\\notes.txt', 'alice/notes.txt'),
+    ('../escape.txt', None),
+    ('alice/../../escape.txt', None),
+    ('/etc/passwd', None),
+    ('\\\\server\\share\\file.txt', None),
+    ('C:/Windows/win.ini', None),
+    ('C:escape.txt', None),
+])
+def test_safe_member_path(name, expected):
+    assert NotebookProcessor.safe_member_path(name) == expected
+
+
+def test_process_zip_skips_members_outside_the_extract_dir(tmp_path):
+    zip_path = tmp_path / 'submissions.zip'
+    zip_path.write_bytes(make_zip({
+        'alice/analysis.ipynb': make_notebook(),
+        'alice/data.csv': 'id\n1\n',
+        '../../escape.csv': 'owned',
+        'alice/../../escape.ipynb': make_notebook(),
+        '/tmp/absolute.csv': 'owned',
+    }).getvalue())
+    extract_dir = tmp_path / 'upload' / 'extracted'
+    extract_dir.mkdir(parents=True)
+
+    notebooks = NotebookProcessor(parse_workers=1).process_zip(str(zip_path), str(extract_dir))
+
+    assert [notebook['folder_name'] for notebook in notebooks] == ['alice']
+    assert sorted(notebooks[0]['files']) == ['analysis.ipynb', 'data.csv']
+    assert (extract_dir / 'alice' / 'data.csv').read_text() == 'id\n1\n'
+    assert not (tmp_path / 'escape.csv').exists()
+    assert not os.path.exists('/tmp/absolute.csv')
+
+
+def test_extract_member_rejects_unsafe_names(tmp_path):
+    zip_path = tmp_path / 'submissions.zip'
+    zip_path.write_bytes(make_zip({'../escape.csv': 'owned'}).getvalue())
+
+    with pytest.raises(ValueError):
+        NotebookProcessor().extract_member(str(zip_path), '../escape.csv', str(tmp_path / 'extracted'))
+    assert not (tmp_path / 'escape.csv').exists()
+
+
+def test_parallel_parse_keeps_member_order(tmp_path):
+    zip_path = tmp_path / 'submissions.zip'
+    zip_path.write_bytes(make_zip({
+        f'student{index:02}/analysis.ipynb': make_notebook(f'print({index})') for index in range(12)
+    }).getvalue())
+
+    serial = NotebookProcessor(parse_workers=1).process_zip(str(zip_path), str(tmp_path / 'serial'))
+    parallel = NotebookProcessor(parse_workers=2).process_zip(str(zip_path), str(tmp_path / 'parallel'))
+    # Again on the same pool, which must see an archive replaced under the same path
+    zip_path.write_bytes(make_zip({
+        f'late{index}/analysis.ipynb': make_notebook(f'print("late {index}")') for index in range(2)
+    }).getvalue())
+    replaced = NotebookProcessor(parse_workers=2).process_zip(str(zip_path), str(tmp_path / 'replaced'))
+
+    assert [notebook['folder_name'] for notebook in parallel] == [f'student{index:02}' for index in range(12)]
+    assert [notebook['notebook_content'] for notebook in parallel] == \
+        [notebook['notebook_content'] for notebook in serial]
+    assert parallel[3]['notebook_content']['cells'][0]['source'] == 'print(3)'
+    assert [notebook['notebook_content']['cells'][0]['source'] for notebook in replaced] == \
+        ['print("late 0")', 'print("late 1")']
+
+
+def fixture_notebook():
+    """A v4 notebook with images, JSON output data and sources full of quotes and MIME-like text."""
+    notebook = nbformat.v4.new_notebook(metadata={
+        'kernelspec': {'name': 'python3', 'display_name': 'Python 3', 'language': 'python'},
+        'language_info': {'name': 'python'},
+    })
+    notebook.cells = [
+        nbformat.v4.new_markdown_cell('Say "hello" to C:\\data\\new, and \'quotes\' \u00e9'),
+        nbformat.v4.new_code_cell('spec = {"image/png": "not an image", "a/b": ["x", "y"]}\nprint("\\"done\\"")',
+                                  outputs=[
+            nbformat.v4.new_output('stream', name='stdout', text='"done"\n'),
+            nbformat.v4.new_output('display_data', data={
+                'image/png': 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg==',
+                'text/plain': '<Figure size 640x480 with 1 Axes>',
+            }),
+            nbformat.v4.new_output('execute_result', execution_count=1, data={
+                'application/json': {'rows': [{'name': 'a "quoted" value'}], 'image/png': 'nested'},
+                'text/html': ['<b>', 'table</b>'],
+            }),
+            nbformat.v4.new_output('error', ename='ValueError', evalue='bad "value"', traceback=['line 1']),
+        ]),
+        nbformat.v4.new_raw_cell('image/svg+xml: "not data"'),
+    ]
+    saved = json.loads(nbformat.writes(notebook))
+    # An image split into lines, as some frontends save them
+    image = saved['cells'][1]['outputs'][1]['data']
+    image['image/png'] = [image['image/png'][:40] + '\n', image['image/png'][40:]]
+    return json.dumps(saved, indent=1, ensure_ascii=False).encode('utf-8')
+
+
+def test_fast_path_matches_nbformat():
+    raw = fixture_notebook()
+
+    fast = NotebookProcessor(fast_parse=True)._extract_from_bytes(raw)
+    slow = NotebookProcessor(fast_parse=False)._extract_from_bytes(raw)
+
+    loaded = NotebookProcessor._fast_load(raw)
+    # Replaced in the raw bytes, list-valued or not; JSON objects are left to _summarize
+    assert loaded['cells'][1]['outputs'][1]['data']['image/png'] == '[binary data]'
+    assert isinstance(loaded['cells'][1]['outputs'][2]['data']['application/json'], dict)
+    assert fast == slow
+    code = fast['cells'][1]
+    assert code['source'].startswith('spec = {"image/png": "not an image"')
+    assert code['outputs'][1]['data'] == {'image/png': '[binary data]',
+                                          'text/plain': '<Figure size 640x480 with 1 Axes>'}
+    assert code['outputs'][2]['data'] == {'application/json': '[binary data]', 'text/html': '<b>table</b>'}
+    assert fast['cells'][0]['source'] == 'Say "hello" to C:\\data\\new, and \'quotes\' \u00e9'
+    assert fast['metadata'] == {'kernel_spec': 'python3', 'language_info': 'python'}
+
+
+def test_v3_notebook_falls_back_to_nbformat():
+    notebook = nbformat.reads(fixture_notebook().decode('utf-8'), as_version=4)
+    raw = nbformat.writes(notebook, version=3).encode('utf-8')
+
+    assert NotebookProcessor._fast_load(raw) is None
+    content = NotebookProcessor(fast_parse=True)._extract_from_bytes(raw)
+    assert content == NotebookProcessor(fast_parse=False)._extract_from_bytes(raw)
+    assert content['cells'][1]['outputs'][1]['data']['image/png'] == '[binary data]'
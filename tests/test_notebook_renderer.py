@@ -0,0 +1,67 @@
+import re
+
+from services.notebook_renderer import NotebookRenderer, estimate_tokens
+
+
+def make_content(sources):
+    return {'cells': [{'cell_type': 'code', 'source': source, 'outputs': []} for source in sources]}
+
+
+def squeeze(text):
+    return re.sub(r'\s+', '', text)
+
+
+def test_chunks_cover_every_cell_once_within_the_budget():
+    sources = [f"x_{i} = {i}\n" * (i % 7 + 1) for i in range(40)]
+    # One cell larger than the whole budget, which has to be split
+    sources[17] = "\n".join(f"row_{i} = compute({i}, scale=2)" for i in range(200))
+    content = make_content(sources)
+    renderer = NotebookRenderer()
+
+    chunks = renderer.render_chunks(content, 120)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk['estimated_tokens'] == estimate_tokens(chunk['text'])
+        assert chunk['estimated_tokens'] <= 120
+    # Chunks follow cell order; only a split cell spans a boundary
+    assert chunks[0]['first_cell'] == 1 and chunks[-1]['last_cell'] == 40
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk['first_cell'] in (previous['last_cell'], previous['last_cell'] + 1)
+    # Every cell's text appears exactly once, in order
+    rendered = "\n\n".join(chunk['text'] for chunk in chunks)
+    assert squeeze(rendered) == squeeze(renderer.render(content)['text'])
+    for cell in range(1, 41):
+        assert rendered.count(f"[cell {cell}: code]") == 1
+
+
+def test_notebook_within_the_budget_is_one_chunk():
+    content = make_content(["print('hello')", "print('world')"])
+
+    chunks = NotebookRenderer().render_chunks(content, 1000)
+
+    assert len(chunks) == 1
+    assert chunks[0]['first_cell'] == 1 and chunks[0]['last_cell'] == 2
+    assert chunks[0]['text'] == NotebookRenderer().render(content)['text']
+
+
+def test_split_text_breaks_on_lines():
+    text = "\n".join(f"value_{i} = {i} * {i}" for i in range(100))
+
+    pieces = NotebookRenderer._split_text(text, 50)
+
+    assert len(pieces) > 1
+    assert "\n".join(piece for piece, _ in pieces) == text
+    for piece, tokens in pieces:
+        assert tokens == estimate_tokens(piece) <= 50
+
+
+def test_split_text_cuts_a_single_long_line():
+    text = ",".join(str(i) for i in range(2000))
+
+    pieces = NotebookRenderer._split_text(text, 100)
+
+    assert len(pieces) > 1
+    assert "".join(piece for piece, _ in pieces) == text
+    for piece, tokens in pieces:
+        assert tokens == estimate_tokens(piece) <= 100
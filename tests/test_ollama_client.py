@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from services.circuit_breaker import CircuitBreaker
+from services.ollama_client import OllamaClient, OllamaError, OllamaUnavailableError
+
+
+class StreamResponse:
+    """Streaming response that yields the given NDJSON chunks."""
+
+    status_code = 200
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self):
+        for chunk in self.chunks:
+            yield json.dumps(chunk).encode()
+
+
+class Session:
+    """Stands in for requests.Session, answering every POST with the same chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.posts = 0
+
+    def post(self, url, **kwargs):
+        self.posts += 1
+        return StreamResponse(self.chunks)
+
+
+def make_client(monkeypatch, chunks):
+    monkeypatch.setenv('OLLAMA_CIRCUIT_FAILURES', '1')
+    monkeypatch.setenv('OLLAMA_RETRY_BASE_DELAY', '0')
+    client = OllamaClient()
+    client.session = Session(chunks)
+    return client
+
+
+def test_stream_yields_text_until_done(monkeypatch):
+    client = make_client(monkeypatch, [{'response': 'Good '}, {'response': 'work', 'done': True}])
+
+    assert list(client.stream_feedback('prompt')) == ['Good ', 'work']
+
+
+def test_error_reported_in_the_stream_is_not_retried_or_counted_against_the_host(monkeypatch):
+    client = make_client(monkeypatch, [{'error': 'model "gemma3" not found'}])
+
+    with pytest.raises(OllamaError) as excinfo:
+        list(client.stream_feedback('prompt'))
+
+    assert not isinstance(excinfo.value, OllamaUnavailableError)
+    assert 'not found' in str(excinfo.value)
+    assert client.session.posts == 1
+    assert client.backends[0].circuit.state == CircuitBreaker.CLOSED
+    assert client.backends[0].outstanding == 0
@@ -0,0 +1,37 @@
+import pytest
+
+from conftest import make_pdf
+from services.pdf_processor import PDFProcessor
+
+
+@pytest.mark.parametrize('text, expected', [
+    # Bullets under numbered criteria are sub-points; the title is not a criterion
+    ('Rubric for HW1\n1. Data cleaning\n- handles nulls\n- removes dups\n2. Plots',
+     ['1. Data cleaning - handles nulls - removes dups', '2. Plots']),
+    ('1) Loads the data\n  from the CSV file\n\n2) Explains the model\n',
+     ['1) Loads the data from the CSV file', '2) Explains the model']),
+    # Without numbered items, bullets start criteria
+    ('Marking guide\n• Clear markdown\n• Code runs\n  without errors\n* Tests pass',
+     ['• Clear markdown', '• Code runs without errors', '* Tests pass']),
+    # A leading hyphen without a space is not a bullet
+    ('- Cleans data\n-5 points if late', ['- Cleans data -5 points if late']),
+    ('Write a clear, well documented notebook.', []),
+    ('', []),
+])
+def test_extract_criteria(text, expected):
+    assert PDFProcessor().extract_criteria(text) == expected
+
+
+def test_parallel_extraction_keeps_page_order(tmp_path):
+    pdf_path = tmp_path / 'rubric.pdf'
+    pdf_path.write_bytes(make_pdf([f'Page {number}' for number in range(1, 26)]))
+
+    serial = PDFProcessor(extract_workers=1).extract_text(str(pdf_path))
+    parallel = PDFProcessor(extract_workers=2, min_parallel_pages=2).extract_text(str(pdf_path))
+    # Again on the same pool, which must see a PDF replaced under the same path
+    pdf_path.write_bytes(make_pdf([f'Criterion {number}' for number in range(1, 5)]))
+    replaced = PDFProcessor(extract_workers=2, min_parallel_pages=2).extract_text(str(pdf_path))
+
+    assert parallel == serial
+    assert parallel.split('\n\n') == [f'Page {number}' for number in range(1, 26)]
+    assert replaced.split('\n\n') == [f'Criterion {number}' for number in range(1, 5)]
@@ -0,0 +1,71 @@
+import os
+
+from conftest import make_notebook, make_zip
+from models import db, Submission
+
+
+def upload(client, members):
+    response = client.post('/upload-submissions', data={'submissions_file': (make_zip(members), 'submissions.zip')})
+    assert response.status_code == 302
+
+
+def submissions():
+    db.session.expire_all()
+    return {row.notebook_file: row for row in Submission.query.filter_by(folder_name='alice')}
+
+
+def test_each_notebook_in_a_folder_is_its_own_submission(client):
+    upload(client, {'alice/part1.ipynb': make_notebook('a = 1'), 'alice/part2.ipynb': make_notebook('b = 2')})
+    first = submissions()
+    first_hashes = {name: row.content_hash for name, row in first.items()}
+    assert sorted(first) == ['part1.ipynb', 'part2.ipynb']
+    assert first['part1.ipynb'].notebook_content['cells'][0]['source'] == 'a = 1'
+    assert first['part2.ipynb'].notebook_content['cells'][0]['source'] == 'b = 2'
+
+    upload(client, {'alice/part1.ipynb': make_notebook('a = 10'), 'alice/part2.ipynb': make_notebook('b = 2')})
+    second = submissions()
+
+    assert Submission.query.count() == 2
+    assert {name: row.id for name, row in second.items()} == {name: row.id for name, row in first.items()}
+    assert second['part1.ipynb'].notebook_content['cells'][0]['source'] == 'a = 10'
+    assert second['part1.ipynb'].content_hash != first_hashes['part1.ipynb']
+    assert second['part2.ipynb'].content_hash == first_hashes['part2.ipynb']
+
+
+def test_deleting_one_notebook_keeps_the_shared_folder(client):
+    upload(client, {'alice/part1.ipynb': make_notebook('a = 1'), 'alice/part2.ipynb': make_notebook('b = 2'),
+                    'alice/data.csv': 'id\n1\n'})
+    part1, part2 = submissions()['part1.ipynb'], submissions()['part2.ipynb']
+
+    client.get(f'/delete_submission/{part1.id}')
+
+    assert os.path.isdir(part2.file_path)
+    assert client.get(f'/raw-file/{part2.id}/data.csv').data == b'id\n1\n'
+
+
+def upload_as(client, zip_name, members):
+    # A distinct name gives the upload its own directory even within the same second
+    response = client.post('/upload-submissions', data={'submissions_file': (make_zip(members), zip_name)})
+    assert response.status_code == 302
+
+
+def test_resubmission_removes_the_replaced_upload_once_unused(client):
+    upload_as(client, 'first.zip', {'alice/part1.ipynb': make_notebook('a = 1'),
+                                    'alice/part2.ipynb': make_notebook('b = 2')})
+    first_dir = os.path.dirname(submissions()['part1.ipynb'].archive_path)
+
+    # part2 still lives in the first upload, so it is kept
+    upload_as(client, 'second.zip', {'alice/part1.ipynb': make_notebook('a = 10')})
+    second_dir = os.path.dirname(submissions()['part1.ipynb'].archive_path)
+    assert second_dir != first_dir
+    assert os.path.isdir(first_dir)
+    part2 = submissions()['part2.ipynb']
+    assert client.get(f'/raw-file/{part2.id}/part2.ipynb').status_code == 200
+
+    upload_as(client, 'third.zip', {'alice/part1.ipynb': make_notebook('a = 100'),
+                                    'alice/part2.ipynb': make_notebook('b = 20')})
+
+    assert not os.path.exists(first_dir)
+    assert not os.path.exists(second_dir)
+    for row in submissions().values():
+        assert os.path.isfile(row.archive_path)
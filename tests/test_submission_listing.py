@@ -0,0 +1,75 @@
+import json
+import base64
+from datetime import datetime
+
+import pytest
+
+from models import db, Submission
+
+
+def add_submissions(folder_names, created_at=datetime(2024, 1, 1)):
+    for folder_name in folder_names:
+        db.session.add(Submission(folder_name=folder_name, created_at=created_at))
+    db.session.commit()
+
+
+def fetch_all(client, **params):
+    """Follow next_cursor from the first page to the last; returns the pages."""
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        response = client.get('/submissions', query_string=query)
+        assert response.status_code == 200
+        pages.append(response.get_json())
+        cursor = pages[-1]['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def cursor_of(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('sort, order', [('created_at', 'desc'), ('created_at', 'asc'),
+                                         ('folder_name', 'desc'), ('folder_name', 'asc')])
+def test_pages_split_rows_with_the_same_sort_value(app, client, sort, order):
+    # Every row has the same created_at, and folder names repeat, so pages split ties
+    add_submissions(['b', 'a', 'b', 'a', 'b', 'a', 'b'])
+    expected = sorted(Submission.query.all(), key=lambda s: (getattr(s, sort), s.id), reverse=order == 'desc')
+
+    pages = fetch_all(client, sort=sort, order=order, limit=2)
+
+    assert [len(page['submissions']) for page in pages] == [2, 2, 2, 1]
+    assert [row['id'] for page in pages for row in page['submissions']] == [s.id for s in expected]
+
+
+def test_next_cursor_is_null_on_the_last_page(app, client):
+    add_submissions(['a', 'b', 'c', 'd'])
+
+    pages = fetch_all(client, limit=2)
+
+    assert [page['next_cursor'] is None for page in pages] == [False, True]
+    # A page that ends exactly at the last row has no next page either
+    assert len(pages[-1]['submissions']) == 2
+
+
+@pytest.mark.parametrize('sort, cursor', [
+    ('created_at', 'not a cursor!'),
+    ('created_at', cursor_of(['2024-01-01T00:00:00', 1])[:-3]),
+    ('created_at', cursor_of('just a string')),
+    ('created_at', cursor_of(['yesterday', 1])),
+    ('created_at', cursor_of(['2024-01-01T00:00:00', 2 ** 40])),
+    ('created_at', cursor_of(['2024-01-01T00:00:00', '1; DROP TABLE submission'])),
+    ('folder_name', cursor_of([['a'], 1])),
+    ('folder_name', cursor_of({'a': 1, 'b': 2})),
+    ('folder_name', cursor_of(['a', 1.5])),
+    ('folder_name', base64.urlsafe_b64encode(b'\xff\xfe').decode()),
+])
+def test_tampered_cursor_is_rejected(app, client, sort, cursor):
+    add_submissions(['a', 'b'])
+
+    response = client.get('/submissions', query_string={'sort': sort, 'cursor': cursor})
+
+    assert response.status_code == 400
+    assert 'Invalid cursor' in response.get_json()['error']
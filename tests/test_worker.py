@@ -0,0 +1,103 @@
+import time
+import threading
+from datetime import datetime, timedelta
+
+import worker
+from models import db, Criteria, Submission, AnalysisJob
+from services.ollama_client import CircuitOpenError
+
+
+def add_job(**values):
+    submission = Submission(folder_name='student')
+    db.session.add(submission)
+    db.session.flush()
+    job = AnalysisJob(batch_id='batch', submission_id=submission.id, **values)
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def run_until(app, condition, requeue_interval=60, timeout=10):
+    """Run one worker thread until condition() holds; returns whether the thread was still alive."""
+    stop_event = threading.Event()
+    thread = threading.Thread(target=worker.run_worker_thread,
+                              args=('test-worker', stop_event, 0.05, threading.Event(), requeue_interval))
+    thread.start()
+    try:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, "worker did not reach the expected state"
+            time.sleep(0.05)
+        return thread.is_alive()
+    finally:
+        stop_event.set()
+        thread.join(timeout)
+
+
+def job_state(job_id):
+    db.session.remove()
+    return db.session.get(AnalysisJob, job_id)
+
+
+def test_failed_flush_is_rolled_back_and_retried(app, monkeypatch):
+    def process_job(job):
+        # Commit once so the job's attributes expire, then leave the session needing a rollback
+        db.session.add(Criteria(id=1, name='criteria', text='1. Runs'))
+        db.session.commit()
+        db.session.add(Criteria(id=1, name='duplicate', text='1. Runs'))
+        db.session.commit()
+
+    monkeypatch.setattr(worker, 'process_job', process_job)
+    job_id = add_job()
+
+    alive = run_until(app, lambda: job_state(job_id).status == 'failed')
+
+    job = job_state(job_id)
+    assert alive
+    assert job.attempts == 3
+    assert 'UNIQUE constraint failed' in job.error
+
+
+def test_running_worker_requeues_expired_leases(app, monkeypatch):
+    monkeypatch.setattr(worker, 'process_job', lambda job: None)
+    job_id = add_job(status='running', attempts=1, worker_id='crashed',
+                     started_at=datetime.utcnow() - timedelta(hours=1))
+
+    run_until(app, lambda: job_state(job_id).status == 'done', requeue_interval=0)
+
+    assert job_state(job_id).attempts == 2
+
+
+def test_embedded_worker_runs_only_when_enabled(app, monkeypatch):
+    monkeypatch.setattr(worker, 'process_job', lambda job: None)
+    monkeypatch.setattr(worker, 'release_model_if_drained', lambda worked: None)
+    monkeypatch.setenv('ANALYSIS_WORKER_POLL_INTERVAL', '0.05')
+    job_id = add_job()
+
+    assert worker.start_embedded_worker() is None
+
+    monkeypatch.setenv('RUN_EMBEDDED_WORKER', 'true')
+    stop = worker.start_embedded_worker()
+    try:
+        deadline = time.monotonic() + 10
+        while job_state(job_id).status != 'done':
+            assert time.monotonic() < deadline, "embedded worker did not process the job"
+            time.sleep(0.05)
+    finally:
+        stop()
+
+
+def test_job_is_postponed_while_the_circuit_is_open(app, monkeypatch):
+    def process_job(job):
+        raise CircuitOpenError("Every Ollama host is failing", retry_after=60)
+
+    monkeypatch.setattr(worker, 'process_job', process_job)
+    job_id = add_job()
+
+    run_until(app, lambda: job_state(job_id).error is not None)
+
+    job = job_state(job_id)
+    assert job.status == 'pending'
+    assert job.attempts == 0
+    assert job.worker_id is None
+    assert job.error == "Every Ollama host is failing"
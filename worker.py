@@ -0,0 +1,262 @@
+"""
+Background worker that drains the analysis job queue.
+
+Run one or more of these alongside the web app:
+
+    python worker.py --concurrency 4
+"""
+import os
+import time
+import signal
+import socket
+import logging
+import argparse
+import threading
+
+from app import app, job_queue, grader, ollama_client, model_warmer
+from models import db, Criteria, AnalysisSettings
+from services.ollama_client import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+def process_job(job):
+    """
+    Grade the submission referenced by a claimed job.
+
+    Args:
+        job (AnalysisJob): The claimed job.
+    """
+    submission = job.submission
+    if submission is None:
+        raise ValueError(f"Submission {job.submission_id} no longer exists")
+
+    criteria = db.session.get(Criteria, job.criteria_id) if job.criteria_id else None
+    if criteria is None:
+        criteria = Criteria.query.order_by(Criteria.created_at.desc()).first()
+    if criteria is None:
+        raise ValueError("No assessment criteria found")
+
+    settings = AnalysisSettings.query.first()
+    if settings is None:
+        raise ValueError("Analysis settings not found")
+
+    started = time.perf_counter()
+    with ollama_client.measure() as timings:
+        _, cache_hit = grader.grade(submission, criteria, settings, bypass_cache=job.bypass_cache)
+    job.cache_hit = cache_hit
+    if timings.requests:
+        job.cold_start = timings.cold_start
+        job.load_ms = timings.load_ms
+        job.latency_ms = round((time.perf_counter() - started) * 1000)
+
+
+def record_failure(worker_id, job_id, record, job, error):
+    """
+    Hand a failed job back to the queue without letting a database error end the thread.
+
+    If this fails too, the job keeps its lease and is re-queued once the lease expires.
+
+    Args:
+        worker_id (str): Identifier of the worker thread.
+        job_id (int): ID of the job, read before the session was rolled back.
+        record (callable): job_queue.fail or job_queue.postpone.
+        job (AnalysisJob): The claimed job.
+        error (str): Error message recorded on the job.
+    """
+    try:
+        record(job, error)
+    except Exception as e:
+        logger.error(f"{worker_id}: could not record the failure of job {job_id}: {str(e)}")
+        db.session.rollback()
+
+
+def run_worker_thread(worker_id, stop_event, poll_interval, worked, requeue_interval=None):
+    """
+    Claim and process jobs until asked to stop.
+
+    Args:
+        worker_id (str): Identifier recorded on claimed jobs.
+        stop_event (threading.Event): Set to request shutdown.
+        poll_interval (float): Seconds to wait when the queue is empty.
+        worked (threading.Event): Set whenever a job finishes, so the model can be
+            released once the queue drains.
+        requeue_interval (float): Seconds between sweeps that re-queue jobs whose
+            lease expired, so a job stranded by a dead thread is picked up again.
+    """
+    if requeue_interval is None:
+        requeue_interval = float(os.environ.get("ANALYSIS_JOB_REQUEUE_SECONDS", 60))
+    next_requeue = time.monotonic() + requeue_interval
+
+    with app.app_context():
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() >= next_requeue:
+                    next_requeue = time.monotonic() + requeue_interval
+                    job_queue.requeue_stale()
+                job = job_queue.claim(worker_id)
+            except Exception as e:
+                logger.error(f"{worker_id}: error claiming job: {str(e)}")
+                db.session.rollback()
+                stop_event.wait(poll_interval)
+                continue
+
+            if job is None:
+                stop_event.wait(poll_interval)
+                continue
+
+            # Read now: after a failed flush the job's attributes can't be loaded until rollback
+            job_id = job.id
+            logger.info(f"{worker_id}: processing job {job_id} (submission {job.submission_id})")
+            try:
+                process_job(job)
+                job_queue.complete(job)
+            except CircuitOpenError as e:
+                # Ollama is down: hand the job back untouched and wait for the circuit to reset
+                db.session.rollback()
+                logger.warning(f"{worker_id}: job {job_id} postponed: {str(e)}")
+                record_failure(worker_id, job_id, job_queue.postpone, job, str(e))
+                stop_event.wait(max(poll_interval, e.retry_after))
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"{worker_id}: job {job_id} failed: {str(e)}")
+                record_failure(worker_id, job_id, job_queue.fail, job, str(e))
+            finally:
+                worked.set()
+                db.session.remove()
+
+
+def release_model_if_drained(worked):
+    """
+    Unload the model from Ollama once jobs have run and none are left in the queue.
+
+    Args:
+        worked (threading.Event): Set by the worker threads when a job finishes.
+    """
+    if not worked.is_set():
+        return
+    with app.app_context():
+        try:
+            if job_queue.active_count() == 0:
+                worked.clear()
+                model_warmer.release()
+        except Exception as e:
+            logger.error(f"Error releasing the Ollama model: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+def start_worker_threads(worker_name, concurrency, poll_interval, stop_event, worked):
+    """
+    Start the threads that claim and process jobs.
+
+    Args:
+        worker_name (str): Prefix of the worker IDs recorded on claimed jobs.
+        concurrency (int): Number of threads, and so of jobs processed in parallel.
+        poll_interval (float): Seconds to wait when the queue is empty.
+        stop_event (threading.Event): Set to request shutdown.
+        worked (threading.Event): Set by the threads whenever a job finishes.
+
+    Returns:
+        list: The started threads.
+    """
+    threads = []
+    for i in range(concurrency):
+        thread = threading.Thread(
+            target=run_worker_thread,
+            args=(f"{worker_name}:{i}", stop_event, poll_interval, worked),
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def release_jobs(worker_name, concurrency):
+    """Hand back anything still marked as ours so another worker can resume it."""
+    with app.app_context():
+        for i in range(concurrency):
+            job_queue.release(f"{worker_name}:{i}")
+
+
+def start_embedded_worker():
+    """
+    Drain the queue from threads inside the web process when RUN_EMBEDDED_WORKER is set.
+
+    For deployments that run a single process, such as one container or an
+    autoscaled Replit deployment; larger ones run worker.py separately.
+
+    Returns:
+        callable: Waits for in-flight jobs and stops the threads, or None when disabled.
+    """
+    if os.environ.get("RUN_EMBEDDED_WORKER", "false").lower() != "true":
+        return None
+
+    concurrency = int(os.environ.get("ANALYSIS_WORKER_CONCURRENCY", 2))
+    poll_interval = float(os.environ.get("ANALYSIS_WORKER_POLL_INTERVAL", 2))
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+    with app.app_context():
+        job_queue.requeue_stale()
+
+    stop_event = threading.Event()
+    worked = threading.Event()
+    threads = start_worker_threads(worker_name, concurrency, poll_interval, stop_event, worked)
+
+    def release_model():
+        while not stop_event.wait(1):
+            release_model_if_drained(worked)
+
+    threading.Thread(target=release_model, daemon=True).start()
+    logger.info(f"Embedded worker {worker_name} started with concurrency {concurrency}")
+
+    def stop():
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+        release_jobs(worker_name, concurrency)
+
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the analysis job queue")
+    parser.add_argument(
+        '--concurrency', type=int,
+        default=int(os.environ.get("ANALYSIS_WORKER_CONCURRENCY", 2)),
+        help="Number of jobs processed in parallel by this worker"
+    )
+    parser.add_argument(
+        '--poll-interval', type=float,
+        default=float(os.environ.get("ANALYSIS_WORKER_POLL_INTERVAL", 2)),
+        help="Seconds to wait between polls when the queue is empty"
+    )
+    args = parser.parse_args()
+
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+
+    # Resume jobs abandoned by a crashed worker before taking new ones
+    with app.app_context():
+        job_queue.requeue_stale()
+
+    stop_event = threading.Event()
+    worked = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    threads = start_worker_threads(worker_name, args.concurrency, args.poll_interval, stop_event, worked)
+    logger.info(f"Worker {worker_name} started with concurrency {args.concurrency}")
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+            release_model_if_drained(worked)
+    except KeyboardInterrupt:
+        logger.info("Shutting down, waiting for in-flight jobs to finish...")
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        release_jobs(worker_name, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()